@@ -1,17 +1,305 @@
 import os
+import ast
+import functools
 import importlib
+import inspect
+import json
+import re
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 
 action_handlers = {}
+action_signatures: Dict[str, Tuple[str, ...]] = {}
+action_limits: Dict[str, Tuple[Optional[float], Optional[int]]] = {}
+action_batches: Dict[str, str] = {}
+batch_runners: Dict[str, Callable] = {}
 
-def register_action(name):
+# Filled by load_actions from a static scan, so plugins are only imported
+# when one of their actions is first compiled. Nothing in this module may call
+# print(): importing the actions.print plugin shadows it in this namespace.
+action_modules: Dict[str, str] = {}
+batch_runner_modules: Dict[str, str] = {}
+module_import_times: Dict[str, float] = {}  # module -> seconds spent importing
+
+MANIFEST_VERSION = 1
+REGISTER_DECORATORS = ('register_action', 'register_batch_runner')
+
+# Parameter names that receive the running DeckMasterApp
+APP_INSTANCE_PARAMS = ('app_instance', 'self')
+
+PARAM_PATTERN = re.compile(r'''
+    "[^"]*"          |   # double quoted string
+    '[^']*'          |   # single quoted string
+    \[[^\[\]]*\]     |   # bracketed list (no nested brackets)
+    [^,\s][^,]*          # unquoted token (no comma or whitespace at start)
+''', re.VERBOSE)
+
+
+class ActionError(ValueError):
+    """Raised when an action string can't be turned into a plan."""
+
+
+class ActionStep(NamedTuple):
+    command: str
+    handler: Callable
+    args: tuple
+    wants_app_instance: bool
+    batch: Optional[str] = None
+
+
+_plans: Dict[str, Tuple[ActionStep, ...]] = {}
+
+
+def register_action(name, timeout: Optional[float] = None, max_concurrency: Optional[int] = None,
+                    batch: Optional[str] = None):
+    """Register an action handler.
+
+    ``timeout`` (seconds) and ``max_concurrency`` override the executor's
+    defaults for this handler. Handlers may be plain functions or ``async def``.
+
+    With ``batch`` the handler only builds requests: it returns one request
+    (or a list of them) and the batch runner registered under that name with
+    :func:`register_batch_runner` sends them. Adjacent steps of the same batch
+    in an ``&&`` chain are sent together in a single call to the runner.
+    """
     def decorator(func):
         action_handlers[name] = func
+        action_signatures[name] = tuple(inspect.signature(func).parameters)
+        action_limits[name] = (timeout, max_concurrency)
+        if batch:
+            action_batches[name] = batch
+        else:
+            action_batches.pop(name, None)
+        _plans.clear()
+        return func
+    return decorator
+
+def register_batch_runner(name):
+    """Register the function that sends the requests built by ``batch=name`` handlers."""
+    def decorator(func):
+        batch_runners[name] = func
+        _plans.clear()
         return func
     return decorator
 
-def load_actions():
+_import_lock = threading.RLock()
+
+def default_manifest_path() -> str:
+    base = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'deckmaster', 'actions.json')
+
+def _decorator_name(node) -> Optional[str]:
+    func = node.func if isinstance(node, ast.Call) else node
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    return None
+
+def scan_action_module(path: str) -> Dict:
+    """Find the actions and batch runners a plugin registers without importing it.
+
+    Only ``@register_action("literal")`` style registrations can be seen; a
+    module registering anything else is marked ``eager`` and imported up front.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    found = {'actions': [], 'batch_runners': [], 'eager': False}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and _decorator_name(node) in REGISTER_DECORATORS:
+            name = node.args[0] if node.args else None
+            if not (isinstance(name, ast.Constant) and isinstance(name.value, str)):
+                found['eager'] = True
+            elif _decorator_name(node) == 'register_action':
+                found['actions'].append(name.value)
+            else:
+                found['batch_runners'].append(name.value)
+    return found
+
+def _read_manifest(path: str) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {'version': MANIFEST_VERSION, 'modules': {}}
+
+def _write_manifest(path: str, manifest: Dict) -> None:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # The manifest is only a cache; the next start scans again
+
+def load_actions(eager: bool = False, manifest_path: Optional[str] = None) -> None:
+    """Index the action plugins in this package.
+
+    Plugins are scanned statically and the result is kept in a manifest file
+    (re-scanning only files whose size or mtime changed), so startup imports
+    nothing but plugins the scan can't see into. Everything else is imported
+    the first time one of its actions is compiled; pass ``eager=True`` to
+    import every plugin now.
+    """
     actions_dir = os.path.dirname(__file__)
-    for filename in os.listdir(actions_dir):
-        if filename.endswith(".py") and filename != "__init__.py":
-            module_name = f"actions.{filename[:-3]}"
-            importlib.import_module(module_name)
+    manifest_path = manifest_path or default_manifest_path()
+    manifest = _read_manifest(manifest_path)
+    cached = manifest['modules']
+    modules = {}
+    for filename in sorted(os.listdir(actions_dir)):
+        # Underscore modules are support code, not action plugins
+        if not filename.endswith(".py") or filename.startswith("_"):
+            continue
+        path = os.path.join(actions_dir, filename)
+        stat = os.stat(path)
+        entry = cached.get(filename)
+        if not entry or entry.get('mtime') != stat.st_mtime or entry.get('size') != stat.st_size:
+            entry = dict(scan_action_module(path), mtime=stat.st_mtime, size=stat.st_size)
+        modules[filename] = entry
+
+    if modules != cached:
+        _write_manifest(manifest_path, {'version': MANIFEST_VERSION, 'modules': modules})
+
+    for filename, entry in modules.items():
+        module_name = f"actions.{filename[:-3]}"
+        for name in entry['actions']:
+            action_modules[name] = module_name
+        for name in entry['batch_runners']:
+            batch_runner_modules[name] = module_name
+
+    for filename, entry in modules.items():
+        if eager or entry['eager']:
+            import_action_module(f"actions.{filename[:-3]}")
+
+def import_action_module(module_name: str):
+    """Import an action plugin, recording how long the import took."""
+    with _import_lock:
+        if module_name in module_import_times:
+            return importlib.import_module(module_name)
+        started = time.perf_counter()
+        module = importlib.import_module(module_name)
+        module_import_times[module_name] = time.perf_counter() - started
+    return module
+
+def available_actions() -> List[str]:
+    return sorted(set(action_modules) | set(action_handlers))
+
+def _lookup(registry: Dict[str, Callable], modules: Dict[str, str], name: str, kind: str) -> Optional[Callable]:
+    if name not in registry and name in modules:
+        try:
+            import_action_module(modules[name])
+        except Exception as e:
+            raise ActionError(f"Failed to load {kind} '{name}' from {modules[name]}: {e}") from e
+    return registry.get(name)
+
+def split_params(param_str: str) -> list:
+    matches = PARAM_PATTERN.findall(param_str)
+    return [m.strip() for m in matches if m.strip()]
+
+def _parse_params(param_str: str) -> list:
+    params = []
+    for token in split_params(param_str):
+        try:
+            params.append(ast.literal_eval(token))
+        except Exception:
+            params.append(token)
+    return params
+
+def _compile_step(act: str) -> ActionStep:
+    if ':' in act:
+        command, param_str = act.split(':', 1)
+    else:
+        command, param_str = act, None
+
+    handler = _lookup(action_handlers, action_modules, command, "action")
+    if not handler:
+        raise ActionError(f"No handler for action '{command}'")
+
+    params = _parse_params(param_str) if param_str else []
+    param_names = action_signatures[command]
+    wants_app_instance = False
+
+    if len(param_names) == 0:
+        args = ()
+    elif len(param_names) == 1:
+        arg = params[0] if params else None
+        # Single-parameter handlers always receive strings for numbers
+        if isinstance(arg, int):
+            arg = str(arg)
+        args = (arg,)
+    else:
+        if params and isinstance(params[0], int):
+            params[0] = str(params[0])
+        wants_app_instance = param_names[-1] in APP_INSTANCE_PARAMS
+        args = tuple(params)
+
+    try:
+        inspect.signature(handler).bind(*args, *((None,) if wants_app_instance else ()))
+    except TypeError as e:
+        raise ActionError(f"Bad parameters for action '{command}': {e}") from None
+
+    return ActionStep(command, handler, args, wants_app_instance, action_batches.get(command))
+
+def _run_batch(batch: str, calls: tuple):
+    requests = []
+    for handler, args in calls:
+        built = handler(*args)
+        requests.extend(built if isinstance(built, list) else [built])
+    return batch_runners[batch](requests)
+
+def _merge_batches(steps: List[ActionStep]) -> Tuple[ActionStep, ...]:
+    """Fold runs of adjacent steps that share a batch into one step."""
+    merged = []
+    run: List[ActionStep] = []
+    for step in steps + [None]:
+        if run and (step is None or step.batch != run[0].batch):
+            batch = run[0].batch
+            if not _lookup(batch_runners, batch_runner_modules, batch, "batch runner"):
+                raise ActionError(f"No batch runner '{batch}' for action '{run[0].command}'")
+            calls = tuple((s.handler, s.args) for s in run)
+            merged.append(ActionStep(
+                "+".join(s.command for s in run), functools.partial(_run_batch, batch, calls), (), False, batch
+            ))
+            run = []
+        if step is None:
+            break
+        if step.batch:
+            run.append(step)
+        else:
+            merged.append(step)
+    return tuple(merged)
+
+def compile_action(action: str) -> Tuple[ActionStep, ...]:
+    """Turn an action string into an immutable plan of handler calls.
+
+    ``a:x && b:y`` becomes one step per command, with parameters parsed and
+    matched against the handler's signature up front; adjacent batched
+    commands share a step. Plans are memoized by action string until another
+    action is registered.
+    """
+    plan = _plans.get(action)
+    if plan is None:
+        plan = _merge_batches([_compile_step(act) for act in (a.strip() for a in action.split('&&')) if act])
+        _plans[action] = plan
+    return plan
+
+
+from actions._executor import ActionBusy, ActionExecutor, ActionTimeout  # noqa: E402
+
+# The HTTP client pulls in requests, so it is only imported when a plugin asks for it
+_LAZY_EXPORTS = {
+    'AsyncHTTPClient': 'actions._http',
+    'HTTPClient': 'actions._http',
+    'get_async_http_client': 'actions._http',
+    'get_http_client': 'actions._http',
+}
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name]), name)
+    raise AttributeError(f"module 'actions' has no attribute '{name}'")
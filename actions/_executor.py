@@ -0,0 +1,166 @@
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence
+
+from actions import ActionStep, action_limits
+from metrics import counter, histogram
+
+ACTION_SECONDS = histogram('deckmaster_action_seconds', "Time an action handler took, by handler", ('handler',))
+ACTION_QUEUE_SECONDS = histogram('deckmaster_action_queue_seconds',
+                                 "Time a press waited for a free handler slot, by handler", ('handler',))
+ACTION_RESULTS = counter('deckmaster_actions_total',
+                         "Action handler runs by handler and result (success, failure, timeout, busy, cancelled)",
+                         ('handler', 'result'))
+
+
+class ActionTimeout(Exception):
+    """A step ran longer than its handler's timeout."""
+
+
+class ActionBusy(Exception):
+    """Too many presses are already waiting for the same handler."""
+
+
+class ActionExecutor:
+    """Runs action plans off the GUI thread.
+
+    Plans run on a private event loop thread. ``async def`` handlers are
+    awaited on that loop, plain handlers run in a thread pool, and steps that
+    take ``app_instance`` are handed to ``run_on_gui`` because they touch Qt
+    widgets. Each handler gets a timeout and a concurrency cap (see
+    ``register_action``); presses beyond the cap wait in a bounded queue and
+    can be cancelled with :meth:`cancel_all`.
+
+    ``on_done(action, error)`` is called on the loop thread when a plan
+    finishes, with ``error=None`` on success.
+    """
+
+    def __init__(self, run_on_gui: Callable[[Callable], None],
+                 on_done: Optional[Callable[[str, Optional[BaseException]], None]] = None,
+                 max_workers: Optional[int] = None):
+        self.run_on_gui = run_on_gui
+        self.on_done = on_done
+        self.default_timeout = float(os.getenv('ACTION_TIMEOUT', 10))
+        self.default_concurrency = int(os.getenv('ACTION_MAX_CONCURRENCY', 4))
+        self.max_pending = int(os.getenv('ACTION_MAX_PENDING', 16))
+        self.loop = asyncio.new_event_loop()
+        self.pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers or int(os.getenv('ACTION_WORKERS', 8)), thread_name_prefix="action"
+        )
+        self._thread = threading.Thread(target=self._run_loop, name="ActionExecutor", daemon=True)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._waiting: Dict[str, int] = {}
+        self._jobs = set()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def submit(self, action: str, plan: Sequence[ActionStep], app_instance=None) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(self._run_plan(action, plan, app_instance), self.loop)
+
+    def cancel_all(self) -> None:
+        """Cancel every plan that is still queued or running.
+
+        Steps already running in the thread pool finish in the background;
+        the remaining steps of their plans are skipped.
+        """
+        self.loop.call_soon_threadsafe(lambda: [job.cancel() for job in list(self._jobs)])
+
+    def shutdown(self) -> None:
+        self.cancel_all()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _run_plan(self, action: str, plan: Sequence[ActionStep], app_instance) -> None:
+        job = asyncio.current_task()
+        self._jobs.add(job)
+        error = None
+        try:
+            for step in plan:
+                await self._run_step(step, app_instance)
+        except asyncio.CancelledError as e:
+            error = e
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            self._jobs.discard(job)
+            if self.on_done:
+                self.on_done(action, error)
+
+    def _limits(self, command: str):
+        timeout, max_concurrency = action_limits.get(command, (None, None))
+        return (
+            self.default_timeout if timeout is None else timeout,
+            self.default_concurrency if max_concurrency is None else max_concurrency
+        )
+
+    async def _run_step(self, step: ActionStep, app_instance) -> None:
+        timeout, max_concurrency = self._limits(step.command)
+        semaphore = self._semaphores.get(step.command)
+        if semaphore is None:
+            semaphore = self._semaphores[step.command] = asyncio.Semaphore(max_concurrency)
+
+        if semaphore.locked() and self._waiting.get(step.command, 0) >= self.max_pending:
+            ACTION_RESULTS.labels(step.command, 'busy').inc()
+            raise ActionBusy(f"Action '{step.command}' is busy, press ignored")
+        self._waiting[step.command] = self._waiting.get(step.command, 0) + 1
+        queued = time.perf_counter()
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting[step.command] -= 1
+        started = time.perf_counter()
+        ACTION_QUEUE_SECONDS.labels(step.command).observe(started - queued)
+
+        release = True
+        result = 'failure'
+        try:
+            args = step.args + ((app_instance,) if step.wants_app_instance else ())
+            if step.wants_app_instance:
+                future = concurrent.futures.Future()
+                self.run_on_gui(functools.partial(_call_into, future, step.handler, args))
+                call = asyncio.wrap_future(future)
+            elif inspect.iscoroutinefunction(step.handler):
+                call = asyncio.ensure_future(step.handler(*args))
+            else:
+                call = self.loop.run_in_executor(self.pool, functools.partial(step.handler, *args))
+
+            try:
+                await asyncio.wait_for(asyncio.shield(call), timeout)
+                result = 'success'
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                result = 'timeout' if isinstance(e, asyncio.TimeoutError) else 'cancelled'
+                if not call.done():
+                    # A thread can't be interrupted: keep its slot until it really ends
+                    release = False
+                    call.add_done_callback(lambda _: semaphore.release())
+                    if inspect.iscoroutinefunction(step.handler):
+                        call.cancel()
+                if isinstance(e, asyncio.TimeoutError):
+                    raise ActionTimeout(f"Action '{step.command}' timed out after {timeout:g}s") from None
+                raise
+        finally:
+            if release:
+                semaphore.release()
+            ACTION_SECONDS.labels(step.command).observe(time.perf_counter() - started)
+            ACTION_RESULTS.labels(step.command, result).inc()
+
+
+def _call_into(future: concurrent.futures.Future, handler: Callable, args: tuple) -> None:
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        future.set_result(handler(*args))
+    except BaseException as e:
+        future.set_exception(e)
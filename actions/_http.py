@@ -0,0 +1,102 @@
+import asyncio
+import functools
+import os
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Transient upstream errors worth another attempt
+RETRY_STATUSES = (502, 503, 504)
+
+
+class HTTPClient:
+    """Keep-alive HTTP client shared by action handlers.
+
+    Wraps one ``requests.Session`` whose adapter keeps a pool of warm
+    connections per host, so repeated presses against the same service skip
+    the TCP/TLS handshake. Every request gets a default timeout, and failed
+    connects or gateway errors are retried a bounded number of times with
+    exponential backoff. Non-idempotent methods (POST) are only retried when
+    the request never reached the server.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, retries: Optional[int] = None,
+                 backoff: Optional[float] = None, pool_size: Optional[int] = None):
+        self.timeout = float(os.getenv('HTTP_TIMEOUT', 5)) if timeout is None else timeout
+        retries = int(os.getenv('HTTP_RETRIES', 2)) if retries is None else retries
+        backoff = float(os.getenv('HTTP_BACKOFF', 0.3)) if backoff is None else backoff
+        pool_size = int(os.getenv('HTTP_POOL_SIZE', 8)) if pool_size is None else pool_size
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class AsyncHTTPClient:
+    """``async`` front-end for :class:`HTTPClient` for ``async def`` handlers.
+
+    Requests run in the loop's default thread pool on the shared session, so
+    they use the same connection pools as the blocking client.
+    """
+
+    def __init__(self, client: HTTPClient):
+        self.client = client
+
+    async def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.client.request, method, url, **kwargs))
+
+    async def get(self, url: str, **kwargs) -> requests.Response:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> requests.Response:
+        return await self.request('POST', url, **kwargs)
+
+
+_client: Optional[HTTPClient] = None
+_async_client: Optional[AsyncHTTPClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HTTPClient:
+    """Return the process-wide :class:`HTTPClient`, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HTTPClient()
+    return _client
+
+
+def get_async_http_client() -> AsyncHTTPClient:
+    """Return the process-wide :class:`AsyncHTTPClient`."""
+    global _async_client
+    if _async_client is None:
+        client = get_http_client()
+        with _client_lock:
+            if _async_client is None:
+                _async_client = AsyncHTTPClient(client)
+    return _async_client
@@ -0,0 +1,156 @@
+import asyncio
+import concurrent.futures
+import json
+import logging
+import threading
+from typing import Dict, Hashable, Optional
+
+log = logging.getLogger(__name__)
+
+
+class SocketClient:
+    """Base for the long-lived WebSocket connections used by actions.
+
+    The connection lives on its own event loop thread and is re-established
+    with exponential backoff (``retry_min`` doubling up to ``retry_max``
+    seconds) whenever it drops. With a ``health_interval`` the connection is
+    probed with :meth:`_health_check` while idle and recycled when the probe
+    fails or takes longer than ``timeout``.
+
+    Subclasses implement :meth:`_handshake` (authentication),
+    :meth:`_dispatch` (every incoming message) and optionally
+    :meth:`_on_connected`. Requests are matched to replies by id through
+    :meth:`_request` and :meth:`_resolve`, so any number of callers can share
+    the connection.
+    """
+
+    name = "socket"
+    error = ConnectionError
+
+    def __init__(self, url: str, timeout: float, retry_min: float, retry_max: float,
+                 health_interval: Optional[float] = None):
+        self.url = url
+        self.timeout = timeout
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        self.health_interval = health_interval
+        self.connected = threading.Event()
+        self.loop = asyncio.new_event_loop()
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._ws = None
+        self._task = None
+        self._retry_delay = retry_min
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self.loop.call_soon_threadsafe(self._task.cancel)
+        self._thread.join(timeout=5)
+
+    def run(self, coro, what: str):
+        """Run ``coro`` on the connection's loop and wait for its result.
+
+        Waits up to ``timeout`` for the connection to come up first. Called
+        from any thread other than the connection's own.
+        """
+        if not self.connected.wait(self.timeout):
+            coro.close()
+            raise self.error(f"Not connected to {self.name} at {self.url}")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(self.timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise self.error(f"{what} timed out after {self.timeout:g}s") from None
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self._task = self.loop.create_task(self._supervise())
+        try:
+            self.loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+
+    async def _supervise(self) -> None:
+        while True:
+            try:
+                await self._session()
+                log.info("%s connection closed", self.name)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("%s connection to %s failed: %s", self.name, self.url, e)
+            finally:
+                self.connected.clear()
+                self._ws = None
+                for future in self._pending.values():
+                    if not future.done():
+                        future.set_exception(self.error(f"{self.name} connection lost"))
+                self._pending.clear()
+
+            await asyncio.sleep(self._retry_delay)
+            self._retry_delay = min(self._retry_delay * 2, self.retry_max)
+
+    async def _session(self) -> None:
+        import websockets
+
+        async with websockets.connect(self.url, max_size=None, open_timeout=self.timeout) as ws:
+            await asyncio.wait_for(self._handshake(ws), self.timeout)
+            self._ws = ws
+            reader = asyncio.ensure_future(self._read(ws))
+            try:
+                await self._on_connected()
+                self._retry_delay = self.retry_min
+                self.connected.set()
+                log.info("%s connected to %s", self.name, self.url)
+                while True:
+                    done, _ = await asyncio.wait({reader}, timeout=self.health_interval)
+                    if done:
+                        reader.result()
+                        return
+                    try:
+                        await asyncio.wait_for(self._health_check(), self.timeout)
+                    except Exception as e:
+                        raise self.error(f"health check failed: {e!r}") from None
+            finally:
+                reader.cancel()
+
+    async def _read(self, ws) -> None:
+        async for raw in ws:
+            self._dispatch(json.loads(raw))
+
+    async def _request(self, message_id: Hashable, message: Dict):
+        """Send ``message`` and wait until :meth:`_resolve` is called for ``message_id``."""
+        if self._ws is None:
+            raise self.error(f"Not connected to {self.name}")
+        future = self.loop.create_future()
+        self._pending[message_id] = future
+        try:
+            await self._ws.send(json.dumps(message))
+            return await future
+        finally:
+            self._pending.pop(message_id, None)
+
+    def _resolve(self, message_id: Hashable, result=None, error: Optional[BaseException] = None) -> None:
+        future = self._pending.get(message_id)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    async def _handshake(self, ws) -> None:
+        raise NotImplementedError
+
+    def _dispatch(self, message: Dict) -> None:
+        raise NotImplementedError
+
+    async def _on_connected(self) -> None:
+        pass
+
+    async def _health_check(self) -> None:
+        pass
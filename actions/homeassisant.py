@@ -1,35 +1,169 @@
-from actions import register_action
-import requests
+import itertools
+import json
+import logging
+import os
+import threading
+from typing import Callable, Dict, List, Optional
 
-HOMEASSISTANT_URL = "http://homeassistant.local:8123"
-HOMEASSISTANT_TOKEN = ""
+from actions import get_http_client, register_action
+from actions._socket import SocketClient
+
+log = logging.getLogger(__name__)
+
+HOMEASSISTANT_URL = os.getenv("HOMEASSISTANT_URL", "http://homeassistant.local:8123").rstrip("/")
+HOMEASSISTANT_TOKEN = os.getenv("HOMEASSISTANT_TOKEN", "")
+# "rest" makes one HTTP request per press, "websocket" keeps a connection open
+HOMEASSISTANT_TRANSPORT = os.getenv("HOMEASSISTANT_TRANSPORT", "rest").lower()
 
 headers = {
     "Authorization": f"Bearer {HOMEASSISTANT_TOKEN}",
     "Content-Type": "application/json"
 }
 
-@register_action("spotify_play")
-def spotify_play(entity_id):
-    """Resume Spotify playback."""
-    payload = {"entity_id": entity_id}
-    r = requests.post(
-        f"{HOMEASSISTANT_URL}/api/services/media_player/media_play",
+
+class HomeAssistantError(Exception):
+    """A Home Assistant request failed or the connection is down."""
+
+
+def websocket_url(base_url: str) -> str:
+    if base_url.startswith("https://"):
+        base_url = "wss://" + base_url[len("https://"):]
+    elif base_url.startswith("http://"):
+        base_url = "ws://" + base_url[len("http://"):]
+    return f"{base_url}/api/websocket"
+
+
+class HomeAssistantSocket(SocketClient):
+    """One authenticated WebSocket connection to Home Assistant.
+
+    Service calls from any thread are multiplexed over it by message id. The
+    socket subscribes to ``state_changed`` and keeps ``states`` (entity id ->
+    state object) up to date, seeding it with ``get_states`` after every
+    (re)connect.
+
+    Listeners added with :meth:`add_listener` are called on the socket thread
+    as ``callback(entity_id, state)``, with ``state=None`` when an entity is
+    removed.
+    """
+
+    name = "HomeAssistant"
+    error = HomeAssistantError
+
+    def __init__(self, url: str, token: str, timeout: Optional[float] = None):
+        super().__init__(
+            websocket_url(url),
+            float(os.getenv("HOMEASSISTANT_TIMEOUT", 10)) if timeout is None else timeout,
+            float(os.getenv("HOMEASSISTANT_RETRY_MIN", 1)),
+            float(os.getenv("HOMEASSISTANT_RETRY_MAX", 30))
+        )
+        self.token = token
+        self.states: Dict[str, Dict] = {}
+        self._listeners: List[Callable[[str, Optional[Dict]], None]] = []
+        self._ids = itertools.count(1)
+
+    def add_listener(self, callback: Callable[[str, Optional[Dict]], None]) -> None:
+        self._listeners.append(callback)
+
+    def state(self, entity_id: str) -> Optional[Dict]:
+        return self.states.get(entity_id)
+
+    def call_service(self, domain: str, service: str, data: Optional[Dict] = None):
+        """Call a service and wait for Home Assistant to acknowledge it."""
+        return self.run(self._command({
+            "type": "call_service", "domain": domain, "service": service, "service_data": data or {}
+        }), f"{domain}.{service}")
+
+    async def _handshake(self, ws) -> None:
+        await ws.recv()  # auth_required
+        await ws.send(json.dumps({"type": "auth", "access_token": self.token}))
+        reply = json.loads(await ws.recv())
+        if reply.get("type") != "auth_ok":
+            raise HomeAssistantError(f"Authentication failed: {reply.get('message', reply.get('type'))}")
+
+    async def _on_connected(self) -> None:
+        await self._command({"type": "subscribe_events", "event_type": "state_changed"})
+        self._replace_states(await self._command({"type": "get_states"}))
+
+    async def _command(self, message: Dict):
+        message_id = next(self._ids)
+        return await self._request(message_id, dict(message, id=message_id))
+
+    def _dispatch(self, message: Dict) -> None:
+        if message.get("type") == "result":
+            if message.get("success"):
+                self._resolve(message.get("id"), message.get("result"))
+            else:
+                error = message.get("error") or {}
+                self._resolve(message.get("id"), error=HomeAssistantError(error.get("message", "Service call failed")))
+        elif message.get("type") == "event":
+            data = message.get("event", {}).get("data", {})
+            entity_id = data.get("entity_id")
+            if entity_id:
+                self._set_state(entity_id, data.get("new_state"))
+
+    def _set_state(self, entity_id: str, state: Optional[Dict]) -> None:
+        if state is None:
+            self.states.pop(entity_id, None)
+        else:
+            self.states[entity_id] = state
+        for callback in self._listeners:
+            try:
+                callback(entity_id, state)
+            except Exception as e:
+                log.exception("State listener failed: %s", e)
+
+    def _replace_states(self, states: List[Dict]) -> None:
+        fresh = {state["entity_id"]: state for state in states or []}
+        for entity_id in list(self.states):
+            if entity_id not in fresh:
+                self._set_state(entity_id, None)
+        for entity_id, state in fresh.items():
+            if self.states.get(entity_id) != state:
+                self._set_state(entity_id, state)
+
+
+_socket: Optional[HomeAssistantSocket] = None
+_socket_lock = threading.Lock()
+
+
+def get_home_assistant() -> Optional[HomeAssistantSocket]:
+    """Return the shared WebSocket connection, or ``None`` when using REST."""
+    global _socket
+    if HOMEASSISTANT_TRANSPORT != "websocket":
+        return None
+    if _socket is None:
+        with _socket_lock:
+            if _socket is None:
+                _socket = HomeAssistantSocket(HOMEASSISTANT_URL, HOMEASSISTANT_TOKEN)
+                _socket.start()
+    return _socket
+
+
+def call_service(domain, service, payload):
+    """Call a Home Assistant service over the configured transport."""
+    socket = get_home_assistant()
+    if socket is not None:
+        return socket.call_service(domain, service, payload)
+
+    response = get_http_client().post(
+        f"{HOMEASSISTANT_URL}/api/services/{domain}/{service}",
         headers=headers,
         json=payload
     )
-    print(r.text if not r.ok else f"Spotify resumed on {entity_id}")
+    if not response.ok:
+        raise HomeAssistantError(f"{domain}.{service} failed with {response.status_code}: {response.text}")
+
+@register_action("spotify_play")
+def spotify_play(entity_id):
+    """Resume Spotify playback."""
+    call_service("media_player", "media_play", {"entity_id": entity_id})
+    log.info("Spotify resumed", extra={'entity_id': entity_id})
 
 @register_action("spotify_pause")
 def spotify_pause(entity_id):
     """Pause Spotify playback."""
-    payload = {"entity_id": entity_id}
-    r = requests.post(
-        f"{HOMEASSISTANT_URL}/api/services/media_player/media_pause",
-        headers=headers,
-        json=payload
-    )
-    print(r.text if not r.ok else f"Spotify paused on {entity_id}")
+    call_service("media_player", "media_pause", {"entity_id": entity_id})
+    log.info("Spotify paused", extra={'entity_id': entity_id})
 
 @register_action("change_light_color")
 def change_color(entity_id, RGB):
@@ -39,15 +173,11 @@ def change_color(entity_id, RGB):
         "entity_id": entity_id,
         "rgb_color": list(RGB)
     }
-    response = requests.post(
-        f"{HOMEASSISTANT_URL}/api/services/light/turn_on",
-        headers=headers,
-        json=payload
-    )
-    if response.ok:
-        print(f"Light color changed to RGB {RGB} for {entity_id}")
-    else:
-        print(f"Error {response.status_code}: {response.text}")
-
-
+    call_service("light", "turn_on", payload)
+    log.info("Light color changed to RGB %s", RGB, extra={'entity_id': entity_id})
 
+@register_action("toggle_entity")
+def toggle_entity(entity_id):
+    """Toggle any switchable entity (light, switch, fan, ...)."""
+    call_service("homeassistant", "toggle", {"entity_id": entity_id})
+    log.info("Toggled", extra={'entity_id': entity_id})
@@ -1,10 +1,11 @@
-import requests
-from actions import register_action
+import logging
+
+from actions import get_http_client, register_action
+
+log = logging.getLogger(__name__)
 
 @register_action("request")
 def handle_request(url):
-    try:
-        response = requests.get(url)
-        print(f"[Action:request] Requested {url} - Status code: {response.status_code}")
-    except Exception as e:
-        print(f"[Action:request] Failed to request {url}: {e}")
\ No newline at end of file
+    # Errors propagate so the executor reports the failure on the button
+    response = get_http_client().get(url)
+    log.info("Requested %s - Status code: %s", url, response.status_code, extra={'url': url})
@@ -1,77 +1,179 @@
-from obswebsocket import obsws, requests
-from actions import register_action
-
-host = "localhost"  # Change to your OBS WebSocket host if different
-port = 4455         # Default OBS WebSocket port
-password = ""       # Set your OBS WebSocket password if you have one
-
-ws = None
-connected = False
-
-if host and port and password:
-    try:
-        ws = obsws(host, port, password)
-        ws.connect()
-        version_info = ws.call(requests.GetVersion())
-        connected = True
-        print(f"[OBS] Connected to OBS WebSocket - Version: {version_info.datain}")
-    except Exception as e:
-        print(f"[OBS] Connection failed: {e}")
-else:
-    print("[OBS] Host or port not set. Skipping OBS WebSocket connection.")
-
-@register_action("change_scene")
+import base64
+import hashlib
+import itertools
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+from actions import register_action, register_batch_runner
+from actions._socket import SocketClient
+
+log = logging.getLogger(__name__)
+
+OBS_HOST = os.getenv("OBS_HOST", "localhost")
+OBS_PORT = int(os.getenv("OBS_PORT", 4455))
+OBS_PASSWORD = os.getenv("OBS_PASSWORD", "")
+
+# obs-websocket v5 opcodes
+OP_HELLO = 0
+OP_IDENTIFY = 1
+OP_IDENTIFIED = 2
+OP_REQUEST = 6
+OP_REQUEST_RESPONSE = 7
+OP_REQUEST_BATCH = 8
+OP_REQUEST_BATCH_RESPONSE = 9
+EXECUTION_SERIAL_REALTIME = 0
+
+
+class ObsError(Exception):
+    """An OBS request failed or OBS is unreachable."""
+
+
+def obs_request(request_type: str, **request_data) -> Dict:
+    return {"requestType": request_type, "requestData": request_data}
+
+
+def auth_response(password: str, salt: str, challenge: str) -> str:
+    secret = base64.b64encode(hashlib.sha256((password + salt).encode("utf-8")).digest())
+    return base64.b64encode(hashlib.sha256(secret + challenge.encode("utf-8")).digest()).decode("ascii")
+
+
+def _status_error(result: Dict) -> Optional[str]:
+    status = result.get("requestStatus") or {}
+    if status.get("result"):
+        return None
+    return f"{result.get('requestType')} failed ({status.get('code')}): {status.get('comment', 'no details')}"
+
+
+class ObsConnection(SocketClient):
+    """obs-websocket v5 client that keeps itself connected in the background.
+
+    Nothing happens until the first request, so an unreachable OBS never
+    delays startup. Idle connections are probed with ``GetVersion`` every
+    ``OBS_HEALTH_INTERVAL`` seconds and replaced when OBS stops answering.
+    """
+
+    name = "OBS"
+    error = ObsError
+
+    def __init__(self, host: str, port: int, password: str):
+        super().__init__(
+            f"ws://{host}:{port}",
+            float(os.getenv("OBS_TIMEOUT", 5)),
+            float(os.getenv("OBS_RETRY_MIN", 1)),
+            float(os.getenv("OBS_RETRY_MAX", 30)),
+            float(os.getenv("OBS_HEALTH_INTERVAL", 15)) or None
+        )
+        self.password = password
+        self._ids = itertools.count(1)
+
+    def call(self, request_type: str, request_data: Optional[Dict] = None) -> Dict:
+        """Send one request and return its ``responseData``."""
+        return self.run(self._call(request_type, request_data), request_type)
+
+    def call_batch(self, requests: List[Dict], halt_on_failure: bool = True) -> List[Dict]:
+        """Send ``requests`` as one ``RequestBatch`` and return the per-request results."""
+        names = ", ".join(r["requestType"] for r in requests)
+        return self.run(self._call_batch(requests, halt_on_failure), f"RequestBatch [{names}]")
+
+    async def _handshake(self, ws) -> None:
+        hello = json.loads(await ws.recv())
+        if hello.get("op") != OP_HELLO:
+            raise ObsError(f"Unexpected first message from OBS: {hello}")
+        identify = {"rpcVersion": hello["d"].get("rpcVersion", 1), "eventSubscriptions": 0}
+        challenge = hello["d"].get("authentication")
+        if challenge:
+            identify["authentication"] = auth_response(self.password, challenge["salt"], challenge["challenge"])
+        await ws.send(json.dumps({"op": OP_IDENTIFY, "d": identify}))
+        reply = json.loads(await ws.recv())
+        if reply.get("op") != OP_IDENTIFIED:
+            raise ObsError(f"OBS did not accept the connection: {reply}")
+
+    async def _health_check(self) -> None:
+        await self._call("GetVersion")
+
+    async def _call(self, request_type: str, request_data: Optional[Dict] = None) -> Dict:
+        request_id = str(next(self._ids))
+        result = await self._request(request_id, {"op": OP_REQUEST, "d": {
+            "requestType": request_type, "requestId": request_id, "requestData": request_data or {}
+        }})
+        error = _status_error(result)
+        if error:
+            raise ObsError(error)
+        return result.get("responseData") or {}
+
+    async def _call_batch(self, requests: List[Dict], halt_on_failure: bool) -> List[Dict]:
+        request_id = str(next(self._ids))
+        results = await self._request(request_id, {"op": OP_REQUEST_BATCH, "d": {
+            "requestId": request_id,
+            "haltOnFailure": halt_on_failure,
+            "executionType": EXECUTION_SERIAL_REALTIME,
+            "requests": requests
+        }})
+        errors = [e for e in map(_status_error, results) if e]
+        if len(results) < len(requests):
+            errors.append(f"{len(requests) - len(results)} request(s) not run")
+        if errors:
+            raise ObsError("; ".join(errors))
+        return results
+
+    def _dispatch(self, message: Dict) -> None:
+        data = message.get("d") or {}
+        if message.get("op") == OP_REQUEST_RESPONSE:
+            self._resolve(data.get("requestId"), data)
+        elif message.get("op") == OP_REQUEST_BATCH_RESPONSE:
+            self._resolve(data.get("requestId"), data.get("results", []))
+
+
+_obs: Optional[ObsConnection] = None
+_obs_lock = threading.Lock()
+
+
+def get_obs() -> ObsConnection:
+    """Return the shared OBS connection, starting it on first use."""
+    global _obs
+    if _obs is None:
+        with _obs_lock:
+            if _obs is None:
+                _obs = ObsConnection(OBS_HOST, OBS_PORT, OBS_PASSWORD)
+                _obs.start()
+    return _obs
+
+@register_batch_runner("obs")
+def run_obs_requests(requests):
+    obs = get_obs()
+    if len(requests) == 1:
+        obs.call(requests[0]["requestType"], requests[0]["requestData"])
+    else:
+        obs.call_batch(requests)
+    log.debug("Sent %s", ", ".join(r["requestType"] for r in requests))
+
+@register_action("change_scene", batch="obs")
 def change_scene(scene_name):
-    if not connected:
-        print("[Action:change_scene] Not connected to OBS.")
-        return
-    try:
-        response = ws.call(requests.SetCurrentProgramScene(sceneName=scene_name))
-        print(f"[Action:change_scene] Changed to scene: {scene_name} - Response: {response}")
-    except Exception as e:
-        print(f"[Action:change_scene] Failed to change scene to {scene_name}: {e}")
+    return obs_request("SetCurrentProgramScene", sceneName=scene_name)
 
-@register_action("start_recording")
+@register_action("start_recording", batch="obs")
 def start_recording():
-    if not connected:
-        print("[Action:start_recording] Not connected to OBS.")
-        return
-    try:
-        ws.call(requests.StartRecord())
-        print("[Action:start_recording] Recording started.")
-    except Exception as e:
-        print(f"[Action:start_recording] Failed to start recording: {e}")
+    return obs_request("StartRecord")
 
-@register_action("stop_recording")
+@register_action("stop_recording", batch="obs")
 def stop_recording():
-    if not connected:
-        print("[Action:stop_recording] Not connected to OBS.")
-        return
-    try:
-        ws.call(requests.StopRecord())
-        print("[Action:stop_recording] Recording stopped.")
-    except Exception as e:
-        print(f"[Action:stop_recording] Failed to stop recording: {e}")
+    return obs_request("StopRecord")
 
-@register_action("toggle_studio_mode")
+@register_action("toggle_studio_mode", max_concurrency=1)
 def toggle_studio_mode():
-    if not connected:
-        print("[Action:toggle_studio_mode] Not connected to OBS.")
-        return
-    try:
-        status_response = ws.call(requests.GetStudioModeEnabled())
-        current_status = status_response.datain.get('studioModeEnabled', False)
-        ws.call(requests.SetStudioModeEnabled(studioModeEnabled=not current_status))
-        print(f"[Action:toggle_studio_mode] Studio mode {'enabled' if not current_status else 'disabled'}.")
-    except Exception as e:
-        print(f"[Action:toggle_studio_mode] Failed to toggle studio mode: {e}")
+    obs = get_obs()
+    current_status = obs.call("GetStudioModeEnabled").get("studioModeEnabled", False)
+    obs.call("SetStudioModeEnabled", {"studioModeEnabled": not current_status})
+    log.info("Studio mode %s", "enabled" if not current_status else "disabled")
 
 def disconnect():
-    if not connected or not ws:
-        print("[OBS] Not connected, nothing to disconnect.")
+    global _obs
+    if _obs is None:
+        log.info("Not connected, nothing to disconnect")
         return
-    try:
-        ws.disconnect()
-        print("[OBS] Disconnected from OBS WebSocket")
-    except Exception as e:
-        print(f"[OBS] Error disconnecting: {e}")
+    _obs.stop()
+    _obs = None
+    log.info("Disconnected from OBS WebSocket")
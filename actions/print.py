@@ -1,5 +1,9 @@
+import logging
+
 from actions import register_action
 
+log = logging.getLogger(__name__)
+
 @register_action("print")
 def handle_print(param):
-    print(f"[Action:print] {param}")
\ No newline at end of file
+    log.info("%s", param)
\ No newline at end of file
@@ -1,9 +1,13 @@
+import logging
+
 from actions import register_action
 
+log = logging.getLogger(__name__)
+
 @register_action("switch_page")
 def handle_switch_page(param, app_instance=None):
     if app_instance is None:
-        print("[Action:switch_page] Error: No app instance provided")
+        log.error("No app instance provided")
         return
 
     try:
@@ -14,15 +18,15 @@ def handle_switch_page(param, app_instance=None):
             target_page = int(param)
 
         if target_page < 1:
-            print(f"[Action:switch_page] Invalid page number: {target_page}. Must be >= 1")
+            log.warning("Invalid page number: %s. Must be >= 1", target_page)
             return
 
-        print(f"[Action:switch_page] Switching from page {app_instance.current_page} to page {target_page}")
+        log.debug("Switching from page %s to page %s", app_instance.current_page, target_page, extra={'page': target_page})
         app_instance.current_page = target_page
 
         app_instance._asyncio_fetch_and_update()
 
     except ValueError:
-        print(f"[Action:switch_page] Invalid page parameter: '{param}'. Must be a number or 'home'")
+        log.warning("Invalid page parameter: '%s'. Must be a number or 'home'", param)
     except Exception as e:
-        print(f"[Action:switch_page] Unexpected error: {e}")
+        log.exception("Unexpected error: %s", e)
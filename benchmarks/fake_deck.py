@@ -0,0 +1,121 @@
+"""In-process stand-ins for MySQL and the action plugins, used by the benchmarks.
+
+:class:`FakeDeckDatabase` has the same ``fetch`` interface as the renderer's
+``DeckDatabase`` and answers its queries from a deck built by
+:func:`synthetic_deck`. The ``bench_*`` actions do nothing, so the executor's
+own overhead is all that gets timed.
+"""
+import asyncio
+from typing import Dict, List
+
+from actions import register_action
+
+COLOR_PAIRS = [
+    ("#1e1e1e", "#ffffff"), ("#2d5aa0", "#ffffff"), ("#a02d2d", "#ffffff"),
+    ("#2da05a", "#000000"), ("#e0c040", "#000000"), ("#6a2da0", "#e0e0e0"),
+]
+IMAGES = ["assets/arrow_left.png", "assets/arrow_right.png"]
+COLUMNS = 8
+
+
+@register_action("bench_thread")
+def bench_thread(param):
+    return None
+
+
+@register_action("bench_async")
+async def bench_async(param):
+    return None
+
+
+@register_action("bench_gui")
+def bench_gui(param, app_instance=None):
+    return None
+
+
+def synthetic_deck(buttons_per_page: int, pages: int = 3) -> Dict:
+    """A deck of ``pages`` pages with ``buttons_per_page`` buttons each.
+
+    Buttons cycle through a few colour pairs, every fourth one shows an image
+    and every fourth one switches page, so styling, image loading and
+    prefetching all take part.
+    """
+    buttons: Dict[int, List[Dict]] = {}
+    button_id = 0
+    for page in range(1, pages + 1):
+        rows = []
+        for i in range(buttons_per_page):
+            button_id += 1
+            color_bg, color_fg = COLOR_PAIRS[i % len(COLOR_PAIRS)]
+            if i % 4 == 3:
+                action = f"switch_page:{page % pages + 1}"
+            else:
+                action = f"bench_{'thread' if i % 2 else 'async'}:{button_id}"
+            rows.append({
+                'id': button_id,
+                'label': f"Button {button_id}",
+                'pos_x': (i % COLUMNS) * 130,
+                'pos_y': (i // COLUMNS % 5) * 135,
+                'color_bg': color_bg,
+                'color_fg': color_fg,
+                'action': action,
+                'image_path': IMAGES[i // 4 % len(IMAGES)] if i % 4 == 0 else None,
+                'state_entity': None,
+            })
+        buttons[page] = rows
+    return {
+        'settings': {'BG_COLOR': '#000000', 'PAGE_CACHE_SIZE': '8'},
+        'pages': {
+            page: {'page_number': page, 'webpage_url': '', 'show_webpage': 0, 'background_color': None}
+            for page in buttons
+        },
+        'buttons': buttons,
+    }
+
+
+class FakeDeckDatabase:
+    """Answers the renderer's queries from a deck held in memory.
+
+    Every query awaits ``latency`` seconds first, to stand in for the round
+    trip to MySQL. Rows are copied on the way out, as a real driver would
+    build new ones.
+    """
+
+    def __init__(self, deck: Dict, latency: float = 0.0):
+        self.deck = deck
+        self.latency = latency
+        self.revision = 1
+        self.failures = 0
+        self.queries = 0
+
+    def touch(self, page: int) -> None:
+        """Relabel the first button on ``page`` and bump the config revision."""
+        button = self.deck['buttons'][page][0]
+        button['label'] = f"Button {button['id']} r{self.revision + 1}"
+        self.revision += 1
+
+    async def fetch(self, query: str, args=None, one: bool = False, dict_rows: bool = False, name: str = 'other'):
+        self.queries += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        rows = self._answer(" ".join(query.split()), args)
+        if one:
+            return rows[0] if rows else None
+        return rows
+
+    def _answer(self, query: str, args) -> List:
+        if query.startswith("SELECT `key`, `value` FROM settings"):
+            return list(self.deck['settings'].items())
+        if "FROM config_revision" in query:
+            return [(self.revision,)]
+        if "FROM button_pages bp" in query:
+            return [dict(button) for button in self.deck['buttons'].get(args[0], [])]
+        if query.startswith("SELECT page_number FROM pages UNION"):
+            return [(page,) for page in sorted(self.deck['pages'])]
+        if "FROM pages" in query:
+            page = self.deck['pages'].get(args[0])
+            return [dict(page)] if page else []
+        raise ValueError(f"FakeDeckDatabase has no answer for: {query}")
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,378 @@
+"""Headless benchmarks for the renderer's hot paths.
+
+Runs ``DeckMasterApp`` on Qt's offscreen platform against the in-process
+fake database and no-op actions in ``fake_deck.py``, once for each deck size
+given with ``--buttons``, and writes the timings as JSON. No baseline ships
+with the repo, since timings only compare on the same hardware: the first
+run on a machine records one (as does ``--save-baseline``), and later runs
+report every scenario whose median is more than ``--tolerance`` slower and
+exit with status 1.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --buttons 24,2000 --save-baseline
+"""
+import argparse
+import concurrent.futures
+import json
+import logging
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+RESULTS_FORMAT = 'deckmaster-benchmarks'
+RESULTS_VERSION = 1
+DEFAULT_SIZES = "24,200,2000"
+WAIT_TIMEOUT = 30
+
+SCENARIOS = {
+    'page_switch_cold': "switch to a page that is not cached, until it is drawn",
+    'page_switch_cached': "switch to a prefetched page (the draw happens before returning)",
+    'poll_idle': "poll tick when the config revision has not moved",
+    'poll_changed': "poll tick after one button on the current page changed",
+    'dispatch_submit': "execute_action() on the GUI thread",
+    'dispatch_thread': "press to finish for a plain handler on the thread pool",
+    'dispatch_async': "press to finish for an async handler",
+    'dispatch_gui': "press to finish for a handler run on the GUI thread",
+    'rebuild_new': "update_buttons_if_changed() with all new button ids",
+    'rebuild_patch': "update_buttons_if_changed() with every label changed",
+    'rebuild_unchanged': "update_buttons_if_changed() with identical data",
+}
+
+
+def summarize(samples: List[float]) -> Dict:
+    ordered = sorted(samples)
+    return {
+        'runs': len(ordered),
+        'median_ms': round(statistics.median(ordered) * 1000, 4),
+        'p95_ms': round(ordered[max(0, math.ceil(len(ordered) * 0.95) - 1)] * 1000, 4),
+        'min_ms': round(ordered[0] * 1000, 4),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 4),
+    }
+
+
+class Bench:
+    """One ``DeckMasterApp`` on a synthetic deck, plus the scenarios run against it."""
+
+    def __init__(self, qt_app, buttons: int, latency: float, workdir: str):
+        from fake_deck import FakeDeckDatabase, synthetic_deck
+        from renderer import DeckMasterApp
+
+        self.qt_app = qt_app
+        self.db = FakeDeckDatabase(synthetic_deck(buttons), latency)
+        os.environ['OFFLINE_SNAPSHOT'] = os.path.join(workdir, f'offline-{buttons}.sqlite3')
+        self.app = DeckMasterApp(self.db)
+        # Nothing but the scenarios may trigger a refresh
+        self.app.timer.stop()
+        if self.app.change_socket is not None:
+            self.app.change_socket.close()
+            self.app.change_socket = None
+        self.finished: List[Optional[BaseException]] = []
+        self.app.action_finished.connect(lambda action, error: self.finished.append(error))
+        # Connected once, after the renderer's own slots: connecting a slot
+        # per wait and disconnecting it again loses deliveries on some PySide6 releases
+        self.waiting = None  # (event loop, condition) of the wait in progress
+        self.app.page_loaded.connect(self._wake)
+        self.app.action_finished.connect(self._wake)
+        try:
+            self.wait_for(lambda: self.app.loaded_state is not None and self.app.pending_fetch is None,
+                          "the first page")
+            self.settle()
+        except Exception:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        self.app.close()
+        self.app.deleteLater()
+        self.qt_app.processEvents()
+
+    def _wake(self, *_) -> None:
+        if self.waiting is not None and self.waiting[1]():
+            self.waiting[0].quit()
+
+    def wait_for(self, done: Callable[[], bool], what: str) -> None:
+        """Run the Qt event loop until ``done()``, checked whenever a page loads or an action finishes."""
+        from PySide6.QtCore import QEventLoop, QTimer
+
+        if done():
+            return
+        loop = QEventLoop()
+        QTimer.singleShot(WAIT_TIMEOUT * 1000, loop, loop.quit)
+        self.waiting = (loop, done)
+        try:
+            loop.exec()
+        finally:
+            self.waiting = None
+        if not done():
+            raise TimeoutError(f"Timed out waiting for {what}")
+
+    def settle(self) -> None:
+        """Wait for the fetch, prefetch and offline sync in flight, and deliver their results."""
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            app = self.app
+            busy = [
+                future for future in (app.pending_fetch, app.pending_prefetch, app.pending_sync)
+                if future is not None and not future.done()
+            ]
+            if not busy and app.pending_fetch is None:
+                self.qt_app.processEvents()
+                return
+            concurrent.futures.wait(busy, timeout=0.01)
+            self.qt_app.processEvents()
+        raise TimeoutError("Timed out waiting for background work to finish")
+
+    def _load(self, page: Optional[int] = None) -> None:
+        if page is not None:
+            self.app.current_page = page
+        self.app._asyncio_fetch_and_update()
+        self.wait_for(lambda: self.app.pending_fetch is None, "a page load")
+
+    def _other_page(self) -> int:
+        return 2 if self.app.current_page == 1 else 1
+
+    def page_switch_cold(self) -> float:
+        self.settle()
+        self.app.page_cache.clear()
+        target = self._other_page()
+        started = time.perf_counter()
+        self._load(target)
+        return time.perf_counter() - started
+
+    def page_switch_cached(self) -> float:
+        self.settle()
+        target = self._other_page()
+        if target not in self.app.page_cache:
+            raise RuntimeError(f"Page {target} was not prefetched")
+        started = time.perf_counter()
+        self.app.current_page = target
+        self.app._asyncio_fetch_and_update()
+        elapsed = time.perf_counter() - started
+        self.settle()
+        return elapsed
+
+    def poll_idle(self) -> float:
+        self.settle()
+        started = time.perf_counter()
+        self._load()
+        return time.perf_counter() - started
+
+    def poll_changed(self) -> float:
+        self.settle()
+        self.db.touch(self.app.current_page)
+        started = time.perf_counter()
+        self._load()
+        return time.perf_counter() - started
+
+    def _dispatch(self, action: str) -> float:
+        count = len(self.finished) + 1
+        started = time.perf_counter()
+        self.app.execute_action(action)
+        self.wait_for(lambda: len(self.finished) >= count, f"action {action}")
+        elapsed = time.perf_counter() - started
+        if self.finished[-1] is not None:
+            raise RuntimeError(f"Action {action} failed: {self.finished[-1]}")
+        return elapsed
+
+    def dispatch_submit(self) -> float:
+        count = len(self.finished) + 1
+        started = time.perf_counter()
+        self.app.execute_action("bench_thread:1")
+        elapsed = time.perf_counter() - started
+        self.wait_for(lambda: len(self.finished) >= count, "action bench_thread:1")
+        return elapsed
+
+    def dispatch_thread(self) -> float:
+        return self._dispatch("bench_thread:1")
+
+    def dispatch_async(self) -> float:
+        return self._dispatch("bench_async:1")
+
+    def dispatch_gui(self) -> float:
+        return self._dispatch("bench_gui:1")
+
+    def _rebuild(self, variants: List[List[Dict]]) -> Callable[[], float]:
+        turn = [0]
+
+        def run() -> float:
+            buttons = variants[turn[0] % len(variants)]
+            turn[0] += 1
+            started = time.perf_counter()
+            self.app.update_buttons_if_changed(buttons)
+            return time.perf_counter() - started
+        return run
+
+    def rebuilds(self) -> Dict[str, Callable[[], float]]:
+        self.settle()
+        deck = self.db.deck['buttons']
+        relabelled = [dict(button, label=button['label'] + " *") for button in deck[1]]
+        return {
+            'rebuild_new': self._rebuild([deck[1], deck[2]]),
+            'rebuild_patch': self._rebuild([deck[1], relabelled]),
+            'rebuild_unchanged': self._rebuild([deck[1]]),
+        }
+
+
+def run_scenarios(qt_app, sizes: List[int], names: List[str], repeat: int, warmup: int,
+                  latency: float, workdir: str) -> Dict[str, Dict]:
+    results = {}
+    for buttons in sizes:
+        bench = Bench(qt_app, buttons, latency, workdir)
+        try:
+            # The rebuilds leave the screen out of step with the deck, so they go last
+            runners = {name: getattr(bench, name) for name in SCENARIOS if not name.startswith('rebuild_')}
+            runners.update(bench.rebuilds())
+            for name in [n for n in SCENARIOS if n in names]:
+                run = runners[name]
+                for _ in range(warmup):
+                    run()
+                samples = [run() for _ in range(repeat)]
+                results[f"{name}/{buttons}"] = dict(scenario=name, buttons=buttons, **summarize(samples))
+                print(f"  {name:<20}{buttons:>6} buttons {results[f'{name}/{buttons}']['median_ms']:>10.3f} ms",
+                      flush=True)
+        finally:
+            bench.close()
+    return results
+
+
+def environment() -> Dict:
+    import PySide6
+    from PySide6.QtCore import qVersion
+    return {
+        'python': platform.python_version(),
+        'pyside': PySide6.__version__,
+        'qt': qVersion(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float, min_delta_ms: float) -> List[str]:
+    """Print current against baseline medians and return the scenarios that regressed."""
+    regressions = []
+    print(f"\n{'scenario':<20}{'buttons':>8}{'median ms':>12}{'baseline':>12}{'change':>9}")
+    for key, result in results['results'].items():
+        base = baseline['results'].get(key)
+        if base is None:
+            print(f"{result['scenario']:<20}{result['buttons']:>8}{result['median_ms']:>12.3f}{'-':>12}{'new':>9}")
+            continue
+        delta = result['median_ms'] - base['median_ms']
+        change = delta / base['median_ms'] if base['median_ms'] else 0.0
+        regressed = change > tolerance and delta > min_delta_ms
+        if regressed:
+            regressions.append(key)
+        print(f"{result['scenario']:<20}{result['buttons']:>8}{result['median_ms']:>12.3f}"
+              f"{base['median_ms']:>12.3f}{change:>+9.0%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def read_results(path: str) -> Optional[Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            results = json.load(f)
+    except FileNotFoundError:
+        return None
+    if results.get('format') != RESULTS_FORMAT or results.get('version') != RESULTS_VERSION:
+        raise ValueError(f"{path} is not a version {RESULTS_VERSION} benchmark results file")
+    return results
+
+
+def write_results(path: str, results: Dict) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the DeckMaster renderer without a screen or database")
+    parser.add_argument("--buttons", default=DEFAULT_SIZES,
+                        help=f"comma separated buttons per page to test (default {DEFAULT_SIZES})")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="comma separated scenarios to run (default all)")
+    parser.add_argument("--repeat", type=int, default=30, help="timed runs per scenario (default 30)")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed runs before those (default 3)")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0,
+                        help="delay added to every fake query, to mimic the network (default 0)")
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, 'results.json'),
+                        help="where to write the results JSON")
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, 'baseline.json'),
+                        help="results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="slowdown of a median that counts as a regression (default 0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.1,
+                        help="ignore slowdowns smaller than this many ms (default 0.1)")
+    parser.add_argument("--list", action="store_true", help="describe the scenarios and exit")
+    parser.add_argument("--verbose", action="store_true", help="show the renderer's log output")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, description in SCENARIOS.items():
+            print(f"{name:<20}{description}")
+        return 0
+
+    sizes = [int(size) for size in args.buttons.split(",") if size.strip()]
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)} (see --list)")
+
+    from PySide6.QtWidgets import QApplication
+
+    os.chdir(REPO_DIR)  # the renderer loads its assets by relative path
+    with tempfile.TemporaryDirectory(prefix="deckmaster-bench-") as workdir:
+        # Keep the user's image cache, action manifest and offline snapshot out of it
+        os.environ['IMAGE_CACHE_DIR'] = os.path.join(workdir, 'images')
+        os.environ['XDG_CACHE_HOME'] = workdir
+        qt_app = QApplication.instance() or QApplication([])
+        print(f"Running {len(names)} scenarios for {', '.join(map(str, sizes))} buttons per page")
+        if args.verbose:
+            from deck_logging import configure_logging
+            configure_logging()
+        else:
+            logging.disable(logging.CRITICAL)
+        results = run_scenarios(qt_app, sizes, names, args.repeat, args.warmup,
+                                args.db_latency_ms / 1000, workdir)
+
+    report = {
+        'format': RESULTS_FORMAT,
+        'version': RESULTS_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': environment(),
+        'options': {'repeat': args.repeat, 'warmup': args.warmup, 'db_latency_ms': args.db_latency_ms},
+        'results': results,
+    }
+    write_results(args.output, report)
+    print(f"Results written to {args.output}")
+
+    baseline = None if args.save_baseline else read_results(args.baseline)
+    if baseline is None:
+        write_results(args.baseline, report)
+        print(f"Baseline saved to {args.baseline}; later runs are compared against it")
+        return 0
+    if baseline['environment'] != report['environment'] or baseline['options'] != report['options']:
+        print("Warning: the baseline was recorded with a different environment or options")
+    regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f"\n{len(regressions)} scenario(s) slower than the baseline by more than {args.tolerance:.0%}")
+        return 1
+    print("\nNo regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,42 +1,208 @@
+import json
 import os
-from flask import Flask, render_template, request, redirect, url_for, flash
+import re
+import click
+from flask import Flask, render_template, request, redirect, url_for, flash, g, jsonify, Response
+from flask.cli import AppGroup
 import pymysql
 from dotenv import load_dotenv
 
+from db_pool import ConnectionPool, PoolTimeout
+from deck_io import (
+    CONFLICT_MODES, DeckImportError, clone_pages, export_deck, import_deck, list_presets, load_preset
+)
+from notify import publish_change
+from response_cache import RevisionCache
+
 load_dotenv()
 
 app = Flask(__name__)
-app.secret_key = os.urandom(24).hex()
+# Every worker of a multi-process server must share the key, or flash
+# messages set by one worker can't be read by the next
+app.secret_key = os.getenv('FLASK_SECRET_KEY') or os.urandom(24).hex()
 
-def get_db_connection():
+def connect():
     return pymysql.connect(
         host=os.getenv('DB_HOST'),
         user=os.getenv('DB_USER'),
         password=os.getenv('DB_PASS'),
         db=os.getenv('DB_NAME'),
         cursorclass=pymysql.cursors.DictCursor,
+        connect_timeout=int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
         autocommit=True
     )
 
+db_pool = ConnectionPool(
+    connect,
+    max_size=int(os.getenv('DB_POOL_SIZE', 5)),
+    timeout=float(os.getenv('DB_POOL_TIMEOUT', 10)),
+    recycle=float(os.getenv('DB_POOL_RECYCLE', 300))
+)
+
+def get_db_connection():
+    # One pooled connection per request, handed back in close_db_connection
+    if 'db' not in g:
+        g.db = db_pool.acquire()
+    return g.db
+
+@app.teardown_appcontext
+def close_db_connection(error):
+    conn = g.pop('db', None)
+    if conn is not None:
+        db_pool.release(conn, discard=isinstance(error, pymysql.OperationalError))
+
+# Revision and JSON bodies for the /api routes, see api_response
+api_cache = RevisionCache(
+    revision_ttl=float(os.getenv('API_REVISION_TTL', 1)),
+    size=int(os.getenv('API_CACHE_SIZE', 128))
+)
+
+@app.errorhandler(PoolTimeout)
+def database_busy(error):
+    return f"Database busy, try again in a moment ({error})", 503
+
+ER_NO_SUCH_TABLE = 1146
+
+def bump_config_revision(cur):
+    # Renderers poll this single row and only re-fetch pages when it moves
+    try:
+        cur.execute("UPDATE config_revision SET revision = LAST_INSERT_ID(revision + 1) WHERE id = 1")
+    except pymysql.MySQLError as e:
+        if e.args and e.args[0] == ER_NO_SUCH_TABLE:
+            # The edit is already saved; renderers without a revision poll everything
+            app.logger.warning("config_revision table missing (run migrations/001_config_revision.sql)")
+            return None
+        raise
+    return cur.lastrowid
+
+def notify_change(cur, pages=None):
+    revision = bump_config_revision(cur)
+    api_cache.invalidate(revision)
+    publish_change(pages, revision)
+
+def page_numbers(page_csv):
+    return [int(p) for p in str(page_csv or '').split(',') if p.strip().isdigit()]
+
+# Lists are paged by key (``?after=<last key>``) rather than OFFSET, so every
+# screen costs the same however far into a large deck it is
+LIST_SIZE = 50
+MAX_LIST_SIZE = 200
+
+# Words shorter than InnoDB's default innodb_ft_min_token_size aren't in the
+# FULLTEXT index; they are matched as label/action prefixes instead
+FULLTEXT_MIN_TOKEN = 3
+ER_FT_MATCHING_KEY_NOT_FOUND = 1191
+fulltext_supported = True
+
+def list_size():
+    return max(1, min(request.args.get('per_page', LIST_SIZE, type=int), MAX_LIST_SIZE))
+
+def like_prefix(text):
+    return re.sub(r'([\\%_])', r'\\\1', text) + '%'
+
+def search_buttons(cur, query, after, size):
+    """Buttons whose label or action matches every word of ``query``, by id after ``after``."""
+    global fulltext_supported
+    words = [w for w in re.split(r'[\s+\-<>()~*"@]+', query) if w]
+    if not words:
+        return []
+    long_words = [w for w in words if len(w) >= FULLTEXT_MIN_TOKEN] if fulltext_supported else []
+    where, args = ["b.id > %s"], [after]
+    if long_words:
+        where.append("MATCH(b.label, b.action) AGAINST (%s IN BOOLEAN MODE)")
+        args.append(" ".join(f"+{w}*" for w in long_words))
+    for word in words:
+        if word not in long_words:
+            where.append("(b.label LIKE %s OR b.action LIKE %s)")
+            args += [like_prefix(word), like_prefix(word)]
+    try:
+        cur.execute(f"""
+            SELECT b.id, b.label, b.action, GROUP_CONCAT(bp.page_number ORDER BY bp.page_number) AS pages
+            FROM buttons b
+            LEFT JOIN button_pages bp ON bp.button_id = b.id
+            WHERE {' AND '.join(where)}
+            GROUP BY b.id
+            ORDER BY b.id
+            LIMIT %s
+        """, args + [size + 1])
+    except pymysql.MySQLError as e:
+        if fulltext_supported and e.args and e.args[0] == ER_FT_MATCHING_KEY_NOT_FOUND:
+            app.logger.warning("FULLTEXT index on buttons missing (run migrations/004_dashboard_search.sql), using LIKE")
+            fulltext_supported = False
+            return search_buttons(cur, query, after, size)
+        raise
+    results = cur.fetchall()
+    for row in results:
+        row['pages'] = page_numbers(row['pages'])
+    return results
+
 @app.route('/')
 def index():
-    # Show all pages
+    # Show one screen of pages with their button counts, or search results
+    size = list_size()
+    after = request.args.get('after', type=int)
+    before = request.args.get('before', type=int)
+    query = request.args.get('q', '').strip()
     conn = get_db_connection()
     with conn.cursor() as cur:
-        cur.execute("SELECT * FROM pages ORDER BY page_number ASC")
+        if query:
+            results = search_buttons(cur, query, after or 0, size)
+            return render_template(
+                'pages.html', pages=[], query=query, results=results[:size],
+                next_after=results[size - 1]['id'] if len(results) > size else None, prev_before=None,
+                presets=list_presets(), conflict_modes=CONFLICT_MODES
+            )
+
+        backwards = before is not None
+        cur.execute(f"""
+            SELECT p.page_number, p.webpage_url, p.show_webpage, p.background_color,
+                   COUNT(bp.button_id) AS button_count
+            FROM (
+                SELECT page_number, webpage_url, show_webpage, background_color
+                FROM pages
+                WHERE page_number {'<' if backwards else '>'} %s
+                ORDER BY page_number {'DESC' if backwards else 'ASC'}
+                LIMIT %s
+            ) p
+            LEFT JOIN button_pages bp ON bp.page_number = p.page_number
+            GROUP BY p.page_number, p.webpage_url, p.show_webpage, p.background_color
+            ORDER BY p.page_number {'DESC' if backwards else 'ASC'}
+        """, (before if backwards else (after or 0), size + 1))
         pages = cur.fetchall()
-    return render_template('pages.html', pages=pages)
+    more = len(pages) > size
+    pages = pages[:size]
+    if backwards:
+        pages.reverse()
+    return render_template(
+        'pages.html', pages=pages, query='', results=None,
+        next_after=pages[-1]['page_number'] if pages and (more or backwards) else None,
+        prev_before=pages[0]['page_number'] if pages and ((more and backwards) or (after and not backwards)) else None,
+        presets=list_presets(), conflict_modes=CONFLICT_MODES
+    )
 
 @app.route('/page/<int:page_number>')
 def edit_page(page_number):
-    # Edit a page and show its buttons
+    # Edit a page and show one screen of its buttons
+    size = list_size()
+    after = request.args.get('after', 0, type=int)
     conn = get_db_connection()
     with conn.cursor() as cur:
-        cur.execute("SELECT * FROM pages WHERE page_number=%s", (page_number,))
+        cur.execute("""
+            SELECT page_number, webpage_url, show_webpage, background_color
+            FROM pages WHERE page_number=%s
+        """, (page_number,))
         page = cur.fetchone()
-        cur.execute("SELECT * FROM buttons WHERE FIND_IN_SET(%s, page)", (page_number,))
+        cur.execute("""
+            SELECT b.id, b.label, b.pos_x, b.pos_y
+            FROM button_pages bp
+            JOIN buttons b ON b.id = bp.button_id
+            WHERE bp.page_number=%s AND bp.button_id > %s
+            ORDER BY bp.button_id
+            LIMIT %s
+        """, (page_number, after, size + 1))
         buttons = cur.fetchall()
-    return render_template('edit_page.html', page=page, buttons=buttons)
+    next_after = buttons[size - 1]['id'] if len(buttons) > size else None
+    return render_template('edit_page.html', page=page, buttons=buttons[:size], next_after=next_after)
 
 @app.route('/page/new', methods=['GET', 'POST'])
 def new_page():
@@ -51,6 +217,7 @@ def new_page():
                 "INSERT INTO pages (page_number, webpage_url, show_webpage, background_color) VALUES (%s, %s, %s, %s)",
                 (number, url, show_web, bg)
             )
+            notify_change(cur, page_numbers(number))
         flash('Page created!')
         return redirect(url_for('index'))
     return render_template('edit_page.html', page=None, buttons=[])
@@ -65,12 +232,20 @@ def new_button(page_number):
         color_fg = request.form.get('color_fg', '#fff')
         action = request.form.get('action', '')
         image_path = request.form.get('image_path', '')
+        state_entity = request.form.get('state_entity') or None
         conn = get_db_connection()
         with conn.cursor() as cur:
+            conn.begin()
             cur.execute(
-                "INSERT INTO buttons (label, pos_x, pos_y, color_bg, color_fg, action, image_path, page) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
-                (label, pos_x, pos_y, color_bg, color_fg, action, image_path, str(page_number))
+                "INSERT INTO buttons (label, pos_x, pos_y, color_bg, color_fg, action, image_path, state_entity) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+                (label, pos_x, pos_y, color_bg, color_fg, action, image_path, state_entity)
             )
+            cur.execute(
+                "INSERT INTO button_pages (button_id, page_number) VALUES (%s, %s)",
+                (cur.lastrowid, page_number)
+            )
+            conn.commit()
+            notify_change(cur, [page_number])
         flash('Button added!')
         return redirect(url_for('edit_page', page_number=page_number))
     return render_template('edit_button.html', page_number=page_number, button=None)
@@ -79,8 +254,16 @@ def new_button(page_number):
 def edit_button(button_id):
     conn = get_db_connection()
     with conn.cursor() as cur:
-        cur.execute("SELECT * FROM buttons WHERE id=%s", (button_id,))
+        cur.execute("""
+            SELECT b.id, b.label, b.pos_x, b.pos_y, b.color_bg, b.color_fg, b.action, b.image_path,
+                   b.state_entity, GROUP_CONCAT(bp.page_number ORDER BY bp.page_number) AS page
+            FROM buttons b
+            LEFT JOIN button_pages bp ON bp.button_id = b.id
+            WHERE b.id=%s
+            GROUP BY b.id
+        """, (button_id,))
         button = cur.fetchone()
+    old_pages = page_numbers(button['page'])
     if request.method == 'POST':
         label = request.form['label']
         pos_x = request.form['pos_x']
@@ -89,29 +272,255 @@ def edit_button(button_id):
         color_fg = request.form.get('color_fg', '#fff')
         action = request.form.get('action', '')
         image_path = request.form.get('image_path', '')
-        page = request.form.get('page', button['page'])
+        state_entity = request.form.get('state_entity') or None
+        pages = page_numbers(request.form.get('page', button['page'])) or old_pages
         with conn.cursor() as cur:
+            conn.begin()
             cur.execute(
-                "UPDATE buttons SET label=%s, pos_x=%s, pos_y=%s, color_bg=%s, color_fg=%s, action=%s, image_path=%s, page=%s WHERE id=%s",
-                (label, pos_x, pos_y, color_bg, color_fg, action, image_path, page, button_id)
+                "UPDATE buttons SET label=%s, pos_x=%s, pos_y=%s, color_bg=%s, color_fg=%s, action=%s, image_path=%s, state_entity=%s WHERE id=%s",
+                (label, pos_x, pos_y, color_bg, color_fg, action, image_path, state_entity, button_id)
             )
+            if set(pages) != set(old_pages):
+                cur.execute("DELETE FROM button_pages WHERE button_id=%s", (button_id,))
+                cur.executemany(
+                    "INSERT INTO button_pages (button_id, page_number) VALUES (%s, %s)",
+                    [(button_id, p) for p in sorted(set(pages))]
+                )
+            conn.commit()
+            notify_change(cur, old_pages + pages)
         flash('Button updated!')
-        return redirect(url_for('edit_page', page_number=page))
-    return render_template('edit_button.html', page_number=button['page'], button=button)
+        if pages:
+            return redirect(url_for('edit_page', page_number=pages[0]))
+        return redirect(url_for('index'))
+    return render_template('edit_button.html', page_number=old_pages[0] if old_pages else 1, button=button)
 
 @app.route('/button/delete/<int:button_id>')
 def delete_button(button_id):
     conn = get_db_connection()
     with conn.cursor() as cur:
-        cur.execute("SELECT page FROM buttons WHERE id=%s", (button_id,))
-        button = cur.fetchone()
-        if button:
-            page_number = button['page']
-            cur.execute("DELETE FROM buttons WHERE id=%s", (button_id,))
+        cur.execute("SELECT page_number FROM button_pages WHERE button_id=%s ORDER BY page_number", (button_id,))
+        pages = [row['page_number'] for row in cur.fetchall()]
+        cur.execute("DELETE FROM buttons WHERE id=%s", (button_id,))
+        if cur.rowcount:
+            notify_change(cur, pages)
             flash('Button deleted!')
-            return redirect(url_for('edit_page', page_number=page_number))
+            if pages:
+                return redirect(url_for('edit_page', page_number=pages[0]))
+            return redirect(url_for('index'))
     flash('Button not found.')
     return redirect(url_for('index'))
 
+def notify_import(result, settings_written):
+    # Settings affect every page, so renderers reload everything then; pages a
+    # replace deleted are announced too, or a renderer showing one keeps drawing it
+    conn = get_db_connection()
+    with conn.cursor() as cur:
+        notify_change(cur, None if settings_written else sorted(set(result.pages) | set(result.removed)))
+
+def import_summary(result):
+    summary = f"Imported {len(result.pages)} page(s) and {result.buttons} button(s)"
+    if result.settings:
+        summary += f", {result.settings} setting(s)"
+    if result.skipped:
+        summary += f"; kept existing page(s) {', '.join(map(str, result.skipped))}"
+    if result.removed:
+        summary += f"; removed page(s) {', '.join(map(str, result.removed))}"
+    return summary
+
+@app.route('/deck/export')
+def export_deck_json():
+    pages = request.args.getlist('page', type=int) or None
+    deck = export_deck(get_db_connection(), pages)
+    return Response(
+        json.dumps(deck, indent=2, default=str),
+        mimetype='application/json',
+        headers={'Content-Disposition': 'attachment; filename=deck.json'}
+    )
+
+@app.route('/deck/import', methods=['POST'])
+def import_deck_json():
+    # JSON clients get a JSON answer; the form on the pages list gets a redirect
+    wants_json = request.is_json
+    on_conflict = request.args.get('on_conflict') or request.form.get('on_conflict') or 'error'
+    if wants_json:
+        include_settings = request.args.get('settings', '1') != '0'
+    else:
+        include_settings = 'settings' in request.form
+    try:
+        if wants_json:
+            deck = request.get_json()
+        else:
+            upload = request.files.get('deck')
+            if upload is None or not upload.filename:
+                raise DeckImportError(["Choose a deck file to import"])
+            deck = json.load(upload.stream)
+        result = import_deck(get_db_connection(), deck, on_conflict, include_settings)
+    except (DeckImportError, ValueError) as e:
+        problems = getattr(e, 'problems', [str(e)])
+        if wants_json:
+            return jsonify(error="Import failed", problems=problems), 400
+        flash(f"Import failed: {'; '.join(problems)}")
+        return redirect(url_for('index'))
+
+    notify_import(result, result.settings > 0)
+    if wants_json:
+        return jsonify(result._asdict())
+    flash(import_summary(result) + '.')
+    return redirect(url_for('index'))
+
+@app.route('/page/<int:page_number>/clone', methods=['POST'])
+def clone_page(page_number):
+    target = request.form.get('target', type=int)
+    if not target or target < 1:
+        flash('Enter the page number to copy to.')
+        return redirect(url_for('edit_page', page_number=page_number))
+    try:
+        result = clone_pages(get_db_connection(), {page_number: target}, request.form.get('on_conflict', 'error'))
+    except DeckImportError as e:
+        flash(f"Copy failed: {'; '.join(e.problems)}")
+        return redirect(url_for('edit_page', page_number=page_number))
+    notify_import(result, False)
+    flash(f'Page {page_number} copied to page {target}!')
+    return redirect(url_for('edit_page', page_number=target))
+
+@app.route('/presets/<name>/apply', methods=['POST'])
+def apply_preset(name):
+    try:
+        result = import_deck(get_db_connection(), load_preset(name), request.form.get('on_conflict', 'overwrite'))
+    except DeckImportError as e:
+        flash(f"Preset failed: {'; '.join(e.problems)}")
+        return redirect(url_for('index'))
+    notify_import(result, result.settings > 0)
+    flash(f"Preset {name} applied. {import_summary(result)}.")
+    return redirect(url_for('index'))
+
+def fetch_config_revision():
+    with get_db_connection().cursor() as cur:
+        cur.execute("SELECT revision FROM config_revision WHERE id = 1")
+        row = cur.fetchone()
+    return row['revision'] if row else 0
+
+def api_response(key, build):
+    """Serve the JSON built by ``build()`` with an ETag tied to the config revision.
+
+    A matching ``If-None-Match`` is answered with 304 from the cached revision
+    alone, and unchanged bodies come from ``api_cache``, so neither touches
+    MySQL. ``build`` returns None for a missing resource.
+    """
+    revision = api_cache.revision(fetch_config_revision)
+    etag = f"r{revision}-{key}"
+    headers = {'Cache-Control': 'no-cache', 'X-Config-Revision': str(revision)}
+    if request.if_none_match.contains(etag):
+        response = Response(status=304, headers=headers)
+        response.set_etag(etag)
+        return response
+
+    body = api_cache.get(key, revision)
+    if body is None:
+        data = build()
+        if data is None:
+            return jsonify(error="Not found"), 404
+        body = json.dumps(dict(data, revision=revision), default=str).encode('utf-8')
+        api_cache.put(key, revision, body)
+    response = Response(body, mimetype='application/json', headers=headers)
+    response.set_etag(etag)
+    return response
+
+@app.route('/api/pages')
+def api_pages():
+    def build():
+        with get_db_connection().cursor() as cur:
+            cur.execute("""
+                SELECT p.page_number, p.webpage_url, p.show_webpage, p.background_color,
+                       COUNT(bp.button_id) AS button_count
+                FROM pages p
+                LEFT JOIN button_pages bp ON bp.page_number = p.page_number
+                GROUP BY p.id
+                ORDER BY p.page_number
+            """)
+            return {'pages': cur.fetchall()}
+    return api_response('pages', build)
+
+@app.route('/api/pages/<int:page_number>')
+def api_page(page_number):
+    def build():
+        with get_db_connection().cursor() as cur:
+            cur.execute("""
+                SELECT page_number, webpage_url, show_webpage, background_color
+                FROM pages WHERE page_number=%s
+            """, (page_number,))
+            page = cur.fetchone()
+            cur.execute("""
+                SELECT b.id, b.label, b.pos_x, b.pos_y, b.color_bg, b.color_fg, b.action, b.image_path,
+                       b.state_entity
+                FROM button_pages bp
+                JOIN buttons b ON b.id = bp.button_id
+                WHERE bp.page_number=%s
+                ORDER BY b.id
+            """, (page_number,))
+            buttons = cur.fetchall()
+        if page is None and not buttons:
+            return None
+        return {'page_number': page_number, 'page': page, 'buttons': buttons}
+    return api_response(f'pages/{page_number}', build)
+
+@app.route('/api/settings')
+def api_settings():
+    def build():
+        with get_db_connection().cursor() as cur:
+            cur.execute("SELECT `key`, `value` FROM settings ORDER BY `key`")
+            return {'settings': {row['key']: row['value'] for row in cur.fetchall()}}
+    return api_response('settings', build)
+
+deck_cli = AppGroup('deck', help='Export, import and copy decks.')
+app.cli.add_command(deck_cli)
+
+def report_import(result):
+    notify_import(result, result.settings > 0)
+    click.echo(import_summary(result))
+
+@deck_cli.command('export')
+@click.argument('path', type=click.File('w'), default='-')
+@click.option('--page', 'pages', type=int, multiple=True, help='Only export these pages (no settings).')
+def export_command(path, pages):
+    """Write the deck as JSON to PATH (default: stdout)."""
+    json.dump(export_deck(get_db_connection(), pages or None), path, indent=2, default=str)
+    path.write('\n')
+
+@deck_cli.command('import')
+@click.argument('path', type=click.File('r'))
+@click.option('--on-conflict', type=click.Choice(CONFLICT_MODES), default='error', show_default=True)
+@click.option('--no-settings', is_flag=True, help="Leave the deck's settings unchanged.")
+def import_command(path, on_conflict, no_settings):
+    """Import a deck JSON file in one transaction."""
+    try:
+        result = import_deck(get_db_connection(), json.load(path), on_conflict, not no_settings)
+    except (DeckImportError, ValueError) as e:
+        raise click.ClickException("; ".join(getattr(e, 'problems', [str(e)])))
+    report_import(result)
+
+@deck_cli.command('clone')
+@click.argument('source', type=int)
+@click.argument('target', type=int)
+@click.option('--on-conflict', type=click.Choice(CONFLICT_MODES), default='error', show_default=True)
+def clone_command(source, target, on_conflict):
+    """Copy page SOURCE with its buttons to page TARGET."""
+    try:
+        result = clone_pages(get_db_connection(), {source: target}, on_conflict)
+    except DeckImportError as e:
+        raise click.ClickException("; ".join(e.problems))
+    report_import(result)
+
+@deck_cli.command('apply-preset')
+@click.argument('name', type=click.Choice(list_presets()))
+@click.option('--on-conflict', type=click.Choice(CONFLICT_MODES), default='overwrite', show_default=True)
+def apply_preset_command(name, on_conflict):
+    """Apply one of the presets in presets/ to the live database."""
+    try:
+        result = import_deck(get_db_connection(), load_preset(name), on_conflict)
+    except DeckImportError as e:
+        raise click.ClickException("; ".join(e.problems))
+    report_import(result)
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
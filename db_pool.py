@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+import pymysql
+from pymysql.constants import SERVER_STATUS
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the pool's timeout."""
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of pymysql connections.
+
+    At most ``max_size`` connections are open at once; a caller that finds
+    them all in use waits up to ``timeout`` seconds and then gets
+    :class:`PoolTimeout`. Idle connections are pinged before reuse when they
+    have been idle for more than ``ping_after`` seconds and are replaced once
+    older than ``recycle`` seconds, so connections dropped by MySQL's
+    ``wait_timeout`` are never handed out.
+
+    Connections inherited through ``fork()`` (pre-loading WSGI servers) are
+    abandoned rather than shared, so every worker process has its own pool.
+    """
+
+    def __init__(self, connect: Callable[[], pymysql.connections.Connection], max_size: int = 5,
+                 timeout: float = 10, recycle: float = 300, ping_after: float = 5):
+        self.connect = connect
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._idle: List[Tuple[pymysql.connections.Connection, float]] = []  # (conn, last used)
+        self._opened: Dict[int, float] = {}  # id(conn) -> when it was connected
+
+    def acquire(self) -> pymysql.connections.Connection:
+        if os.getpid() != self._pid:
+            self._reset()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(f"All {self.max_size} database connections are busy")
+        try:
+            return self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _checkout(self) -> pymysql.connections.Connection:
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, used = self._idle.pop()
+            if now - self._opened[id(conn)] > self.recycle:
+                self._close(conn)
+                continue
+            if now - used > self.ping_after:
+                try:
+                    conn.ping(reconnect=False)
+                except pymysql.Error:
+                    self._close(conn)
+                    continue
+            return conn
+        conn = self.connect()
+        with self._lock:
+            self._opened[id(conn)] = now
+        return conn
+
+    def release(self, conn: pymysql.connections.Connection, discard: bool = False) -> None:
+        """Return ``conn`` to the pool, rolling back anything it left uncommitted."""
+        if os.getpid() != self._pid:
+            return  # checked out before a fork; it belongs to the parent's pool
+        try:
+            if not discard and conn.open and conn.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                try:
+                    conn.rollback()
+                except pymysql.Error:
+                    discard = True
+            if discard or not conn.open:
+                self._close(conn)
+            else:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._close(conn)
+
+    def _close(self, conn: pymysql.connections.Connection) -> None:
+        with self._lock:
+            self._opened.pop(id(conn), None)
+        try:
+            conn.close()
+        except pymysql.Error:
+            pass
@@ -0,0 +1,334 @@
+"""Export, import and clone whole decks as JSON.
+
+A deck file looks like::
+
+    {
+      "format": "deckmaster-deck",
+      "version": 1,
+      "settings": {"BG_COLOR": "#1e1e1e", ...},
+      "pages": [{"page_number": 1, "webpage_url": null, "show_webpage": 0, "background_color": "#1e1e1e"}],
+      "buttons": [{"label": "Mute", "pos_x": 0, "pos_y": 0, "color_bg": "#2d2d30", "color_fg": "white",
+                   "action": "print:hi", "image_path": null, "state_entity": null, "pages": [1, 2]}]
+    }
+
+Buttons are written once with the list of pages they appear on; their
+database ids are not part of the format, so a file can be imported into any
+deck. Imports run in one transaction with one ``executemany`` per table.
+"""
+import json
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+DECK_FORMAT = 'deckmaster-deck'
+DECK_VERSION = 1
+
+PRESETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'presets')
+
+# What to do with pages (and settings) that already exist:
+#   error     - refuse the import
+#   skip      - keep what is there and import the rest
+#   overwrite - replace those pages and their buttons; other pages are kept
+#   replace   - delete the whole deck first
+CONFLICT_MODES = ('error', 'skip', 'overwrite', 'replace')
+
+PAGE_FIELDS = ('page_number', 'webpage_url', 'show_webpage', 'background_color')
+BUTTON_FIELDS = ('label', 'pos_x', 'pos_y', 'color_bg', 'color_fg', 'action', 'image_path', 'state_entity')
+
+# Column widths from the schema, checked before anything is written
+TEXT_LIMITS = {
+    'label': 50, 'color_bg': 7, 'color_fg': 7, 'action': 255, 'image_path': 255, 'state_entity': 255,
+    'webpage_url': 500, 'background_color': 7,
+}
+
+
+class DeckImportError(ValueError):
+    """The deck file is invalid or conflicts with the existing deck."""
+
+    def __init__(self, problems: List[str]):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+class ImportResult(NamedTuple):
+    pages: List[int]  # pages written
+    buttons: int  # buttons written
+    settings: int  # settings written
+    skipped: List[int]  # existing pages left alone (on_conflict="skip")
+    removed: List[int]  # existing pages deleted and not imported again (on_conflict="replace")
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _check_text(problems: List[str], where: str, row: Dict, field: str, required: bool = False) -> None:
+    value = row.get(field)
+    if value is None:
+        if required:
+            problems.append(f"{where}: {field} is required")
+    elif not isinstance(value, str):
+        problems.append(f"{where}: {field} must be a string")
+    elif len(value) > TEXT_LIMITS[field]:
+        problems.append(f"{where}: {field} is longer than {TEXT_LIMITS[field]} characters")
+
+
+def validate_deck(deck) -> List[str]:
+    """Return everything wrong with ``deck``; an empty list means it can be imported."""
+    if not isinstance(deck, dict):
+        return ["Deck must be a JSON object"]
+    problems = []
+    if deck.get('format') != DECK_FORMAT:
+        problems.append(f"format must be {DECK_FORMAT!r}")
+    if deck.get('version') != DECK_VERSION:
+        problems.append(f"Unsupported deck version {deck.get('version')!r} (expected {DECK_VERSION})")
+
+    settings = deck.get('settings', {})
+    if not isinstance(settings, dict):
+        problems.append("settings must be an object")
+    else:
+        for key, value in settings.items():
+            if len(key) > 255:
+                problems.append(f"Setting {key[:20]}...: key is longer than 255 characters")
+            if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+                problems.append(f"Setting {key}: value must be a string or number")
+
+    pages = deck.get('pages', [])
+    seen = set()
+    if not isinstance(pages, list):
+        problems.append("pages must be a list")
+        pages = []
+    for index, page in enumerate(pages):
+        where = f"pages[{index}]"
+        if not isinstance(page, dict):
+            problems.append(f"{where}: must be an object")
+            continue
+        number = page.get('page_number')
+        if not _is_int(number) or number < 1:
+            problems.append(f"{where}: page_number must be a positive integer")
+        elif number in seen:
+            problems.append(f"{where}: page {number} appears more than once")
+        seen.add(number)
+        if page.get('show_webpage', 0) not in (0, 1, True, False):
+            problems.append(f"{where}: show_webpage must be 0 or 1")
+        for field in ('webpage_url', 'background_color'):
+            _check_text(problems, where, page, field)
+
+    buttons = deck.get('buttons', [])
+    if not isinstance(buttons, list):
+        problems.append("buttons must be a list")
+        buttons = []
+    for index, button in enumerate(buttons):
+        where = f"buttons[{index}]"
+        if not isinstance(button, dict):
+            problems.append(f"{where}: must be an object")
+            continue
+        _check_text(problems, where, button, 'label', required=True)
+        for field in ('color_bg', 'color_fg', 'action', 'image_path', 'state_entity'):
+            _check_text(problems, where, button, field)
+        for field in ('pos_x', 'pos_y'):
+            if not _is_int(button.get(field)):
+                problems.append(f"{where}: {field} must be an integer")
+        button_pages = button.get('pages', [])
+        if not isinstance(button_pages, list) or not all(_is_int(p) and p >= 1 for p in button_pages):
+            problems.append(f"{where}: pages must be a list of positive integers")
+    return problems
+
+
+def export_deck(conn, pages: Optional[Iterable[int]] = None) -> Dict:
+    """Read the deck (or just ``pages`` of it, without settings) into a deck dict."""
+    wanted = sorted(set(pages)) if pages is not None else None
+    with conn.cursor() as cur:
+        settings = {}
+        if wanted is None:
+            cur.execute("SELECT `key`, `value` FROM settings ORDER BY `key`")
+            settings = {row['key']: row['value'] for row in cur.fetchall()}
+            cur.execute(f"SELECT {', '.join(PAGE_FIELDS)} FROM pages ORDER BY page_number")
+            page_rows = cur.fetchall()
+            cur.execute(f"""
+                SELECT {', '.join('b.' + f for f in BUTTON_FIELDS)},
+                       GROUP_CONCAT(bp.page_number ORDER BY bp.page_number) AS pages
+                FROM buttons b
+                LEFT JOIN button_pages bp ON bp.button_id = b.id
+                GROUP BY b.id
+                ORDER BY b.id
+            """)
+        elif not wanted:
+            return {'format': DECK_FORMAT, 'version': DECK_VERSION, 'settings': {}, 'pages': [], 'buttons': []}
+        else:
+            placeholders = ', '.join(['%s'] * len(wanted))
+            cur.execute(
+                f"SELECT {', '.join(PAGE_FIELDS)} FROM pages WHERE page_number IN ({placeholders}) ORDER BY page_number",
+                wanted
+            )
+            page_rows = cur.fetchall()
+            cur.execute(f"""
+                SELECT {', '.join('b.' + f for f in BUTTON_FIELDS)},
+                       GROUP_CONCAT(bp.page_number ORDER BY bp.page_number) AS pages
+                FROM buttons b
+                JOIN button_pages bp ON bp.button_id = b.id
+                WHERE bp.page_number IN ({placeholders})
+                GROUP BY b.id
+                ORDER BY b.id
+            """, wanted)
+        buttons = []
+        for row in cur.fetchall():
+            button = {field: row[field] for field in BUTTON_FIELDS}
+            button['pages'] = [int(p) for p in str(row['pages'] or '').split(',') if p]
+            buttons.append(button)
+
+    return {
+        'format': DECK_FORMAT,
+        'version': DECK_VERSION,
+        'settings': settings,
+        'pages': [{field: row[field] for field in PAGE_FIELDS} for row in page_rows],
+        'buttons': buttons,
+    }
+
+
+def _existing_pages(cur, numbers: List[int]) -> List[int]:
+    if not numbers:
+        return []
+    placeholders = ', '.join(['%s'] * len(numbers))
+    cur.execute(f"""
+        SELECT page_number FROM pages WHERE page_number IN ({placeholders})
+        UNION
+        SELECT page_number FROM button_pages WHERE page_number IN ({placeholders})
+    """, numbers + numbers)
+    return sorted(row['page_number'] for row in cur.fetchall())
+
+
+def _all_pages(cur) -> List[int]:
+    cur.execute("SELECT page_number FROM pages UNION SELECT page_number FROM button_pages")
+    return sorted(row['page_number'] for row in cur.fetchall())
+
+
+def _clear_pages(cur, numbers: List[int]) -> None:
+    """Delete ``numbers`` with their buttons, keeping buttons still shown on other pages."""
+    placeholders = ', '.join(['%s'] * len(numbers))
+    cur.execute(f"SELECT DISTINCT button_id FROM button_pages WHERE page_number IN ({placeholders})", numbers)
+    button_ids = [row['button_id'] for row in cur.fetchall()]
+    cur.execute(f"DELETE FROM button_pages WHERE page_number IN ({placeholders})", numbers)
+    cur.execute(f"DELETE FROM pages WHERE page_number IN ({placeholders})", numbers)
+    if button_ids:
+        cur.execute(f"""
+            DELETE FROM buttons
+            WHERE id IN ({', '.join(['%s'] * len(button_ids))})
+              AND id NOT IN (SELECT button_id FROM button_pages)
+        """, button_ids)
+
+
+def import_deck(conn, deck: Dict, on_conflict: str = 'error', include_settings: bool = True) -> ImportResult:
+    """Write ``deck`` in a single transaction; nothing is changed if any step fails.
+
+    Raises :class:`DeckImportError` when the deck is invalid or, with
+    ``on_conflict="error"``, when one of its pages or settings already exists.
+    """
+    if on_conflict not in CONFLICT_MODES:
+        raise DeckImportError([f"on_conflict must be one of {', '.join(CONFLICT_MODES)}"])
+    problems = validate_deck(deck)
+    if problems:
+        raise DeckImportError(problems)
+
+    pages = {page['page_number']: page for page in deck.get('pages', [])}
+    buttons = [dict(button, pages=sorted(set(button.get('pages', [])))) for button in deck.get('buttons', [])]
+    settings = {key: str(value) for key, value in deck.get('settings', {}).items()} if include_settings else {}
+    numbers = sorted(set(pages) | {p for button in buttons for p in button['pages']})
+    skipped: List[int] = []
+    removed: List[int] = []
+
+    conn.begin()
+    try:
+        with conn.cursor() as cur:
+            if on_conflict == 'replace':
+                removed = [number for number in _all_pages(cur) if number not in numbers]
+                cur.execute("DELETE FROM button_pages")
+                cur.execute("DELETE FROM buttons")
+                cur.execute("DELETE FROM pages")
+                if settings:
+                    cur.execute("DELETE FROM settings")
+            else:
+                existing = _existing_pages(cur, numbers)
+                if settings and on_conflict != 'overwrite':
+                    cur.execute(
+                        f"SELECT `key`, `value` FROM settings WHERE `key` IN ({', '.join(['%s'] * len(settings))})",
+                        list(settings)
+                    )
+                    current = {row['key']: row['value'] for row in cur.fetchall()}
+                    clashes = [key for key, value in current.items() if value != settings[key]]
+                    if clashes and on_conflict == 'error':
+                        problems.append(f"Settings already set to other values: {', '.join(sorted(clashes))}")
+                    settings = {key: value for key, value in settings.items() if key not in current}
+                if existing and on_conflict == 'error':
+                    problems.append(f"Pages already exist: {', '.join(map(str, existing))}")
+                if problems:
+                    raise DeckImportError(problems)
+                if existing and on_conflict == 'skip':
+                    skipped = existing
+                    for number in skipped:
+                        pages.pop(number, None)
+                    kept = []
+                    for button in buttons:
+                        remaining = [p for p in button['pages'] if p not in skipped]
+                        if remaining or not button['pages']:
+                            kept.append(dict(button, pages=remaining))
+                    buttons = kept
+                    numbers = [n for n in numbers if n not in skipped]
+                elif existing:
+                    _clear_pages(cur, existing)
+
+            if pages:
+                cur.executemany(
+                    f"INSERT INTO pages ({', '.join(PAGE_FIELDS)}) VALUES ({', '.join(['%s'] * len(PAGE_FIELDS))})",
+                    [(number, page.get('webpage_url'), int(page.get('show_webpage') or 0),
+                      page.get('background_color') or '#1e1e1e') for number, page in sorted(pages.items())]
+                )
+
+            if buttons:
+                # Choose the ids up front so button_pages can be written in one go too
+                cur.execute("SELECT COALESCE(MAX(id), 0) AS max_id FROM buttons FOR UPDATE")
+                first_id = cur.fetchone()['max_id'] + 1
+                cur.executemany(
+                    f"INSERT INTO buttons (id, {', '.join(BUTTON_FIELDS)}) "
+                    f"VALUES ({', '.join(['%s'] * (len(BUTTON_FIELDS) + 1))})",
+                    [(first_id + index, button['label'], button['pos_x'], button['pos_y'],
+                      button.get('color_bg') or '#2d2d30', button.get('color_fg') or 'white',
+                      button.get('action'), button.get('image_path'), button.get('state_entity'))
+                     for index, button in enumerate(buttons)]
+                )
+                memberships = [(first_id + index, page) for index, button in enumerate(buttons) for page in button['pages']]
+                if memberships:
+                    cur.executemany("INSERT INTO button_pages (button_id, page_number) VALUES (%s, %s)", memberships)
+
+            if settings:
+                upsert = " ON DUPLICATE KEY UPDATE `value` = VALUES(`value`)" if on_conflict == 'overwrite' else ""
+                cur.executemany(f"INSERT INTO settings (`key`, `value`) VALUES (%s, %s){upsert}", sorted(settings.items()))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return ImportResult(numbers, len(buttons), len(settings), skipped, removed)
+
+
+def clone_pages(conn, mapping: Dict[int, int], on_conflict: str = 'error') -> ImportResult:
+    """Copy pages to new page numbers, e.g. ``{1: 5}``; buttons shared between copied pages stay shared."""
+    deck = export_deck(conn, mapping)
+    deck['pages'] = [dict(page, page_number=mapping[page['page_number']]) for page in deck['pages']]
+    deck['buttons'] = [
+        dict(button, pages=[mapping[p] for p in button['pages'] if p in mapping]) for button in deck['buttons']
+    ]
+    return import_deck(conn, deck, on_conflict, include_settings=False)
+
+
+def list_presets() -> List[str]:
+    try:
+        return sorted(name[:-5] for name in os.listdir(PRESETS_DIR) if name.endswith('.json'))
+    except OSError:
+        return []
+
+
+def load_preset(name: str) -> Dict:
+    if name not in list_presets():
+        raise DeckImportError([f"No preset named {name!r}"])
+    with open(os.path.join(PRESETS_DIR, f"{name}.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,60 @@
+from typing import Dict, FrozenSet, Optional
+
+# Every setting the renderer reads: key -> (type, default). Values in the
+# settings table are strings; anything that doesn't parse gets the default.
+SETTINGS_SCHEMA = {
+    'BG_COLOR': (str, '#1e1e1e'),
+    'BUTTON_ACTIVE_BG': (str, '#007acc'),
+    'NAV_BUTTON_BG': (str, '#2d2d30'),
+    'STATE_ON_BG': (str, None),  # falls back to BUTTON_ACTIVE_BG
+    'BUTTON_WIDTH': (int, 121),
+    'BUTTON_HEIGHT': (int, 128),
+    'OFFSET_X': (int, 20),
+    'OFFSET_BUTTON_V': (int, 7),
+    'NAV_Y': (int, 662),
+    'NAV_LEFT_X': (int, 985),
+    'NAV_RIGHT_X': (int, 1153),
+    'CURSOR_PARK_X': (int, 1900),
+    'CURSOR_PARK_Y': (int, 1060),
+    'WEB_HEIGHT': (int, 300),
+    'WEB_POOL_SIZE': (int, 3),
+    'WEB_POOL_MEMORY_MB': (int, 512),
+    'UPDATE_INTERVAL': (int, 500),
+    'POLL_FALLBACK_INTERVAL': (int, 30000),
+    'ERROR_BANNER_TIMEOUT': (int, 5000),
+    'PAGE_CACHE_SIZE': (int, 8),
+    'IMAGE_REVALIDATE_INTERVAL': (int, 300),
+    'IMAGE_MEMORY_CACHE_KB': (int, 20480),
+}
+
+
+def _parse(kind: type, value, default):
+    if value is None:
+        return default
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class DeckSettings:
+    """The settings table parsed into typed attributes.
+
+    Each key in :data:`SETTINGS_SCHEMA` becomes a lower-case attribute
+    (``BUTTON_WIDTH`` -> ``button_width``) that is parsed once, when the
+    settings are loaded, instead of on every read. ``raw`` keeps the rows as
+    stored, including keys the renderer doesn't know about.
+    """
+
+    __slots__ = ('raw',) + tuple(key.lower() for key in SETTINGS_SCHEMA)
+
+    def __init__(self, raw: Optional[Dict[str, str]] = None):
+        self.raw = dict(raw or {})
+        for key, (kind, default) in SETTINGS_SCHEMA.items():
+            setattr(self, key.lower(), _parse(kind, self.raw.get(key), default))
+
+    def changed(self, other: "DeckSettings") -> FrozenSet[str]:
+        """Keys whose parsed value differs between ``self`` and ``other``."""
+        return frozenset(
+            key for key in SETTINGS_SCHEMA if getattr(self, key.lower()) != getattr(other, key.lower())
+        )
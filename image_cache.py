@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, Optional, Tuple
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage
+
+
+def default_cache_dir() -> str:
+    base = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'deckmaster', 'images')
+
+
+def is_remote(image_path: str) -> bool:
+    return image_path.startswith(("http://", "https://"))
+
+
+class ImageCache:
+    """Content-addressed on-disk cache of button images.
+
+    Originals are stored under ``blobs/<sha256>`` and pre-scaled copies under
+    ``scaled/<sha256>_<w>x<h>.png``, so identical images referenced by
+    different paths share storage. ``index.json`` maps each image path to its
+    content hash plus the ETag/Last-Modified validators needed to revalidate
+    remote images with a conditional GET.
+
+    All methods are blocking and meant to run on worker threads; they return
+    QImages, which unlike QPixmaps may be created off the GUI thread.
+    """
+
+    def __init__(self, directory: Optional[str] = None, revalidate_after: int = 300, timeout: int = 10):
+        self.directory = directory or default_cache_dir()
+        self.revalidate_after = revalidate_after
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        os.makedirs(os.path.join(self.directory, 'blobs'), exist_ok=True)
+        os.makedirs(os.path.join(self.directory, 'scaled'), exist_ok=True)
+        self._index_path = os.path.join(self.directory, 'index.json')
+        self._index: Dict[str, Dict] = self._read_index()
+
+    def _read_index(self) -> Dict[str, Dict]:
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self) -> None:
+        tmp_path = f"{self._index_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path)
+
+    def _update_entry(self, image_path: str, **fields) -> None:
+        with self._lock:
+            entry = self._index.setdefault(image_path, {})
+            entry.update(fields)
+            self._write_index()
+
+    def cache_key(self, sha: str, size: Tuple[int, int]) -> str:
+        return f"{sha}:{size[0]}x{size[1]}"
+
+    def _scaled_path(self, sha: str, size: Tuple[int, int]) -> str:
+        return os.path.join(self.directory, 'scaled', f"{sha}_{size[0]}x{size[1]}.png")
+
+    def _store(self, image_path: str, data: bytes, **validators) -> str:
+        if QImage.fromData(data).isNull():
+            raise ValueError("not a supported image format")
+        sha = hashlib.sha256(data).hexdigest()
+        blob_path = os.path.join(self.directory, 'blobs', sha)
+        if not os.path.exists(blob_path):
+            with open(blob_path, 'wb') as f:
+                f.write(data)
+        self._update_entry(image_path, sha=sha, checked=time.time(), **validators)
+        return sha
+
+    def _scaled(self, sha: str, size: Tuple[int, int]) -> Optional[QImage]:
+        scaled_path = self._scaled_path(sha, size)
+        if os.path.exists(scaled_path):
+            image = QImage(scaled_path)
+            if not image.isNull():
+                return image
+
+        original = QImage(os.path.join(self.directory, 'blobs', sha))
+        if original.isNull():
+            return None
+        image = original.scaled(size[0], size[1], Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        image.save(scaled_path, 'PNG')
+        return image
+
+    def load(self, image_path: str, size: Tuple[int, int]) -> Optional[Tuple[str, QImage]]:
+        """Return ``(key, image)`` scaled to ``size`` without touching the network.
+
+        Local files are (re)read when they change on disk. Remote images are
+        only returned if an earlier :meth:`refresh` already downloaded them.
+        """
+        if is_remote(image_path):
+            entry = self._index.get(image_path)
+            if not entry or 'sha' not in entry:
+                return None
+            sha = entry['sha']
+        else:
+            if not os.path.isfile(image_path):
+                return None
+            stat = os.stat(image_path)
+            entry = self._index.get(image_path)
+            if entry and entry.get('mtime') == stat.st_mtime and entry.get('size') == stat.st_size:
+                sha = entry['sha']
+            else:
+                with open(image_path, 'rb') as f:
+                    sha = self._store(image_path, f.read(), mtime=stat.st_mtime, size=stat.st_size)
+
+        image = self._scaled(sha, size)
+        if image is None:
+            return None
+        return self.cache_key(sha, size), image
+
+    def needs_refresh(self, image_path: str) -> bool:
+        if not is_remote(image_path):
+            return False
+        entry = self._index.get(image_path)
+        return not entry or time.time() - entry.get('checked', 0) >= self.revalidate_after
+
+    def refresh(self, image_path: str, size: Tuple[int, int]) -> Optional[Tuple[str, QImage]]:
+        """Download or revalidate a remote image.
+
+        Returns ``(key, image)`` when new content arrived and ``None`` when the
+        cached copy is still current or another thread is already fetching it.
+        Download errors are raised.
+        """
+        with self._lock:
+            if image_path in self._in_flight:
+                return None
+            self._in_flight.add(image_path)
+        try:
+            entry = dict(self._index.get(image_path) or {})
+            request = urllib.request.Request(image_path)
+            if 'sha' in entry:
+                if entry.get('etag'):
+                    request.add_header('If-None-Match', entry['etag'])
+                if entry.get('last_modified'):
+                    request.add_header('If-Modified-Since', entry['last_modified'])
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    data = response.read()
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+                sha = self._store(image_path, data, etag=etag, last_modified=last_modified)
+            except urllib.error.HTTPError as e:
+                self._update_entry(image_path, checked=time.time())
+                if e.code == 304:
+                    return None
+                raise
+            except Exception:
+                # Don't retry a broken image until it is due for revalidation
+                self._update_entry(image_path, checked=time.time())
+                raise
+
+            if sha == entry.get('sha'):
+                return None
+            image = self._scaled(sha, size)
+            return (self.cache_key(sha, size), image) if image is not None else None
+        finally:
+            with self._lock:
+                self._in_flight.discard(image_path)
@@ -0,0 +1,292 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Sequence, Tuple
+
+log = logging.getLogger(__name__)
+
+# Seconds; spans a fast in-memory step up to a slow network call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class CounterValue:
+    """One labelled series of a :class:`Counter`."""
+
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class HistogramValue:
+    """One labelled series of a :class:`Histogram`."""
+
+    __slots__ = ('_lock', 'bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # per bucket, the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> "Timer":
+        return Timer(self)
+
+
+class Timer:
+    """Context manager that observes how long its block took, in seconds."""
+
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram: HistogramValue):
+        self.histogram = histogram
+        self.started = 0.0
+
+    def __enter__(self) -> "Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+class Metric:
+    """A named metric with one series per combination of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values):
+        key = tuple(str(value) for value in values)
+        series = self._series.get(key)
+        if series is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            with self._lock:
+                series = self._series.setdefault(key, self._new_series())
+        return series
+
+    def _new_series(self):
+        raise NotImplementedError
+
+    def render(self) -> str:
+        documentation = self.documentation.replace("\\", "\\\\").replace("\n", "\\n")
+        lines = [f"# HELP {self.name} {documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = list(self._series.items())
+        for values, value in series:
+            lines.extend(self._render_series(values, value))
+        return "\n".join(lines) + "\n"
+
+    def _render_series(self, values, value):
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_series(self) -> CounterValue:
+        return CounterValue()
+
+    def inc(self, amount=1) -> None:
+        self.labels().inc(amount)
+
+    def _render_series(self, values, value: CounterValue):
+        yield f"{self.name}{_label_text(self.labelnames, values)} {_number(value.value)}"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_series(self) -> HistogramValue:
+        return HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self) -> Timer:
+        return self.labels().time()
+
+    def _render_series(self, values, value: HistogramValue):
+        with value._lock:
+            counts, total, count = list(value.counts), value.sum, value.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            labels = _label_text(self.labelnames, values, f'le="{_number(float(bound))}"')
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        labels = _label_text(self.labelnames, values)
+        yield f"{self.name}_sum{labels} {_number(total)}"
+        yield f"{self.name}_count{labels} {count}"
+
+
+class MetricsRegistry:
+    """Every metric the process records, rendered together for Prometheus.
+
+    Recording costs a dictionary lookup and a short lock, so metrics stay on
+    whether or not anything is exporting them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is None:
+                self._metrics[metric.name] = existing = metric
+            elif type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Metric {metric.name} is already registered differently")
+        return existing
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return "".join(metric.render() for metric in metrics)
+
+
+registry = MetricsRegistry()
+counter = registry.counter
+histogram = registry.histogram
+
+
+class MetricsExporter:
+    """Publishes :data:`registry` in the Prometheus text format.
+
+    With ``port`` it is served over HTTP at ``/metrics`` (on ``host``, which
+    defaults to loopback); with ``path`` it is rewritten every ``interval``
+    seconds, for node_exporter's textfile collector. Either, both or neither
+    may be set; :meth:`from_env` reads ``METRICS_PORT``, ``METRICS_HOST``,
+    ``METRICS_FILE`` and ``METRICS_FILE_INTERVAL``.
+    """
+
+    def __init__(self, port: Optional[int] = None, host: str = "127.0.0.1",
+                 path: Optional[str] = None, interval: float = 15):
+        self.port = port
+        self.host = host
+        self.path = path
+        self.interval = interval
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "MetricsExporter":
+        port = os.getenv('METRICS_PORT')
+        return cls(
+            int(port) if port else None,
+            os.getenv('METRICS_HOST', "127.0.0.1"),
+            os.getenv('METRICS_FILE') or None,
+            float(os.getenv('METRICS_FILE_INTERVAL', 15))
+        )
+
+    def start(self) -> None:
+        if self.port is not None:
+            try:
+                self._server = ThreadingHTTPServer((self.host, self.port), MetricsHandler)
+            except OSError as e:
+                log.warning("Metrics endpoint unavailable on %s:%s: %s", self.host, self.port, e)
+            else:
+                self._server.daemon_threads = True
+                threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+                log.info("Serving metrics on http://%s:%s/metrics", self.host, self.port)
+        if self.path:
+            self._writer = threading.Thread(target=self._write_periodically, name="metrics-file", daemon=True)
+            self._writer.start()
+            log.info("Writing metrics to %s every %gs", self.path, self.interval)
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._writer is not None:
+            self._stop.set()
+            self._writer.join(timeout=5)
+            self._writer = None
+
+    def _write_periodically(self) -> None:
+        while True:
+            self.write_file()
+            if self._stop.wait(self.interval):
+                self.write_file()
+                return
+
+    def write_file(self) -> None:
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(registry.render())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            log.warning("Could not write metrics to %s: %s", self.path, e)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        log.debug("Metrics request: " + format, *args)
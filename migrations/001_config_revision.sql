@@ -0,0 +1,12 @@
+-- Adds the config revision counter polled by the renderer.
+-- The dashboard bumps it after every write. If you edit buttons, pages or
+-- settings by hand, bump it too so running decks pick up the change:
+--   UPDATE config_revision SET revision = revision + 1 WHERE id = 1;
+
+CREATE TABLE IF NOT EXISTS `config_revision` (
+  `id` tinyint(1) NOT NULL,
+  `revision` bigint(20) UNSIGNED NOT NULL DEFAULT 0,
+  PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+INSERT IGNORE INTO `config_revision` (`id`, `revision`) VALUES (1, 1);
@@ -0,0 +1,30 @@
+-- Replaces the comma-separated `buttons.page` column with an indexed
+-- `button_pages` membership table, so a page's buttons can be looked up
+-- without scanning every button.
+
+CREATE TABLE IF NOT EXISTS `button_pages` (
+  `button_id` int(11) NOT NULL,
+  `page_number` int(11) NOT NULL,
+  PRIMARY KEY (`page_number`, `button_id`),
+  KEY `button_id` (`button_id`),
+  CONSTRAINT `button_pages_button` FOREIGN KEY (`button_id`) REFERENCES `buttons` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- Split each CSV value into one row per page. `page` is a varchar(255), so
+-- it can never hold more than 128 entries; 200 numbers is plenty.
+INSERT IGNORE INTO `button_pages` (`button_id`, `page_number`)
+SELECT b.`id`, CAST(TRIM(SUBSTRING_INDEX(SUBSTRING_INDEX(b.`page`, ',', n.`n`), ',', -1)) AS UNSIGNED)
+FROM `buttons` b
+JOIN (
+  SELECT ones.d + tens.d * 10 + hundreds.d * 100 + 1 AS n
+  FROM (SELECT 0 d UNION ALL SELECT 1 UNION ALL SELECT 2 UNION ALL SELECT 3 UNION ALL SELECT 4
+        UNION ALL SELECT 5 UNION ALL SELECT 6 UNION ALL SELECT 7 UNION ALL SELECT 8 UNION ALL SELECT 9) ones
+  CROSS JOIN (SELECT 0 d UNION ALL SELECT 1 UNION ALL SELECT 2 UNION ALL SELECT 3 UNION ALL SELECT 4
+        UNION ALL SELECT 5 UNION ALL SELECT 6 UNION ALL SELECT 7 UNION ALL SELECT 8 UNION ALL SELECT 9) tens
+  CROSS JOIN (SELECT 0 d UNION ALL SELECT 1) hundreds
+) n ON n.`n` <= 1 + LENGTH(b.`page`) - LENGTH(REPLACE(b.`page`, ',', ''))
+WHERE TRIM(SUBSTRING_INDEX(SUBSTRING_INDEX(b.`page`, ',', n.`n`), ',', -1)) REGEXP '^[0-9]+$';
+
+ALTER TABLE `buttons` DROP COLUMN `page`;
+
+UPDATE `config_revision` SET `revision` = `revision` + 1 WHERE `id` = 1;
@@ -0,0 +1,9 @@
+-- Lets a button follow a Home Assistant entity: its background switches to
+-- `STATE_ON_BG` while the entity is on, and `{state}` in the label shows the
+-- entity's current state.
+
+ALTER TABLE `buttons` ADD COLUMN `state_entity` varchar(255) DEFAULT NULL AFTER `image_path`;
+
+INSERT IGNORE INTO `settings` (`key`, `value`) VALUES ('STATE_ON_BG', '#007acc');
+
+UPDATE `config_revision` SET `revision` = `revision` + 1 WHERE `id` = 1;
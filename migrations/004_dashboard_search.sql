@@ -0,0 +1,10 @@
+-- Indexes behind the dashboard's button search: a FULLTEXT index over
+-- labels and actions, plus plain indexes for prefix matches on words too
+-- short for the FULLTEXT index (innodb_ft_min_token_size, 3 by default).
+-- The dashboard falls back to slower LIKE matching until this has run.
+
+ALTER TABLE `buttons` ADD KEY `label` (`label`);
+
+ALTER TABLE `buttons` ADD KEY `action` (`action`(64));
+
+ALTER TABLE `buttons` ADD FULLTEXT KEY `buttons_search` (`label`, `action`);
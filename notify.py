@@ -0,0 +1,49 @@
+import json
+import logging
+import os
+import socket
+from typing import Iterable, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+# Change notifications sent from the dashboard to running renderers.
+# Events are small JSON datagrams on a UDP multicast group, so any number of
+# decks on the local network can listen without the dashboard tracking them.
+# Set NOTIFY_GROUP to a unicast address such as 127.0.0.1 for a single machine.
+
+DEFAULT_NOTIFY_GROUP = "239.255.77.77"
+DEFAULT_NOTIFY_PORT = 47777
+
+
+def notify_address() -> Tuple[str, int]:
+    return (
+        os.getenv('NOTIFY_GROUP', DEFAULT_NOTIFY_GROUP),
+        int(os.getenv('NOTIFY_PORT', DEFAULT_NOTIFY_PORT))
+    )
+
+
+def publish_change(pages: Optional[Iterable[int]] = None, revision: Optional[int] = None) -> None:
+    """Announce a config change. ``pages=None`` means every page is affected."""
+    payload = {
+        "revision": revision,
+        "pages": sorted(set(pages)) if pages is not None else None
+    }
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP) as sock:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, int(os.getenv('NOTIFY_TTL', 1)))
+            sock.sendto(json.dumps(payload).encode('utf-8'), notify_address())
+    except OSError as e:
+        log.warning("Failed to publish change: %s", e)
+
+
+def parse_change(data: bytes) -> Optional[dict]:
+    try:
+        change = json.loads(data.decode('utf-8'))
+    except (UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(change, dict):
+        return None
+    pages = change.get('pages')
+    if pages is not None and not isinstance(pages, list):
+        return None
+    return change
@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from image_cache import default_cache_dir
+
+log = logging.getLogger(__name__)
+
+# Bump when the layout below changes; older snapshots are thrown away
+SNAPSHOT_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS pages (
+    page_number INTEGER PRIMARY KEY,
+    revision INTEGER,
+    page_data TEXT,
+    buttons TEXT NOT NULL,
+    saved_at REAL NOT NULL
+);
+"""
+
+
+def default_snapshot_path() -> str:
+    return os.path.join(os.path.dirname(default_cache_dir()), 'offline.sqlite3')
+
+
+class OfflineStore:
+    """Local SQLite copy of the last good deck configuration.
+
+    Holds the settings plus, per page, the page row and its buttons as of a
+    config revision. Buttons keep their ``image_path``, whose content lives
+    in the :class:`~image_cache.ImageCache`, so a snapshot can be drawn
+    without MySQL or the network. Rows whose revision is behind the
+    database's are still served when MySQL is unreachable.
+
+    Safe to use from any thread; access is serialised with a lock. A
+    snapshot that cannot be read is started over, and failed writes are
+    reported and otherwise ignored, since the deck works without one.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_snapshot_path()
+        self._lock = threading.Lock()
+        try:
+            self._conn = self._open()
+        except sqlite3.DatabaseError as e:
+            log.warning("Offline snapshot %s is unreadable (%s), starting a new one", self.path, e)
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
+            self._conn = self._open()
+
+    def _open(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row is None or int(row[0]) != SNAPSHOT_VERSION:
+                conn.executescript("DELETE FROM settings; DELETE FROM pages;")
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (str(SNAPSHOT_VERSION),)
+                )
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def _write(self, *statements: Tuple[str, List[Tuple]]) -> None:
+        """Run each ``(sql, rows)`` statement once per row, all in one transaction."""
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN")
+                for sql, rows in statements:
+                    self._conn.executemany(sql, rows)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                log.warning("Could not save offline snapshot: %s", e)
+
+    def _read(self, sql: str, args: Tuple = ()) -> List[Tuple]:
+        with self._lock:
+            try:
+                return self._conn.execute(sql, args).fetchall()
+            except sqlite3.Error as e:
+                log.warning("Could not read offline snapshot: %s", e)
+                return []
+
+    def settings(self) -> Optional[Dict[str, str]]:
+        rows = self._read("SELECT key, value FROM settings")
+        return dict(rows) if rows else None
+
+    def save_settings(self, settings: Dict[str, str]) -> None:
+        self._write(
+            ("DELETE FROM settings", [()]),
+            ("INSERT INTO settings (key, value) VALUES (?, ?)", [(k, str(v)) for k, v in settings.items()])
+        )
+
+    def page(self, page: int) -> Optional[Tuple[Optional[int], Optional[Dict], List[Dict]]]:
+        """Return ``(revision, page_data, buttons)`` for ``page`` if it was saved."""
+        rows = self._read("SELECT revision, page_data, buttons FROM pages WHERE page_number = ?", (page,))
+        if not rows:
+            return None
+        revision, page_data, buttons = rows[0]
+        return revision, json.loads(page_data) if page_data else None, json.loads(buttons)
+
+    def save_page(self, page: int, revision: Optional[int], page_data: Optional[Dict], buttons: List[Dict]) -> None:
+        """Save ``page`` unless the same copy is already saved.
+
+        Without a config revision every poll reloads the page, so the check
+        keeps an unchanged deck from rewriting the snapshot twice a second.
+        """
+        row = (revision, json.dumps(page_data, default=str) if page_data is not None else None,
+               json.dumps(buttons, default=str))
+        saved = self._read("SELECT revision, page_data, buttons FROM pages WHERE page_number = ?", (page,))
+        if saved and saved[0] == row:
+            return
+        self._write((
+            "INSERT OR REPLACE INTO pages (page_number, revision, page_data, buttons, saved_at) VALUES (?, ?, ?, ?, ?)",
+            [(page, *row, time.time())]
+        ))
+
+    def stale_pages(self, revision: int, pages: Iterable[int]) -> List[int]:
+        """Those of ``pages`` not saved as of ``revision``."""
+        current = {p for (p,) in self._read("SELECT page_number FROM pages WHERE revision = ?", (revision,))}
+        return [p for p in pages if p not in current]
+
+    def keep_pages(self, pages: Iterable[int]) -> None:
+        """Drop saved pages that no longer exist."""
+        keep = {p for p in pages}
+        gone = [(p,) for (p,) in self._read("SELECT page_number FROM pages") if p not in keep]
+        if gone:
+            self._write(("DELETE FROM pages WHERE page_number = ?", gone))
+
+    def advance(self, revision: int, pages: Optional[List[int]]) -> None:
+        """Carry saved pages forward to ``revision`` when a change names the pages it touched.
+
+        Mirrors the renderer's page cache: pages outside ``pages`` that were
+        current as of ``revision - 1`` are still current.
+        """
+        if pages is None:
+            return
+        changed = set(pages)
+        unchanged = [
+            (revision, p) for (p,) in self._read("SELECT page_number FROM pages WHERE revision = ?", (revision - 1,))
+            if p not in changed
+        ]
+        if unchanged:
+            self._write(("UPDATE pages SET revision = ? WHERE page_number = ?", unchanged))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
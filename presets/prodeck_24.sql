@@ -12,33 +12,62 @@ CREATE TABLE `buttons` (
   `color_bg` varchar(7) DEFAULT '#2d2d30',
   `color_fg` varchar(7) DEFAULT 'white',
   `action` varchar(255) DEFAULT NULL,
-  `page` varchar(255) DEFAULT '1',
-  `image_path` varchar(255) DEFAULT NULL
+  `image_path` varchar(255) DEFAULT NULL,
+  `state_entity` varchar(255) DEFAULT NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 
-INSERT INTO `buttons` (`id`, `label`, `pos_x`, `pos_y`, `color_bg`, `color_fg`, `action`, `page`, `image_path`) VALUES
-(1, 'C1', -32, 319, '#2d2d30', 'white', NULL, '1', NULL),
-(2, 'C2', 138, 317, '#2d2d30', 'white', NULL, '1', NULL),
-(3, 'C3', 305, 316, '#2d2d30', 'white', NULL, '1', NULL),
-(4, 'C4', 475, 316, '#2d2d30', 'white', NULL, '1', NULL),
-(5, 'C5', 645, 316, '#2d2d30', 'white', NULL, '1', NULL),
-(6, 'C6', 815, 316, '#2d2d30', 'white', NULL, '1', NULL),
-(7, 'C7', 985, 316, '#2d2d30', 'white', NULL, '1', NULL),
-(8, 'C8', 1153, 316, '#2d2d30', 'white', NULL, '1', NULL),
-(9, 'D1', -35, 488, '#2d2d30', 'white', NULL, '1', NULL),
-(10, 'D2', 135, 488, '#2d2d30', 'white', NULL, '1', NULL),
-(11, 'D3', 305, 488, '#2d2d30', 'white', NULL, '1', NULL),
-(12, 'D4', 475, 488, '#2d2d30', 'white', NULL, '1', NULL),
-(13, 'D5', 645, 488, '#2d2d30', 'white', NULL, '1', NULL),
-(14, 'D6', 815, 488, '#2d2d30', 'white', NULL, '1', NULL),
-(15, 'D7', 985, 488, '#2d2d30', 'white', NULL, '1', NULL),
-(16, 'D8', 1153, 488, '#2d2d30', 'white', NULL, '1', NULL),
-(17, 'E1', -32, 663, '#2d2d30', 'white', NULL, '1', NULL),
-(18, 'E2', 138, 663, '#2d2d30', 'white', NULL, '1', NULL),
-(19, 'E3', 305, 662, '#2d2d30', 'white', NULL, '1', NULL),
-(20, 'E4', 475, 662, '#2d2d30', 'white', NULL, '1', NULL),
-(21, 'E5', 645, 662, '#2d2d30', 'white', NULL, '1', NULL),
-(22, 'E6', 815, 662, '#2d2d30', 'white', NULL, '1', NULL);
+INSERT INTO `buttons` (`id`, `label`, `pos_x`, `pos_y`, `color_bg`, `color_fg`, `action`, `image_path`) VALUES
+(1, 'C1', -32, 319, '#2d2d30', 'white', NULL, NULL),
+(2, 'C2', 138, 317, '#2d2d30', 'white', NULL, NULL),
+(3, 'C3', 305, 316, '#2d2d30', 'white', NULL, NULL),
+(4, 'C4', 475, 316, '#2d2d30', 'white', NULL, NULL),
+(5, 'C5', 645, 316, '#2d2d30', 'white', NULL, NULL),
+(6, 'C6', 815, 316, '#2d2d30', 'white', NULL, NULL),
+(7, 'C7', 985, 316, '#2d2d30', 'white', NULL, NULL),
+(8, 'C8', 1153, 316, '#2d2d30', 'white', NULL, NULL),
+(9, 'D1', -35, 488, '#2d2d30', 'white', NULL, NULL),
+(10, 'D2', 135, 488, '#2d2d30', 'white', NULL, NULL),
+(11, 'D3', 305, 488, '#2d2d30', 'white', NULL, NULL),
+(12, 'D4', 475, 488, '#2d2d30', 'white', NULL, NULL),
+(13, 'D5', 645, 488, '#2d2d30', 'white', NULL, NULL),
+(14, 'D6', 815, 488, '#2d2d30', 'white', NULL, NULL),
+(15, 'D7', 985, 488, '#2d2d30', 'white', NULL, NULL),
+(16, 'D8', 1153, 488, '#2d2d30', 'white', NULL, NULL),
+(17, 'E1', -32, 663, '#2d2d30', 'white', NULL, NULL),
+(18, 'E2', 138, 663, '#2d2d30', 'white', NULL, NULL),
+(19, 'E3', 305, 662, '#2d2d30', 'white', NULL, NULL),
+(20, 'E4', 475, 662, '#2d2d30', 'white', NULL, NULL),
+(21, 'E5', 645, 662, '#2d2d30', 'white', NULL, NULL),
+(22, 'E6', 815, 662, '#2d2d30', 'white', NULL, NULL);
+
+CREATE TABLE `button_pages` (
+  `button_id` int(11) NOT NULL,
+  `page_number` int(11) NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+INSERT INTO `button_pages` (`button_id`, `page_number`) VALUES
+(1, 1),
+(2, 1),
+(3, 1),
+(4, 1),
+(5, 1),
+(6, 1),
+(7, 1),
+(8, 1),
+(9, 1),
+(10, 1),
+(11, 1),
+(12, 1),
+(13, 1),
+(14, 1),
+(15, 1),
+(16, 1),
+(17, 1),
+(18, 1),
+(19, 1),
+(20, 1),
+(21, 1),
+(22, 1);
 
 CREATE TABLE `pages` (
   `id` int(11) NOT NULL,
@@ -70,12 +99,36 @@ INSERT INTO `settings` (`key`, `value`) VALUES
 ('OFFSET_BUTTON_V', '7'),
 ('OFFSET_X', '20'),
 ('UPDATE_INTERVAL', '500'),
+('POLL_FALLBACK_INTERVAL', '30000'),
+('PAGE_CACHE_SIZE', '8'),
+('IMAGE_REVALIDATE_INTERVAL', '300'),
+('IMAGE_MEMORY_CACHE_KB', '20480'),
+('STATE_ON_BG', '#007acc'),
 ('ERROR_BANNER_TIMEOUT', '5000'),
 ('WEB_HEIGHT', '300'),
+('WEB_POOL_SIZE', '3'),
+('WEB_POOL_MEMORY_MB', '512'),
 ('WEB_MARGIN_TOP', '0');
 
+CREATE TABLE `config_revision` (
+  `id` tinyint(1) NOT NULL,
+  `revision` bigint(20) UNSIGNED NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+INSERT INTO `config_revision` (`id`, `revision`) VALUES
+(1, 1);
+
 ALTER TABLE `buttons`
-  ADD PRIMARY KEY (`id`);
+  ADD PRIMARY KEY (`id`),
+  ADD KEY `label` (`label`),
+  ADD KEY `action` (`action`(64));
+
+ALTER TABLE `buttons`
+  ADD FULLTEXT KEY `buttons_search` (`label`, `action`);
+
+ALTER TABLE `button_pages`
+  ADD PRIMARY KEY (`page_number`, `button_id`),
+  ADD KEY `button_id` (`button_id`);
 
 ALTER TABLE `pages`
   ADD PRIMARY KEY (`id`),
@@ -83,6 +136,9 @@ ALTER TABLE `pages`
 
 ALTER TABLE `settings`
   ADD PRIMARY KEY (`key`);
+
+ALTER TABLE `config_revision`
+  ADD PRIMARY KEY (`id`);
 COMMIT;
 
 ALTER TABLE `buttons`
@@ -90,4 +146,7 @@ ALTER TABLE `buttons`
 
 ALTER TABLE `pages`
   MODIFY `id` int(11) NOT NULL AUTO_INCREMENT, AUTO_INCREMENT=6;
+
+ALTER TABLE `button_pages`
+  ADD CONSTRAINT `button_pages_button` FOREIGN KEY (`button_id`) REFERENCES `buttons` (`id`) ON DELETE CASCADE;
 COMMIT;
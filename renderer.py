@@ -1,76 +1,442 @@
+import argparse
 import asyncio
+import concurrent.futures
+import functools
 import hashlib
 import json
+import logging
 import os
-import tempfile
-import urllib.request
-import ast
-import inspect
 import re
-from typing import List, Tuple, Optional, Dict
+import sys
+import time
+from collections import OrderedDict
+from typing import List, Tuple, Optional, Dict, FrozenSet, NamedTuple
+
+# Taken before the Qt imports so --boot-timeline can account for them
+BOOT_STARTED = time.perf_counter()
 
-import aiomysql
-import pyautogui
 from dotenv import load_dotenv
 from PySide6.QtWidgets import QMainWindow, QWidget, QPushButton, QApplication, QLabel
-from PySide6.QtWebEngineWidgets import QWebEngineView
-from PySide6.QtGui import QPixmap, QKeySequence, QShortcut, QCursor
-from PySide6.QtCore import Qt, QTimer, QUrl
-
-from actions import load_actions, action_handlers
+from PySide6.QtGui import QPixmap, QPixmapCache, QImage, QIcon, QColor, QPalette, QKeySequence, QShortcut, QCursor
+from PySide6.QtCore import Qt, QTimer, QThread, Signal
+from PySide6.QtNetwork import QHostAddress, QUdpSocket
+
+from actions import (
+    ActionError, ActionExecutor, available_actions, compile_action, import_action_module, load_actions,
+    module_import_times
+)
+from deck_logging import configure_logging
+from deck_settings import DeckSettings
+from image_cache import ImageCache, is_remote
+from metrics import MetricsExporter, counter, histogram
+from notify import notify_address, parse_change
+from offline_store import OfflineStore
+from web_pool import WebViewPool
 
 # Load environment variables
 load_dotenv()
 
-async def load_settings(show_error=None, parent=None):
+log = logging.getLogger("renderer")
+
+DB_QUERY_SECONDS = histogram('deckmaster_db_query_seconds', "Renderer database query time", ('query',))
+DB_QUERY_ERRORS = counter('deckmaster_db_query_errors_total', "Renderer database queries that failed", ('query',))
+POLL_SECONDS = histogram('deckmaster_poll_seconds', "Time taken by one background refresh of the current page",
+                         ('result',))
+STAGE_SECONDS = histogram('deckmaster_stage_seconds', "Time spent fetching, diffing and rendering pages and "
+                          "dispatching presses", ('stage',))
+BUTTON_UPDATES = counter('deckmaster_button_updates_total', "Deck buttons created, patched or released", ('change',))
+PAGE_SWITCHES = counter('deckmaster_page_switches_total', "Page switches drawn from the snapshot cache or fetched",
+                        ('source',))
+CHANGE_NOTIFICATIONS = counter('deckmaster_change_notifications_total', "Change notifications received")
+
+# Series on hot paths, looked up once
+FETCH_SECONDS = STAGE_SECONDS.labels('fetch')
+DIFF_SECONDS = STAGE_SECONDS.labels('diff')
+RENDER_SECONDS = STAGE_SECONDS.labels('render')
+DISPATCH_SECONDS = STAGE_SECONDS.labels('dispatch')
+BUTTONS_CREATED = BUTTON_UPDATES.labels('created')
+BUTTONS_PATCHED = BUTTON_UPDATES.labels('patched')
+BUTTONS_RELEASED = BUTTON_UPDATES.labels('released')
+
+DB_CONNECTION_LOST_ERRORS = (2003, 2006, 2013, 2055)
+DB_NO_SUCH_TABLE = 1146
+
+# Hidden QPushButtons kept around for reuse when buttons come and go
+BUTTON_POOL_SIZE = 32
+
+SWITCH_PAGE_TARGET = re.compile(r'switch_page:\s*["\']?(\w+)')
+
+# Entity states that light up a button bound with ``state_entity``
+ACTIVE_ENTITY_STATES = frozenset({'on', 'open', 'playing', 'home', 'unlocked'})
+
+
+def button_style_name(color_bg: str, color_fg: str) -> str:
+    return "s" + hashlib.md5(f"{color_bg}|{color_fg}".encode('utf-8')).hexdigest()[:12]
+
+
+@functools.lru_cache(maxsize=1024)
+def button_style_rule(color_bg: str, color_fg: str, active_bg: str) -> str:
+    selector = f'QPushButton[deckStyle="{button_style_name(color_bg, color_fg)}"]'
+    return (
+        f"{selector} {{ background-color: {color_bg}; color: {color_fg}; font: bold 10px Arial; border: 2px solid {color_fg}; border-radius: 4px; }}\n"
+        f"{selector}:pressed {{ background-color: {active_bg}; }}\n"
+    )
+
+
+def current_rss_kb() -> int:
     try:
-        conn = await aiomysql.connect(
-            host=os.getenv('DB_HOST'),
-            user=os.getenv('DB_USER'),
-            password=os.getenv('DB_PASS'),
-            db=os.getenv('DB_NAME')
-        )
-        async with conn.cursor() as cur:
-            await cur.execute("SELECT `key`, `value` FROM settings")
-            rows = await cur.fetchall()
-            settings = {k: v for k, v in rows}
-        conn.close()
-        return settings
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        import resource  # Unix only
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # peak, not current, off Linux
+    return peak // 1024 if sys.platform == 'darwin' else peak  # bytes on macOS, KB elsewhere
+
+
+class BootTimeline:
+    """Startup milestones with elapsed time and resident memory, for ``--boot-timeline``."""
+
+    def __init__(self):
+        self.enabled = False
+        self.reported = False
+        self.marks: List[Tuple[str, float, int]] = []
+
+    def mark(self, label: str) -> None:
+        if self.enabled and not self.reported:
+            self.marks.append((label, time.perf_counter() - BOOT_STARTED, current_rss_kb()))
+
+    def report(self) -> None:
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        print(f"{'boot step':<28}{'at ms':>9}{'+ms':>9}{'RSS MB':>9}{'+MB':>8}")
+        previous_time, previous_rss = 0.0, 0
+        for label, at, rss in self.marks:
+            print(f"{label:<28}{at * 1000:>9.1f}{(at - previous_time) * 1000:>9.1f}"
+                  f"{rss / 1024:>9.1f}{(rss - previous_rss) / 1024:>8.1f}")
+            previous_time, previous_rss = at, rss
+
+
+boot_timeline = BootTimeline()
+
+
+class PageSnapshot(NamedTuple):
+    """Everything needed to draw one page, as of config ``revision``."""
+    page: int
+    revision: Optional[int]
+    page_data: Optional[Dict]
+    buttons: Optional[List[Dict]]
+    images: Dict[str, Tuple[str, QImage]]  # image_path -> (cache key, pre-scaled image)
+
+
+class DeckDatabase:
+    """Bounded aiomysql pool shared by every renderer query.
+
+    The pool is created lazily on the renderer's event loop. When MySQL goes
+    away the pool is dropped and recreated on a later call, with exponential
+    backoff between attempts so a restarting server is not hammered.
+    """
+
+    def __init__(self):
+        self.pool = None
+        self.min_size = int(os.getenv('DB_POOL_MIN_SIZE', 1))
+        self.max_size = int(os.getenv('DB_POOL_MAX_SIZE', 4))
+        self.recycle = int(os.getenv('DB_POOL_RECYCLE', 300))
+        self.connect_timeout = int(os.getenv('DB_CONNECT_TIMEOUT', 5))
+        self.retry_min = float(os.getenv('DB_RETRY_MIN', 1))
+        self.retry_max = float(os.getenv('DB_RETRY_MAX', 30))
+        self._retry_delay = 0.0
+        self._next_attempt = 0.0
+        self._lock = None
+        self.failures = 0
+
+    async def get_pool(self):
+        if self.pool is not None:
+            return self.pool
+        import aiomysql
+
+        wait = self._next_attempt - time.monotonic()
+        if wait > 0:
+            raise ConnectionError(f"Database unavailable, retrying in {wait:.0f}s")
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self.pool is None:
+                try:
+                    self.pool = await aiomysql.create_pool(
+                        host=os.getenv('DB_HOST'),
+                        user=os.getenv('DB_USER'),
+                        password=os.getenv('DB_PASS'),
+                        db=os.getenv('DB_NAME'),
+                        minsize=self.min_size,
+                        maxsize=self.max_size,
+                        pool_recycle=self.recycle,
+                        connect_timeout=self.connect_timeout,
+                        autocommit=True
+                    )
+                    self._retry_delay = 0.0
+                    boot_timeline.mark("database pool")
+                except Exception:
+                    self._schedule_retry()
+                    raise
+        return self.pool
+
+    def _schedule_retry(self) -> None:
+        self._retry_delay = min(max(self._retry_delay * 2, self.retry_min), self.retry_max)
+        self._next_attempt = time.monotonic() + self._retry_delay
+
+    async def _drop_pool(self) -> None:
+        pool, self.pool = self.pool, None
+        self._schedule_retry()
+        if pool is not None:
+            pool.close()
+            await pool.wait_closed()
+
+    async def fetch(self, query: str, args=None, one: bool = False, dict_rows: bool = False, name: str = 'other'):
+        """Run ``query``; ``name`` labels its timing and failures in the metrics."""
+        with DB_QUERY_SECONDS.labels(name).time():
+            try:
+                return await self._fetch(query, args, one, dict_rows)
+            except Exception:
+                self.failures += 1
+                DB_QUERY_ERRORS.labels(name).inc()
+                raise
+
+    async def _fetch(self, query: str, args, one: bool, dict_rows: bool):
+        import aiomysql
+        pool = await self.get_pool()
+        cursor_class = aiomysql.DictCursor if dict_rows else aiomysql.Cursor
+        try:
+            async with pool.acquire() as conn:
+                async with conn.cursor(cursor_class) as cur:
+                    await cur.execute(query, args)
+                    if one:
+                        return await cur.fetchone()
+                    return await cur.fetchall()
+        except aiomysql.OperationalError as e:
+            if e.args and e.args[0] in DB_CONNECTION_LOST_ERRORS:
+                await self._drop_pool()
+            raise
+        except OSError:
+            await self._drop_pool()
+            raise
+
+    async def close(self) -> None:
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+
+
+class DataLoader(QThread):
+    """Runs the renderer's event loop so database work never blocks the GUI.
+
+    Coroutines are handed over with :meth:`submit`; results come back to the
+    GUI thread through Qt signals emitted by the coroutines themselves.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.loop = asyncio.new_event_loop()
+
+    def run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.wait()
+
+
+async def load_settings(db, show_error=None, parent=None):
+    try:
+        rows = await db.fetch("SELECT `key`, `value` FROM settings", name='settings')
+        return {k: v for k, v in rows}
     except Exception as e:
         if show_error:
             show_error(parent, f"Database connection failed: {e}")
         return {}
 
-def settings_get(settings, key, fallback):
-    val = settings.get(key, fallback)
-    if isinstance(fallback, int):
-        try:
-            return int(val)
-        except Exception:
-            return fallback
-    return val
-
 class DeckMasterApp(QMainWindow):
     """Main application class for DeckMaster Control Panel."""
 
-    def __init__(self):
+    # Emitted from the data loader thread, delivered on the GUI thread
+    page_loaded = Signal(int, object)
+    page_prefetched = Signal(object)
+    image_ready = Signal(str, str, object)
+    fetch_failed = Signal(str)
+    settings_loaded = Signal(object)
+    # Emitted from the action executor thread
+    gui_call = Signal(object)
+    action_finished = Signal(str, object)
+    # Emitted from the Home Assistant socket thread
+    entity_state_changed = Signal(str, object)
+
+    def __init__(self, db: Optional[DeckDatabase] = None):
         super().__init__()
         self.current_page = 1
-        self.created_buttons = []
-        self.web_browser = None
+        self.button_widgets: Dict[int, QPushButton] = {}
+        self.button_state: Dict[int, Dict] = {}
+        self.button_pool: List[QPushButton] = []
+        self.web_pool: Optional[WebViewPool] = None
         self.web_container = None
         self.current_page_data = None
         self.last_buttons_hash = None
         self.last_page_hash = None
+        self.revision_supported = True
+        self.loaded_state = None  # (page, config revision) currently on screen
+        self.fetch_serial = 0
+        self.pending_fetch = None
+        self.pending_page = None
+        self.refresh_queued = False
+        self.displayed_page = None
+        self.page_cache: "OrderedDict[int, PageSnapshot]" = OrderedDict()
+        self.pending_prefetch = None
+        self.snapshot_images: Dict[str, Tuple[str, QImage]] = {}
+        self.image_keys: Dict[str, str] = {}
+        self.placeholder_pixmap = None
+        self.style_pairs: Dict[Tuple[str, str], None] = {}
+        self.entity_states: Dict[str, Optional[str]] = {}
+        self.home_assistant = None
+        self.entity_binding_checked = False
+        self.reported_imports = set()
+        self.nav_buttons: List[QPushButton] = []
+        self.first_frame_shown = False
+        self.pending_sync = None
+        self.synced_revision = None
+        self.settings_revision = None  # config revision the settings were loaded at
+
+        self.page_loaded.connect(self._on_page_loaded)
+        self.page_prefetched.connect(self._cache_snapshot)
+        self.image_ready.connect(self._on_image_ready)
+        self.gui_call.connect(self._run_gui_call)
+        self.action_finished.connect(self._on_action_finished)
+        self.entity_state_changed.connect(self._on_entity_state_changed)
+        self.fetch_failed.connect(lambda message: self.show_error_feedback(self, message))
+        self.settings_loaded.connect(self._on_settings_loaded)
+
+        # One event loop and connection pool for the lifetime of the renderer,
+        # both living on a background thread. The benchmarks pass in a fake ``db``
+        self.db = db if db is not None else DeckDatabase()
+        self.data_loader = DataLoader(self)
+        self.data_loader.start()
+
+        # Boot from the snapshot saved by the last run; the first fetch
+        # refreshes it in the background. Only a first boot waits for MySQL
+        self.offline_store = OfflineStore(os.getenv('OFFLINE_SNAPSHOT'))
+        saved_settings = self.offline_store.settings()
+        if saved_settings is not None:
+            self.settings = DeckSettings(saved_settings)
+            boot_timeline.mark("settings (offline snapshot)")
+        else:
+            settings = self.data_loader.submit(
+                load_settings(self.db, lambda parent, message: self.fetch_failed.emit(message))
+            ).result()
+            if settings:
+                self.offline_store.save_settings(settings)
+            self.settings = DeckSettings(settings)
+            boot_timeline.mark("settings (database)")
+
+        self.image_cache = ImageCache(
+            os.getenv('IMAGE_CACHE_DIR'),
+            self.settings.image_revalidate_interval
+        )
+        QPixmapCache.setCacheLimit(self.settings.image_memory_cache_kb)
 
-        # Synchronously load settings at startup, show error if DB fails
-        self.settings = asyncio.run(load_settings(self.show_error_feedback, self))
-
-        # Disable PyAutoGUI failsafe
-        pyautogui.FAILSAFE = False
+        self.action_executor = ActionExecutor(self.gui_call.emit, self.action_finished.emit)
+        self.action_executor.start()
 
         self._load_action_handlers()
+        boot_timeline.mark("actions indexed")
         self._setup_ui()
+        boot_timeline.mark("window built")
+
+    async def _refresh_settings(self, revision: Optional[int]) -> None:
+        settings = await load_settings(self.db, lambda parent, message: self.fetch_failed.emit(message))
+        if settings:
+            self.settings_revision = revision
+            self.settings_loaded.emit(settings)
+
+    def _on_settings_loaded(self, raw: Dict) -> None:
+        if raw == self.settings.raw:
+            return
+        self.offline_store.save_settings(raw)
+        settings = DeckSettings(raw)
+        changed = self.settings.changed(settings)
+        self.settings = settings
+        if changed:
+            self._apply_settings(changed)
+
+    def _apply_settings(self, changed: FrozenSet[str]) -> None:
+        """Redo the layout, styling and caching that depend on the ``changed`` settings."""
+        log.info("Settings changed: %s", ", ".join(sorted(changed)))
+
+        def any_changed(*keys):
+            return not changed.isdisjoint(keys)
+
+        resized = any_changed('BUTTON_WIDTH', 'BUTTON_HEIGHT')
+        moved = resized or any_changed('OFFSET_X', 'OFFSET_BUTTON_V')
+
+        if 'IMAGE_REVALIDATE_INTERVAL' in changed:
+            self.image_cache.revalidate_after = self.settings.image_revalidate_interval
+        if 'IMAGE_MEMORY_CACHE_KB' in changed:
+            QPixmapCache.setCacheLimit(self.settings.image_memory_cache_kb)
+        if resized:
+            # Scaled images and snapshots are for the old button size
+            self.image_keys.clear()
+            self.snapshot_images = {}
+            self.page_cache.clear()
+            self.placeholder_pixmap = None
+        elif 'PAGE_CACHE_SIZE' in changed:
+            while len(self.page_cache) > self.settings.page_cache_size:
+                self.page_cache.popitem(last=False)
+
+        if 'BG_COLOR' in changed:
+            self._update_page_ui(self.current_page_data)
+        if any_changed('BUTTON_ACTIVE_BG', 'NAV_BUTTON_BG'):
+            self._apply_deck_stylesheet()
+        if moved or any_changed('NAV_Y', 'NAV_LEFT_X', 'NAV_RIGHT_X'):
+            self._layout_navigation_buttons()
+        if any_changed('WEB_HEIGHT', 'BG_COLOR'):
+            self._layout_web_browser()
+        if self.web_pool and any_changed('WEB_POOL_SIZE', 'WEB_POOL_MEMORY_MB'):
+            self.web_pool.configure(self.settings.web_pool_size, self.settings.web_pool_memory_mb)
+
+        # Patch only what depends on the changed settings by making that part
+        # of the previous view look stale
+        stale = {}
+        if moved:
+            stale['pos_x'] = None
+        if resized:
+            stale['image_path'] = stale['label'] = None
+        recolor = any_changed('STATE_ON_BG', 'BUTTON_ACTIVE_BG')
+        for button_id, data in self.button_state.items():
+            forced = dict(stale, color_bg=None) if recolor and data.get('state_entity') else stale
+            if forced:
+                view = self._bind_state(data)
+                self._patch_button(self.button_widgets[button_id], dict(view, **forced), view)
+
+        if hasattr(self, "timer") and any_changed('POLL_FALLBACK_INTERVAL', 'UPDATE_INTERVAL'):
+            self.timer.setInterval(
+                self.settings.poll_fallback_interval if self.change_socket
+                else self.settings.update_interval
+            )
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_frame_shown:
+            self.first_frame_shown = True
+            boot_timeline.mark("first frame")
 
     def _setup_error_banner(self):
         self.error_banner = QLabel(self)
@@ -85,10 +451,7 @@ class DeckMasterApp(QMainWindow):
     def resizeEvent(self, event):
         if hasattr(self, "error_banner"):
             self.error_banner.setGeometry(0, 0, self.width(), 60)
-        if self.web_container and self.web_browser:
-            width = self.width()
-            self.web_container.setGeometry(0, 0, width, settings_get(self.settings, 'WEB_HEIGHT', 300))
-            self.web_browser.setGeometry(0, 0, width, settings_get(self.settings, 'WEB_HEIGHT', 300))
+        self._layout_web_browser()
         super().resizeEvent(event)
 
     def show_error_feedback(self, widget, message):
@@ -96,281 +459,456 @@ class DeckMasterApp(QMainWindow):
             self.error_banner.setText(message)
             self.error_banner.show()
             self.error_banner.raise_()
-            QTimer.singleShot(settings_get(self.settings, 'ERROR_BANNER_TIMEOUT', 5000), self.error_banner.hide)
+            QTimer.singleShot(self.settings.error_banner_timeout, self.error_banner.hide)
         else:
             from PySide6.QtWidgets import QToolTip
             QToolTip.showText(self.mapToGlobal(self.rect().center()), message, self)
-            QTimer.singleShot(settings_get(self.settings, 'ERROR_BANNER_TIMEOUT', 5000), QToolTip.hideText)
+            QTimer.singleShot(self.settings.error_banner_timeout, QToolTip.hideText)
 
     def _load_action_handlers(self) -> None:
         try:
             load_actions()
-            print("Actions loaded successfully")
-            print(f"Available action handlers: {list(action_handlers.keys())}")
+            log.info("Available action handlers: %s", available_actions())
+            self._report_action_imports()
         except Exception as e:
-            print(f"Error loading actions: {e}")
+            log.error("Error loading actions: %s", e)
             self.show_error_feedback(self, f"Error loading actions: {e}")
 
-    def smart_split_params(self, param_str):
-        pattern = r'''
-            "[^"]*"          |   # double quoted string
-            '[^']*'          |   # single quoted string
-            \[[^\[\]]*\]     |   # bracketed list (no nested brackets)
-            [^,\s][^,]*          # unquoted token (no comma or whitespace at start)
-        '''
-        
-        matches = re.findall(pattern, param_str, re.VERBOSE)
-        return [m.strip() for m in matches if m.strip()]
+    def _setup_entity_states(self) -> None:
+        """Follow Home Assistant entity states for buttons with a ``state_entity``.
+
+        Only available with the WebSocket transport; over REST bound buttons
+        keep their configured look. Runs when the first bound button shows up,
+        so decks that don't use it never load the Home Assistant plugin.
+        """
+        self.entity_binding_checked = True
+        try:
+            self.home_assistant = import_action_module('actions.homeassisant').get_home_assistant()
+        except Exception as e:
+            log.warning("Home Assistant state binding unavailable: %s", e)
+            return
+        if self.home_assistant is None:
+            return
+        self.home_assistant.add_listener(self.entity_state_changed.emit)
+        for entity_id, state in list(self.home_assistant.states.items()):
+            self.entity_states[entity_id] = state.get('state')
+
+    def _bind_state(self, data: Dict) -> Dict:
+        """Return how ``data`` looks given the current state of its bound entity.
+
+        ``{state}`` in the label is replaced by the entity's state, and the
+        background switches to ``STATE_ON_BG`` while the entity is on.
+        """
+        entity_id = data.get('state_entity')
+        if not entity_id:
+            return data
+        state = self.entity_states.get(entity_id)
+        view = dict(data)
+        if '{state}' in view['label']:
+            view['label'] = view['label'].replace('{state}', state if state is not None else '?')
+        if state in ACTIVE_ENTITY_STATES:
+            view['color_bg'] = self.settings.state_on_bg or self.settings.button_active_bg
+        return view
+
+    def _on_entity_state_changed(self, entity_id: str, state: Optional[Dict]) -> None:
+        value = state.get('state') if state else None
+        if self.entity_states.get(entity_id) == value:
+            return
+        bound = [
+            (button_id, data) for button_id, data in self.button_state.items()
+            if data.get('state_entity') == entity_id
+        ]
+        old_views = [self._bind_state(data) for _, data in bound]
+        self.entity_states[entity_id] = value
+        for (button_id, data), old_view in zip(bound, old_views):
+            self._patch_button(self.button_widgets[button_id], old_view, self._bind_state(data))
 
     def execute_action(self, action: str) -> None:
+        """Queue ``action`` on the action executor and return immediately."""
         if not action:
-            print("No action defined")
+            log.debug("No action defined")
             return
 
-        actions = [a.strip() for a in action.split('&&') if a.strip()]
-        for act in actions:
-            if ':' in act:
-                command, param_str = act.split(':', 1)
-            else:
-                command, param_str = act, None
-
-            handler = action_handlers.get(command)
-            if not handler:
-                print(f"No handler for action '{command}'")
-                self.show_error_feedback(self, f"No handler for action '{command}'")
-                continue
-
-        try:
-            params = []
-            if param_str:
-                param_tokens = self.smart_split_params(param_str)
-                print(f"Param tokens after smart_split_params: {param_tokens}")  # DEBUG
-
-                for token in param_tokens:
-                    token = token.strip()
-                    try:
-                        val = ast.literal_eval(token)
-                    except Exception:
-                        val = token
-                    params.append(val)
-
-            print(f"Final params to pass: {params}")  # DEBUG
-
-            sig = inspect.signature(handler)
-            param_names = list(sig.parameters.keys())
-            num_params = len(param_names)
-            print(f"Handler {command} expects {num_params} params: {param_names}")  # DEBUG
-
-            if num_params == 0:
-                handler()
-            elif num_params == 1:
-                arg = params[0] if params else None
-                # Convert int param to string here
-                if isinstance(arg, int):
-                    arg = str(arg)
-                handler(arg)
-            else:
-                # If multiple params, convert first param to string if needed
-                if params and isinstance(params[0], int):
-                    params[0] = str(params[0])
-                if param_names[-1] in ('app_instance', 'self'):
-                    handler(*params, self)
-                else:
-                    handler(*params)
-
-
-        except Exception as e:
-            print(f"Error executing action {command}: {e}")
-            self.show_error_feedback(self, f"Error executing action {command}: {e}")
-
+        with DISPATCH_SECONDS.time():
+            try:
+                plan = compile_action(action)
+            except ActionError as e:
+                log.warning("%s", e, extra={'action': action})
+                self.show_error_feedback(self, str(e))
+                return
+
+            self.action_executor.submit(action, plan, self)
+
+    def _run_gui_call(self, call) -> None:
+        call()
+
+    def _on_action_finished(self, action: str, error: Optional[BaseException]) -> None:
+        if error is None:
+            log.debug("Action finished", extra={'action': action})
+        elif isinstance(error, asyncio.CancelledError):
+            log.info("Action cancelled", extra={'action': action})
+        else:
+            log.warning("Error executing action %s: %s", action, error, extra={'action': action})
+            self.show_error_feedback(self, f"Error executing action {action}: {error}")
+
+    def _report_action_imports(self) -> None:
+        for module_name, seconds in list(module_import_times.items()):
+            if module_name not in self.reported_imports:
+                self.reported_imports.add(module_name)
+                log.info("Loaded %s in %.1f ms", module_name, seconds * 1000)  # once per plugin
+
+    def _check_actions(self, buttons_data: List[Dict]) -> None:
+        """Compile every action on the page so mistakes show up before a press.
+
+        This is also what imports the plugins the page needs.
+        """
+        problems = []
+        for data in buttons_data:
+            if data.get('action'):
+                try:
+                    compile_action(data['action'])
+                except ActionError as e:
+                    problems.append(f"{data['label']}: {e}")
+        self._report_action_imports()
+        if problems:
+            log.warning("Invalid button actions: %s", problems)
+            self.show_error_feedback(self, f"Invalid action on {problems[0]}"
+                                     + (f" (+{len(problems) - 1} more)" if len(problems) > 1 else ""))
 
     def _setup_ui(self) -> None:
         self.setWindowTitle("DeckMaster Control Panel")
         self.showFullScreen()
-        self.setStyleSheet(
-            f"QMainWindow {{ background-color: {settings_get(self.settings, 'BG_COLOR', '#1e1e1e')}; }}"
-        )
+        self._set_background(self.settings.bg_color)
         self.setCursor(QCursor(Qt.BlankCursor))  # Hide cursor
 
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
+        self._apply_deck_stylesheet()
 
         self._setup_error_banner()
         self._setup_web_browser()
         self._setup_keyboard_shortcuts()
         self.add_navigation_buttons()
 
+        # With push notifications the timer is only a slow safety net
         self.timer = QTimer()
         self.timer.timeout.connect(self._asyncio_fetch_and_update)
-        self.timer.start(settings_get(self.settings, 'UPDATE_INTERVAL', 500))
+        if self._setup_change_listener():
+            self.timer.start(self.settings.poll_fallback_interval)
+        else:
+            self.timer.start(self.settings.update_interval)
+        self._show_offline_page()
+        QTimer.singleShot(0, self._asyncio_fetch_and_update)
+
+    def _setup_change_listener(self) -> bool:
+        group, port = notify_address()
+        self.change_socket = QUdpSocket(self)
+        bound = self.change_socket.bind(
+            QHostAddress(QHostAddress.AnyIPv4), port,
+            QUdpSocket.ShareAddress | QUdpSocket.ReuseAddressHint
+        )
+        if not bound:
+            log.warning("Change notifications unavailable on port %s: %s", port, self.change_socket.errorString())
+            self.change_socket = None
+            return False
+
+        group_address = QHostAddress(group)
+        if group_address.isMulticast() and not self.change_socket.joinMulticastGroup(group_address):
+            log.warning("Could not join notification group %s: %s", group, self.change_socket.errorString())
+            self.change_socket.close()
+            self.change_socket = None
+            return False
+
+        self.change_socket.readyRead.connect(self._on_change_notification)
+        log.info("Listening for change notifications on %s:%s", group, port)
+        return True
+
+    def _on_change_notification(self) -> None:
+        refresh = False
+        while self.change_socket.hasPendingDatagrams():
+            change = parse_change(bytes(self.change_socket.receiveDatagram().data()))
+            if change is None:
+                continue
+            CHANGE_NOTIFICATIONS.inc()
+            pages = change.get('pages')
+            revision = change.get('revision')
+            if pages is None or self.current_page in pages:
+                refresh = True
+            elif (isinstance(revision, int) and self.loaded_state
+                    and self.loaded_state == (self.current_page, revision - 1)):
+                # Another page changed and nothing was missed in between
+                self.loaded_state = (self.current_page, revision)
+            if isinstance(revision, int):
+                self._invalidate_page_cache(revision, pages)
+                self.offline_store.advance(revision, pages)
+
+        if refresh:
+            self._asyncio_fetch_and_update()
 
     def _setup_web_browser(self) -> None:
-        try:
-            self.web_container = QWidget(self.central_widget)
-            web_height = settings_get(self.settings, 'WEB_HEIGHT', 300)
-            self.web_container.setFixedHeight(web_height)
-            self.web_container.setStyleSheet(
-                f"background-color: {settings_get(self.settings, 'BG_COLOR', '#1e1e1e')};"
-            )
-            width = self.width()
-            self.web_container.setGeometry(0, 0, width, web_height)
-            self.web_container.lower()
-
-            self.web_browser = QWebEngineView(self.web_container)
-            self.web_browser.setGeometry(0, 0, width, web_height)
-
-            self.web_container.hide()
-            print("Web browser embedded successfully")
-        except Exception as e:
-            print(f"Error setting up web browser: {e}")
-            self.web_browser = None
-            self.web_container = None
-            self.show_error_feedback(self, f"Error setting up web browser: {e}")
+        """Create the (empty) web area; browser views are made on first use."""
+        self.web_container = QWidget(self.central_widget)
+        self.web_container.lower()
+        self.web_container.hide()
+        self._layout_web_browser()
+
+    def _layout_web_browser(self) -> None:
+        if not self.web_container:
+            return
+        width = self.width()
+        web_height = self.settings.web_height
+        self.web_container.setFixedHeight(web_height)
+        self.web_container.setStyleSheet(
+            f"background-color: {self.settings.bg_color};"
+        )
+        self.web_container.setGeometry(0, 0, width, web_height)
+        if self.web_pool:
+            self.web_pool.set_geometry(width, web_height)
 
     def _update_webpage_display(self, page_data: Optional[Dict]) -> None:
-        if not self.web_browser or not self.web_container:
+        if not self.web_container:
             return
         try:
             if page_data and page_data.get('show_webpage') and page_data.get('webpage_url'):
+                if self.web_pool is None:
+                    self.web_pool = WebViewPool(
+                        self.web_container,
+                        self.settings.web_pool_size,
+                        self.settings.web_pool_memory_mb
+                    )
+                new_url = page_data['webpage_url']
+                try:
+                    self.web_pool.show(new_url)
+                    boot_timeline.mark("web engine")
+                except Exception as e:
+                    log.error("Error loading webpage %s: %s", new_url, e)
+                    self.show_error_feedback(self, f"Error loading webpage {new_url}: {e}")
+                    return
                 if not self.web_container.isVisible():
                     self.web_container.show()
                     self.web_container.raise_()
-
-                current_url = self.web_browser.url().toString()
-                new_url = page_data['webpage_url']
-                if current_url != new_url:
-                    try:
-                        self.web_browser.setUrl(QUrl(new_url))
-                        print(f"Loaded webpage: {new_url}")
-                    except Exception as e:
-                        print(f"Error loading webpage {new_url}: {e}")
-                        self.show_error_feedback(self, f"Error loading webpage {new_url}: {e}")
             else:
                 if self.web_container.isVisible():
                     self.web_container.hide()
-                    print("Webpage hidden for current page")
+                    if self.web_pool:
+                        self.web_pool.hide()
+                    log.debug("Webpage hidden for current page")
         except Exception as e:
-            print(f"Error in webpage display: {e}")
+            log.exception("Error in webpage display: %s", e)
             self.show_error_feedback(self, f"Error in webpage display: {e}")
 
-    def _create_button_click_handler(self, label: str, action: Optional[str]):
-        def on_button_click():
-            if action:
-                print(f"Executing action for button '{label}': {action}")
-                self.execute_action(action)
-            else:
-                print(f"Button '{label}' clicked but no action defined")
-            pyautogui.moveTo(
-                settings_get(self.settings, 'CURSOR_PARK_X', 1900),
-                settings_get(self.settings, 'CURSOR_PARK_Y', 1060)
-            )
-        return on_button_click
+    def _on_deck_button_clicked(self) -> None:
+        button = self.sender()
+        label = button.property("deck_label")
+        action = button.property("deck_action")
+        if action:
+            log.debug("Executing action for button", extra={'button': label, 'action': action})
+            self.execute_action(action)
+        else:
+            log.debug("Button clicked but no action defined", extra={'button': label})
+        self._park_cursor()
+
+    def _park_cursor(self) -> None:
+        # Keep the (hidden) pointer away from the buttons after a touch
+        QCursor.setPos(
+            self.settings.cursor_park_x,
+            self.settings.cursor_park_y
+        )
+
+    def _image_size(self) -> Tuple[int, int]:
+        return (
+            self.settings.button_width,
+            self.settings.button_height
+        )
 
     def _load_image(self, image_path: str) -> Optional[QPixmap]:
+        """Return a pre-scaled pixmap for ``image_path`` without blocking on the network.
+
+        Remote images that have not been downloaded yet get a placeholder and
+        are fetched in the background; the button is patched when they arrive.
+        """
         if not image_path:
             return None
+
+        key = self.image_keys.get(image_path)
+        pixmap = QPixmapCache.find(key) if key else None
+        if pixmap is not None:
+            return pixmap
+
+        loaded = self.snapshot_images.get(image_path)
         try:
-            if image_path.startswith(("http://", "https://")):
-                tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-                urllib.request.urlretrieve(image_path, tmp_file.name)
-                pixmap = QPixmap(tmp_file.name)
-                os.unlink(tmp_file.name)
-                return pixmap
-            elif os.path.isfile(image_path):
-                return QPixmap(image_path)
+            if loaded is None and not is_remote(image_path):
+                loaded = self.image_cache.load(image_path, self._image_size())
         except Exception as e:
-            print(f"Failed to load image '{image_path}': {e}")
+            log.warning("Failed to load image '%s': %s", image_path, e)
             self.show_error_feedback(self, f"Failed to load image '{image_path}': {e}")
+
+        if loaded is not None:
+            key, image = loaded
+            pixmap = QPixmap.fromImage(image)
+            QPixmapCache.insert(key, pixmap)
+            self.image_keys[image_path] = key
+            return pixmap
+
+        if is_remote(image_path):
+            self.data_loader.submit(self._refresh_images([image_path], self._image_size(), True))
+            return self._placeholder()
         return None
 
+    def _placeholder(self) -> QPixmap:
+        if self.placeholder_pixmap is None:
+            width, height = self._image_size()
+            self.placeholder_pixmap = QPixmap(width // 2, height // 2)
+            self.placeholder_pixmap.fill(QColor(255, 255, 255, 40))
+        return self.placeholder_pixmap
+
+    def _on_image_ready(self, image_path: str, key: str, image: QImage) -> None:
+        QPixmapCache.insert(key, QPixmap.fromImage(image))
+        self.image_keys[image_path] = key
+        for button_id, state in self.button_state.items():
+            if state.get('image_path') == image_path:
+                view = self._bind_state(state)
+                self._patch_button(self.button_widgets[button_id], dict(view, image_path=None), view)
+
     def create_button(self, label: str, x: int, y: int, bg: str, fg: str,
-                     action: Optional[str] = None, image_path: Optional[str] = None) -> QPushButton:
+                     action: Optional[str] = None, image_path: Optional[str] = None,
+                     state_entity: Optional[str] = None) -> QPushButton:
+        button = self._acquire_button()
+        self._patch_button(button, None, self._bind_state({
+            'label': label, 'pos_x': x, 'pos_y': y, 'color_bg': bg, 'color_fg': fg,
+            'action': action, 'image_path': image_path, 'state_entity': state_entity
+        }))
+        return button
+
+    def _acquire_button(self) -> QPushButton:
+        if self.button_pool:
+            return self.button_pool.pop()
         button = QPushButton(self.central_widget)
-        click_handler = self._create_button_click_handler(label, action)
-        button.clicked.connect(click_handler)
-
-        pixmap = self._load_image(image_path)
-        button_width = settings_get(self.settings, 'BUTTON_WIDTH', 121)
-        button_height = settings_get(self.settings, 'BUTTON_HEIGHT', 128)
-        offset_x = settings_get(self.settings, 'OFFSET_X', 20)
-        offset_v = settings_get(self.settings, 'OFFSET_BUTTON_V', 7)
-        btn_active_bg = settings_get(self.settings, 'BUTTON_ACTIVE_BG', '#007acc')
-
-        if pixmap:
-            button.setIcon(pixmap)
-            button.setIconSize(pixmap.size().scaled(button_width, button_height, Qt.KeepAspectRatio))
-            button.setStyleSheet(
-                f"QPushButton {{ background-color: {bg}; border: 2px solid {fg}; border-radius: 4px; }}"
-                f"QPushButton:pressed {{ background-color: {btn_active_bg}; }}"
-            )
-        else:
-            button.setText(label)
-            button.setStyleSheet(
-                f"QPushButton {{ background-color: {bg}; color: {fg}; font: bold 10px Arial; border: 2px solid {fg}; border-radius: 4px; }}"
-                f"QPushButton:pressed {{ background-color: {btn_active_bg}; }}"
-            )
+        button.clicked.connect(self._on_deck_button_clicked)
+        return button
 
-        button.setGeometry(
-            x + offset_x,
-            y + offset_v,
-            button_width,
-            button_height
+    def _release_button(self, button: QPushButton) -> None:
+        button.hide()
+        if len(self.button_pool) < BUTTON_POOL_SIZE:
+            button.setProperty("deck_action", None)
+            self.button_pool.append(button)
+        else:
+            button.deleteLater()
+
+    def _register_button_styles(self, buttons_data: List[Dict]) -> None:
+        new_pairs = [
+            pair for pair in ((b['color_bg'], b['color_fg']) for b in buttons_data)
+            if pair not in self.style_pairs
+        ]
+        if new_pairs:
+            self.style_pairs.update(dict.fromkeys(new_pairs))
+            self._apply_deck_stylesheet()
+
+    def _apply_deck_stylesheet(self) -> None:
+        """Install the one stylesheet shared by every deck button.
+
+        Buttons pick their colours through the ``deckStyle`` dynamic property,
+        so patching a button never parses CSS. The sheet only changes (and Qt
+        only re-polishes the deck) when a new colour pair or theme shows up.
+        """
+        active_bg = self.settings.button_active_bg
+        nav_bg = self.settings.nav_button_bg
+        sheet = (
+            f'QPushButton[deckRole="nav"] {{ background-color: {nav_bg}; border: none; }}\n'
+            f'QPushButton[deckRole="nav"]:pressed {{ background-color: {active_bg}; }}\n'
         )
-        return button
+        sheet += "".join(button_style_rule(bg, fg, active_bg) for bg, fg in self.style_pairs)
+        self.central_widget.setStyleSheet(sheet)
+
+    def _set_background(self, color: str) -> None:
+        # A palette change doesn't re-polish every child like a window stylesheet does
+        palette = self.palette()
+        palette.setColor(QPalette.Window, QColor(color))
+        self.setPalette(palette)
+
+    def _patch_button(self, button: QPushButton, old: Optional[Dict], new: Dict) -> None:
+        """Bring ``button`` from showing ``old`` to showing ``new``.
+
+        Only the parts that differ are touched; ``old=None`` applies everything.
+        """
+        def changed(*keys):
+            return old is None or any(old.get(k) != new.get(k) for k in keys)
+
+        button_width = self.settings.button_width
+        button_height = self.settings.button_height
+
+        if changed('label', 'action'):
+            button.setProperty("deck_label", new['label'])
+            button.setProperty("deck_action", new.get('action'))
+
+        if changed('label', 'image_path'):
+            pixmap = self._load_image(new.get('image_path'))
+            if pixmap:
+                button.setText("")
+                button.setIcon(pixmap)
+                button.setIconSize(pixmap.size().scaled(button_width, button_height, Qt.KeepAspectRatio))
+            else:
+                button.setIcon(QIcon())
+                button.setText(new['label'])
+
+        if changed('color_bg', 'color_fg'):
+            self._register_button_styles([new])
+            button.setProperty("deckStyle", button_style_name(new['color_bg'], new['color_fg']))
+            button.style().unpolish(button)
+            button.style().polish(button)
+
+        if changed('pos_x', 'pos_y'):
+            button.setGeometry(
+                new['pos_x'] + self.settings.offset_x,
+                new['pos_y'] + self.settings.offset_button_v,
+                button_width,
+                button_height
+            )
 
     async def fetch_page_data(self, page: int = 1) -> Optional[Dict]:
         try:
-            conn = await aiomysql.connect(
-                host=os.getenv('DB_HOST'),
-                user=os.getenv('DB_USER'),
-                password=os.getenv('DB_PASS'),
-                db=os.getenv('DB_NAME')
-            )
-
-            async with conn.cursor(aiomysql.DictCursor) as cur:
-                await cur.execute("""
-                    SELECT page_number, webpage_url, show_webpage, background_color
-                    FROM pages 
-                    WHERE page_number = %s
-                """, (page,))
-                result = await cur.fetchone()
-
-            conn.close()
-            return result
+            return await self.db.fetch("""
+                SELECT page_number, webpage_url, show_webpage, background_color
+                FROM pages 
+                WHERE page_number = %s
+            """, (page,), one=True, dict_rows=True, name='page')
 
         except Exception as e:
-            print(f"Database error fetching page data: {e}")
-            self.show_error_feedback(self, f"Database error fetching page data: {e}")
+            log.error("Database error fetching page data: %s", e, extra={'page': page})
+            self.fetch_failed.emit(f"Database error fetching page data: {e}")
             return None
 
-    async def fetch_buttons(self, page: int = 1) -> List[Tuple]:
+    async def fetch_config_revision(self) -> Optional[int]:
+        import aiomysql
+        if not self.revision_supported:
+            return None
         try:
-            conn = await aiomysql.connect(
-                host=os.getenv('DB_HOST'),
-                user=os.getenv('DB_USER'),
-                password=os.getenv('DB_PASS'),
-                db=os.getenv('DB_NAME')
-            )
-
-            async with conn.cursor() as cur:
-                await cur.execute("""
-                    SELECT label, pos_x, pos_y, color_bg, color_fg, action, image_path, page
-                    FROM buttons
-                """)
-                result = await cur.fetchall()
-                filtered = []
-                for row in result:
-                    pages = row[-1].split(",")
-                    if str(page) in [p.strip() for p in pages]:
-                        filtered.append(row[:-1])
-                return filtered
+            row = await self.db.fetch("SELECT revision FROM config_revision WHERE id = 1", one=True, name='revision')
+            return row[0] if row else None
+        except aiomysql.ProgrammingError as e:
+            if e.args and e.args[0] == DB_NO_SUCH_TABLE:
+                log.warning("config_revision table not found, falling back to full polling")
+                self.revision_supported = False
+                return None
+            raise
+
+    async def fetch_buttons(self, page: int = 1) -> Optional[List[Dict]]:
+        try:
+            return list(await self.db.fetch("""
+                SELECT b.id, b.label, b.pos_x, b.pos_y, b.color_bg, b.color_fg, b.action, b.image_path,
+                       b.state_entity
+                FROM button_pages bp
+                JOIN buttons b ON b.id = bp.button_id
+                WHERE bp.page_number = %s
+                ORDER BY b.id
+            """, (page,), dict_rows=True, name='buttons'))
 
         except Exception as e:
-            print(f"Database error: {e}")
-            self.show_error_feedback(self, f"Database error fetching buttons: {e}")
-            return []
+            log.error("Database error fetching buttons: %s", e, extra={'page': page})
+            self.fetch_failed.emit(f"Database error fetching buttons: {e}")
+            return None
 
-    def _hash_buttons_data(self, buttons_data: List[Tuple]) -> str:
+    def _hash_buttons_data(self, buttons_data: List[Dict]) -> str:
         serialized = json.dumps(buttons_data, sort_keys=True)
         return hashlib.md5(serialized.encode('utf-8')).hexdigest()
 
@@ -378,73 +916,80 @@ class DeckMasterApp(QMainWindow):
         serialized = json.dumps(page_data or {}, sort_keys=True, default=str)
         return hashlib.md5(serialized.encode('utf-8')).hexdigest()
 
-    def update_buttons_if_changed(self, buttons_data: List[Tuple]) -> None:
-        new_hash = self._hash_buttons_data(buttons_data)
-
-        if new_hash != self.last_buttons_hash:
-            self.last_buttons_hash = new_hash
-
-            for btn in self.created_buttons:
-                btn.deleteLater()
-            self.created_buttons.clear()
-
-            for button_data in buttons_data:
-                btn = self._create_button_from_data(button_data)
-                if btn:
-                    self.created_buttons.append(btn)
-                    btn.show()
+    def update_buttons_if_changed(self, buttons_data: List[Dict]) -> None:
+        with DIFF_SECONDS.time():
+            new_hash = self._hash_buttons_data(buttons_data)
+        if new_hash == self.last_buttons_hash:
+            return
+        self.last_buttons_hash = new_hash
+
+        with RENDER_SECONDS.time():
+            self._reconcile_buttons(buttons_data)
+
+    def _reconcile_buttons(self, buttons_data: List[Dict]) -> None:
+        """Keep, patch or recycle the button widgets by id to show ``buttons_data``."""
+        if not self.entity_binding_checked and any(data.get('state_entity') for data in buttons_data):
+            self._setup_entity_states()
+
+        wanted = {data['id']: data for data in buttons_data}
+        self._register_button_styles(buttons_data)
+
+        released = [b for b in self.button_widgets if b not in wanted]
+        for button_id in released:
+            self._release_button(self.button_widgets.pop(button_id))
+            del self.button_state[button_id]
+
+        created = patched = 0
+        for button_id, data in wanted.items():
+            button = self.button_widgets.get(button_id)
+            if button is None:
+                button = self._acquire_button()
+                self._patch_button(button, None, self._bind_state(data))
+                self.button_widgets[button_id] = button
+                button.show()
+                created += 1
+            elif self.button_state[button_id] != data:
+                self._patch_button(button, self._bind_state(self.button_state[button_id]), self._bind_state(data))
+                patched += 1
+            self.button_state[button_id] = data
+
+        BUTTONS_CREATED.inc(created)
+        BUTTONS_PATCHED.inc(patched)
+        BUTTONS_RELEASED.inc(len(released))
+        self._check_actions(buttons_data)
 
     def update_page_if_changed(self, page_data: Optional[Dict]) -> None:
-        new_hash = self._hash_page_data(page_data)
+        with DIFF_SECONDS.time():
+            new_hash = self._hash_page_data(page_data)
 
         if new_hash != self.last_page_hash:
             self.last_page_hash = new_hash
             self.current_page_data = page_data
-            self._update_page_ui(page_data)
+            with RENDER_SECONDS.time():
+                self._update_page_ui(page_data)
 
     def _update_page_ui(self, page_data: Optional[Dict]) -> None:
         try:
             self._update_webpage_display(page_data)
             if page_data and page_data.get('background_color'):
-                self.setStyleSheet(f"QMainWindow {{ background-color: {page_data['background_color']}; }}")
+                self._set_background(page_data['background_color'])
             else:
-                self.setStyleSheet(f"QMainWindow {{ background-color: {self.settings.get('BG_COLOR', '#1e1e1e')}; }}")
+                self._set_background(self.settings.bg_color)
         except Exception as e:
-            print(f"Error updating page UI: {e}")
+            log.exception("Error updating page UI: %s", e)
             self.show_error_feedback(self, f"Error updating page UI: {e}")
 
-    def _create_button_from_data(self, button_data: Tuple) -> Optional[QPushButton]:
-        if len(button_data) >= 7:
-            label, x, y, bg, fg, action, image_path = button_data
-            return self.create_button(label, x, y, bg, fg, action, image_path)
-        elif len(button_data) == 6:
-            label, x, y, bg, fg, action = button_data
-            return self.create_button(label, x, y, bg, fg, action)
-        elif len(button_data) >= 5:
-            label, x, y, bg, fg = button_data[:5]
-            return self.create_button(label, x, y, bg, fg)
-        else:
-            print(f"Invalid button data: {button_data}")
-            self.show_error_feedback(self, f"Invalid button data: {button_data}")
-            return None
-
     def _create_navigation_handlers(self):
         def next_page():
             self.current_page += 1
             self._asyncio_fetch_and_update()
-            pyautogui.moveTo(
-                int(self.settings.get('CURSOR_PARK_X', 1900)),
-                int(self.settings.get('CURSOR_PARK_Y', 1060))
-            )
+            self._park_cursor()
 
         def previous_page():
             if self.current_page > 1:
                 self.current_page -= 1
                 self._asyncio_fetch_and_update()
-                pyautogui.moveTo(
-                    int(self.settings.get('CURSOR_PARK_X', 1900)),
-                    int(self.settings.get('CURSOR_PARK_Y', 1060))
-                )
+                self._park_cursor()
 
         return previous_page, next_page
 
@@ -453,92 +998,296 @@ class DeckMasterApp(QMainWindow):
             arrow_left = QPixmap("assets/arrow_left.png")
             arrow_right = QPixmap("assets/arrow_right.png")
         except Exception as e:
-            print(f"Error loading arrow images: {e}")
+            log.error("Error loading arrow images: %s", e)
             self.show_error_feedback(self, f"Error loading arrow images: {e}")
             return
 
         previous_page, next_page = self._create_navigation_handlers()
 
-        left_button = QPushButton(self.central_widget)
-        left_button.setIcon(arrow_left)
-        left_button.setIconSize(
-            arrow_left.size().scaled(
-                int(self.settings.get('BUTTON_WIDTH', 121)),
-                int(self.settings.get('BUTTON_HEIGHT', 128)),
-                Qt.KeepAspectRatio
-            )
-        )
-        left_button.setGeometry(
-            int(self.settings.get('NAV_LEFT_X', 985)) + int(self.settings.get('OFFSET_X', 20)),
-            int(self.settings.get('NAV_Y', 662)) + int(self.settings.get('OFFSET_BUTTON_V', 7)),
-            int(self.settings.get('BUTTON_WIDTH', 121)),
-            int(self.settings.get('BUTTON_HEIGHT', 128))
-        )
-        left_button.setStyleSheet(
-            f"QPushButton {{"
-            f"background-color: {self.settings.get('NAV_BUTTON_BG', '#2d2d30')};"
-            f"border: none;"
-            f"}}"
-            f"QPushButton:pressed {{"
-            f"background-color: {self.settings.get('BUTTON_ACTIVE_BG', '#007acc')};"
-            f"}}"
+        for arrow, handler in ((arrow_left, previous_page), (arrow_right, next_page)):
+            button = QPushButton(self.central_widget)
+            button.setIcon(arrow)
+            button.setProperty("deckRole", "nav")
+            button.clicked.connect(handler)
+            self.nav_buttons.append(button)
+        self._layout_navigation_buttons()
+        for button in self.nav_buttons:
+            button.show()
+
+    def _layout_navigation_buttons(self) -> None:
+        if not self.nav_buttons:
+            return
+        button_width = self.settings.button_width
+        button_height = self.settings.button_height
+        nav_y = self.settings.nav_y + self.settings.offset_button_v
+        offset_x = self.settings.offset_x
+        positions = (self.settings.nav_left_x, self.settings.nav_right_x)
+        for button, nav_x in zip(self.nav_buttons, positions):
+            icon_size = button.icon().availableSizes()
+            if icon_size:
+                button.setIconSize(icon_size[0].scaled(button_width, button_height, Qt.KeepAspectRatio))
+            button.setGeometry(nav_x + offset_x, nav_y, button_width, button_height)
+
+    async def _load_button_images(self, buttons_data: List[Dict]) -> Dict[str, Tuple[str, QImage]]:
+        loop = asyncio.get_running_loop()
+        size = self._image_size()
+        paths = list(dict.fromkeys(b['image_path'] for b in buttons_data if b.get('image_path')))
+        results = await asyncio.gather(
+            *(loop.run_in_executor(None, self.image_cache.load, path, size) for path in paths),
+            return_exceptions=True
         )
-        left_button.clicked.connect(previous_page)
-        left_button.show()
-
-        right_button = QPushButton(self.central_widget)
-        right_button.setIcon(arrow_right)
-        right_button.setIconSize(
-            arrow_right.size().scaled(
-                int(self.settings.get('BUTTON_WIDTH', 121)),
-                int(self.settings.get('BUTTON_HEIGHT', 128)),
-                Qt.KeepAspectRatio
+        images = {}
+        for path, loaded in zip(paths, results):
+            if isinstance(loaded, Exception):
+                log.warning("Failed to load image '%s': %s", path, loaded)
+            elif loaded is not None:
+                images[path] = loaded
+
+        # Download missing or stale remote images without holding up the page
+        stale = [path for path in paths if self.image_cache.needs_refresh(path)]
+        if stale:
+            asyncio.ensure_future(self._refresh_images(stale, size))
+        return images
+
+    async def _refresh_images(self, paths: List[str], size: Tuple[int, int], use_cached: bool = False) -> None:
+        loop = asyncio.get_running_loop()
+
+        async def refresh(path):
+            try:
+                if use_cached:
+                    loaded = await loop.run_in_executor(None, self.image_cache.load, path, size)
+                    if loaded is not None:
+                        self.image_ready.emit(path, *loaded)
+                        if not self.image_cache.needs_refresh(path):
+                            return
+                loaded = await loop.run_in_executor(None, self.image_cache.refresh, path, size)
+                if loaded is not None:
+                    self.image_ready.emit(path, *loaded)
+            except Exception as e:
+                log.warning("Failed to download image '%s': %s", path, e)
+                self.fetch_failed.emit(f"Failed to load image '{path}': {e}")
+
+        await asyncio.gather(*(refresh(path) for path in paths))
+
+    async def _load_snapshot(self, page: int, revision: Optional[int]) -> PageSnapshot:
+        failures = self.db.failures
+        with FETCH_SECONDS.time():
+            page_data = await self.fetch_page_data(page)
+            buttons_data = await self.fetch_buttons(page)
+            images = await self._load_button_images(buttons_data or [])
+        if self.db.failures != failures:
+            return PageSnapshot(page, None, page_data, buttons_data, images)
+        self.offline_store.save_page(page, revision, page_data, buttons_data)
+        return PageSnapshot(page, revision, page_data, buttons_data, images)
+
+    def _offline_snapshot(self, page: int) -> Optional[PageSnapshot]:
+        """The last good copy of ``page``, as of the revision it was saved at."""
+        saved = self.offline_store.page(page)
+        if saved is None:
+            return None
+        revision, page_data, buttons_data = saved
+        return PageSnapshot(page, revision, page_data, buttons_data, {})
+
+    async def _fetch_page(self, serial: int, page: int, loaded_state: Optional[Tuple]) -> None:
+        started = time.perf_counter()
+        snapshot = None
+        result = 'unchanged'
+        try:
+            revision = await self.fetch_config_revision()
+            if revision is None or revision != self.settings_revision:
+                await self._refresh_settings(revision)
+            if revision is None or loaded_state != (page, revision):
+                snapshot = await self._load_snapshot(page, revision)
+                result = 'loaded'
+                if snapshot.buttons is None:
+                    fallback = await self._fallback_snapshot(page)
+                    snapshot, result = (fallback, 'offline') if fallback else (snapshot, 'failed')
+        except Exception as e:
+            log.error("Error in fetch_task: %s", e, extra={'page': page})
+            self.fetch_failed.emit(f"Error in fetch_task: {e}")
+            result = 'failed'
+            if loaded_state is None or loaded_state[0] != page:
+                snapshot = await self._fallback_snapshot(page)
+                if snapshot is not None:
+                    result = 'offline'
+        POLL_SECONDS.labels(result).observe(time.perf_counter() - started)
+        self.page_loaded.emit(serial, snapshot)
+
+    async def _fallback_snapshot(self, page: int) -> Optional[PageSnapshot]:
+        """The saved copy of ``page`` to show while MySQL is unreachable.
+
+        It carries no revision, so it is never cached and the page is fetched
+        again on the next refresh.
+        """
+        saved = self._offline_snapshot(page)
+        if saved is None:
+            return None
+        log.warning("Database unavailable, showing saved copy of page %s", page, extra={'page': page})
+        return saved._replace(revision=None, images=await self._load_button_images(saved.buttons))
+
+    async def _sync_offline_store(self, revision: int) -> None:
+        """Bring every saved page up to ``revision``, fetching only the stale ones."""
+        try:
+            rows = await self.db.fetch(
+                "SELECT page_number FROM pages UNION SELECT page_number FROM button_pages", name='page_list'
             )
-        )
-        right_button.setGeometry(
-            int(self.settings.get('NAV_RIGHT_X', 1153)) + int(self.settings.get('OFFSET_X', 20)),
-            int(self.settings.get('NAV_Y', 662)) + int(self.settings.get('OFFSET_BUTTON_V', 7)),
-            int(self.settings.get('BUTTON_WIDTH', 121)),
-            int(self.settings.get('BUTTON_HEIGHT', 128))
-        )
-        right_button.setStyleSheet(
-            f"QPushButton {{"
-            f"background-color: {self.settings.get('NAV_BUTTON_BG', '#2d2d30')};"
-            f"border: none;"
-            f"}}"
-            f"QPushButton:pressed {{"
-            f"background-color: {self.settings.get('BUTTON_ACTIVE_BG', '#007acc')};"
-            f"}}"
-        )
-        right_button.clicked.connect(next_page)
-        right_button.show()
+            pages = sorted(row[0] for row in rows)
+            self.offline_store.keep_pages(pages)
+            stale = self.offline_store.stale_pages(revision, pages)
+            for page in stale:
+                if (await self._load_snapshot(page, revision)).revision is None:
+                    return
+            self.synced_revision = revision
+            if stale:
+                log.info("Offline snapshot: saved %d page(s) as of revision %s", len(stale), revision)
+        except Exception as e:
+            log.warning("Could not update offline snapshot: %s", e)
 
-    def _asyncio_fetch_and_update(self) -> None:
-        async def fetch_task():
+    async def _prefetch_pages(self, pages: List[int], revision: int) -> None:
+        for page in pages:
             try:
-                page_data = await self.fetch_page_data(self.current_page)
-                buttons_data = await self.fetch_buttons(self.current_page)
-                return page_data, buttons_data
+                snapshot = await self._load_snapshot(page, revision)
             except Exception as e:
-                print(f"Error in fetch_task: {e}")
-                self.show_error_feedback(self, f"Error in fetch_task: {e}")
-                return None, []
+                log.warning("Error prefetching page %s: %s", page, e, extra={'page': page})
+                continue
+            if snapshot.revision is not None:
+                self.page_prefetched.emit(snapshot)
 
+    def _asyncio_fetch_and_update(self) -> None:
+        """Queue a background refresh of the current page.
+
+        A page found in the snapshot cache is drawn straight away and only
+        revalidated in the background. Only one fetch runs at a time. A
+        refresh requested while the same page is loading is replayed
+        afterwards; a fetch for a page the user has already left is cancelled
+        and its result ignored.
+        """
         try:
-            if self.isVisible():
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                page_data, buttons_data = loop.run_until_complete(fetch_task())
-                loop.close()
+            if not self.isVisible():
+                return
+
+            page = self.current_page
+            if page != self.displayed_page:
+                if page in self.page_cache:
+                    PAGE_SWITCHES.labels('cache').inc()
+                    self.page_cache.move_to_end(page)
+                    self._apply_snapshot(self.page_cache[page])
+                else:
+                    PAGE_SWITCHES.labels('fetch').inc()
+
+            if self.pending_fetch is not None and not self.pending_fetch.done():
+                if self.pending_page == page:
+                    self.refresh_queued = True
+                    return
+                self.pending_fetch.cancel()
+
+            self.fetch_serial += 1
+            self.pending_page = page
+            self.refresh_queued = False
+            self.pending_fetch = self.data_loader.submit(
+                self._fetch_page(self.fetch_serial, page, self.loaded_state)
+            )
+        except Exception as e:
+            log.exception("Error in _asyncio_fetch_and_update: %s", e)
+            self.show_error_feedback(self, f"Error in _asyncio_fetch_and_update: {e}")
 
-                if page_data is not None:
-                    self.update_page_if_changed(page_data)
-                if buttons_data:
-                    self.update_buttons_if_changed(buttons_data)
+    def _on_page_loaded(self, serial: int, snapshot: Optional[PageSnapshot]) -> None:
+        if serial != self.fetch_serial:
+            return  # superseded by a newer request
+        self.pending_fetch = None
+        if not boot_timeline.reported:
+            boot_timeline.mark("first page" if snapshot is not None else "first page (failed)")
+            boot_timeline.report()
 
+        try:
+            if snapshot is not None and snapshot.page == self.current_page:
+                if snapshot.revision is not None:
+                    self._invalidate_page_cache(snapshot.revision)
+                    self._cache_snapshot(snapshot)
+                self._apply_snapshot(snapshot)
         except Exception as e:
-            print(f"Error in _asyncio_fetch_and_update: {e}")
-            self.show_error_feedback(self, f"Error in _asyncio_fetch_and_update: {e}")
+            log.exception("Error applying page data: %s", e)
+            self.show_error_feedback(self, f"Error applying page data: {e}")
+
+        if self.refresh_queued or self.pending_page != self.current_page:
+            self._asyncio_fetch_and_update()
+        else:
+            self._schedule_offline_sync()
+
+    def _show_offline_page(self) -> None:
+        """Draw the current page as saved by the last run, before MySQL answers."""
+        snapshot = self._offline_snapshot(self.current_page)
+        if snapshot is None:
+            return
+        self._apply_snapshot(snapshot._replace(revision=None))
+        # The first fetch then only reloads the page if the config moved on
+        if snapshot.revision is not None:
+            self.loaded_state = (snapshot.page, snapshot.revision)
+        boot_timeline.mark("page (offline snapshot)")
+
+    def _schedule_offline_sync(self) -> None:
+        if not self.loaded_state or self.loaded_state[1] == self.synced_revision:
+            return
+        if self.pending_sync is not None and not self.pending_sync.done():
+            return
+        self.pending_sync = self.data_loader.submit(self._sync_offline_store(self.loaded_state[1]))
+
+    def _apply_snapshot(self, snapshot: PageSnapshot) -> None:
+        self.displayed_page = snapshot.page
+        self.snapshot_images = snapshot.images
+        if snapshot.page_data is not None:
+            self.update_page_if_changed(snapshot.page_data)
+        if snapshot.buttons is not None:
+            self.update_buttons_if_changed(snapshot.buttons)
+        if snapshot.revision is not None:
+            self.loaded_state = (snapshot.page, snapshot.revision)
+            self._prefetch_neighbours(snapshot)
+        else:
+            self.loaded_state = None
+
+    def _prefetch_neighbours(self, snapshot: PageSnapshot) -> None:
+        targets = [snapshot.page - 1, snapshot.page + 1]
+        for data in snapshot.buttons or []:
+            for target in SWITCH_PAGE_TARGET.findall(data.get('action') or ''):
+                if target.lower() == 'home':
+                    targets.append(1)
+                elif target.isdigit():
+                    targets.append(int(target))
+
+        pages = [
+            p for p in dict.fromkeys(targets)
+            if p >= 1 and p != snapshot.page
+            and (p not in self.page_cache or self.page_cache[p].revision != snapshot.revision)
+        ]
+        if not pages:
+            return
+        if self.pending_prefetch is not None:
+            self.pending_prefetch.cancel()
+        self.pending_prefetch = self.data_loader.submit(self._prefetch_pages(pages, snapshot.revision))
+
+    def _cache_snapshot(self, snapshot: PageSnapshot) -> None:
+        if snapshot.revision is None:
+            return
+        if self.loaded_state and self.loaded_state[1] != snapshot.revision:
+            return  # config moved on while this page was being prefetched
+        self.page_cache[snapshot.page] = snapshot
+        self.page_cache.move_to_end(snapshot.page)
+        while len(self.page_cache) > self.settings.page_cache_size:
+            self.page_cache.popitem(last=False)
+
+    def _invalidate_page_cache(self, revision: int, pages: Optional[List[int]] = None) -> None:
+        """Forget snapshots that may be older than ``revision``.
+
+        When ``pages`` says exactly which pages changed, snapshots of the other
+        pages that were current as of the previous revision are carried forward.
+        """
+        for page, snapshot in list(self.page_cache.items()):
+            if snapshot.revision == revision:
+                continue
+            if pages is not None and page not in pages and snapshot.revision == revision - 1:
+                self.page_cache[page] = snapshot._replace(revision=revision)
+            else:
+                del self.page_cache[page]
 
     def _setup_keyboard_shortcuts(self) -> None:
         esc_shortcut = QShortcut(QKeySequence("Escape"), self)
@@ -548,14 +1297,47 @@ class DeckMasterApp(QMainWindow):
         Q_shortcut = QShortcut(QKeySequence("Q"), self)
         Q_shortcut.activated.connect(self.close)
 
+    def closeEvent(self, event):
+        if hasattr(self, "timer"):
+            self.timer.stop()
+        for future in (self.pending_fetch, self.pending_prefetch, self.pending_sync):
+            if future is not None:
+                future.cancel()
+        self.action_executor.shutdown()
+        if self.home_assistant is not None:
+            self.home_assistant.stop()
+        try:
+            self.data_loader.submit(self.db.close()).result(timeout=5)
+        except Exception as e:
+            log.warning("Error closing database pool: %s", e)
+        self.data_loader.stop()
+        self.offline_store.close()
+        super().closeEvent(event)
+
     def run(self) -> None:
         self.show()
         QApplication.instance().exec()
 
 def main():
+    parser = argparse.ArgumentParser(description="DeckMaster control panel")
+    parser.add_argument("--boot-timeline", action="store_true",
+                        help="print how long each startup step takes and how much memory it adds")
+    parser.add_argument("--log-level", help="DEBUG, INFO, WARNING or ERROR (default LOG_LEVEL or INFO)")
+    args = parser.parse_args()
+    configure_logging(args.log_level)
+    boot_timeline.enabled = args.boot_timeline
+    boot_timeline.mark("imports")
+
+    metrics_exporter = MetricsExporter.from_env()
+    metrics_exporter.start()
+
+    # QtWebEngine is imported only when a page needs it, which requires this up front
+    QApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
     app = QApplication([])
+    boot_timeline.mark("QApplication")
     window = DeckMasterApp()
     window.run()
+    metrics_exporter.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
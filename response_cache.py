@@ -0,0 +1,55 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+class RevisionCache:
+    """Config revision plus rendered responses, both keyed to that revision.
+
+    The revision is re-read at most every ``revision_ttl`` seconds, so
+    conditional requests can be answered without touching MySQL. Writes made
+    through this process call :meth:`invalidate` with the new revision and
+    are seen at once; writes from elsewhere within ``revision_ttl``. Up to
+    ``size`` response bodies are kept and are only served for the revision
+    they were built at.
+    """
+
+    def __init__(self, revision_ttl: float = 1.0, size: int = 128):
+        self.revision_ttl = revision_ttl
+        self.size = size
+        self._lock = threading.Lock()
+        self._revision: Optional[int] = None
+        self._checked = 0.0
+        self._bodies: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (revision, body)
+
+    def revision(self, fetch: Callable[[], int]) -> int:
+        with self._lock:
+            if self._revision is not None and time.monotonic() - self._checked < self.revision_ttl:
+                return self._revision
+        revision = fetch()
+        with self._lock:
+            self._revision, self._checked = revision, time.monotonic()
+        return revision
+
+    def get(self, key: str, revision: int) -> Optional[bytes]:
+        with self._lock:
+            cached = self._bodies.get(key)
+            if cached is None or cached[0] != revision:
+                return None
+            self._bodies.move_to_end(key)
+            return cached[1]
+
+    def put(self, key: str, revision: int, body: bytes) -> None:
+        with self._lock:
+            self._bodies[key] = (revision, body)
+            self._bodies.move_to_end(key)
+            while len(self._bodies) > self.size:
+                self._bodies.popitem(last=False)
+
+    def invalidate(self, revision: Optional[int] = None) -> None:
+        """Drop every cached body; ``revision`` is the new one when the caller knows it."""
+        with self._lock:
+            self._bodies.clear()
+            self._revision = revision
+            self._checked = time.monotonic()
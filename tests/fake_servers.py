@@ -0,0 +1,36 @@
+"""Runs the fakes in ``tools/`` on a background event loop for the tests."""
+import asyncio
+import os
+import sys
+import threading
+
+import websockets
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, 'tools'))
+
+
+class ServerThread:
+    """Serves ``handler`` over WebSocket on a free loopback port until :meth:`stop`."""
+
+    def __init__(self, handler):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="fake-server", daemon=True)
+        self._thread.start()
+        self.server = self.run(self._serve(handler))
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def _serve(self, handler):
+        return await websockets.serve(handler, "127.0.0.1", 0)
+
+    def run(self, coro, timeout: float = 5):
+        """Run ``coro`` on the server's loop and return its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def stop(self) -> None:
+        self.server.close()
+        self.run(self.server.wait_closed())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        self.loop.close()
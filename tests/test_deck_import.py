@@ -0,0 +1,89 @@
+import sys
+import os
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dashboard
+from deck_io import import_deck
+
+
+class FakeCursor:
+    """Just enough of a pymysql DictCursor for import_deck and notify_change."""
+
+    def __init__(self, deck_pages):
+        self.deck_pages = deck_pages
+        self.rows = []
+        self.lastrowid = 7
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, args=None):
+        if query.startswith("SELECT page_number FROM pages UNION"):
+            self.rows = [{'page_number': number} for number in self.deck_pages]
+        elif query.startswith("DELETE FROM pages"):
+            self.deck_pages = []
+        elif "MAX(id)" in query:
+            self.rows = [{'max_id': 0}]
+
+    def executemany(self, query, rows):
+        if query.startswith("INSERT INTO pages"):
+            self.deck_pages = sorted(set(self.deck_pages) | {row[0] for row in rows})
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0]
+
+
+class FakeConnection:
+    def __init__(self, deck_pages):
+        self.cur = FakeCursor(deck_pages)
+
+    def cursor(self):
+        return self.cur
+
+    def begin(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+DECK = {
+    'format': 'deckmaster-deck',
+    'version': 1,
+    'settings': {'BG_COLOR': '#000000'},
+    'pages': [{'page_number': 1}],
+    'buttons': [{'label': 'Mute', 'pos_x': 0, 'pos_y': 0, 'action': 'print:hi', 'pages': [1]}],
+}
+
+
+class ReplaceImportTest(unittest.TestCase):
+    def test_replace_without_settings_announces_deleted_pages(self):
+        conn = FakeConnection([1, 2, 3])
+        result = import_deck(conn, DECK, 'replace', include_settings=False)
+        self.assertEqual(result.pages, [1])
+        self.assertEqual(result.removed, [2, 3])
+
+        with mock.patch.object(dashboard, 'get_db_connection', return_value=conn), \
+                mock.patch.object(dashboard, 'publish_change') as publish:
+            dashboard.notify_import(result, result.settings > 0)
+        publish.assert_called_once_with([1, 2, 3], 7)
+
+    def test_overwrite_removes_nothing(self):
+        result = import_deck(FakeConnection([1, 2]), DECK, 'overwrite', include_settings=False)
+        self.assertEqual(result.removed, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import threading
+import unittest
+
+from fake_servers import ServerThread
+
+os.environ.setdefault('HOMEASSISTANT_RETRY_MIN', '0.1')
+
+from actions.homeassisant import HomeAssistantError, HomeAssistantSocket
+from fake_homeassistant import FakeHomeAssistant
+
+TOKEN = "secret"
+
+
+class HomeAssistantSocketTest(unittest.TestCase):
+    def setUp(self):
+        self.fake = FakeHomeAssistant(TOKEN)
+        self.server = ServerThread(self.fake.handler)
+        self.addCleanup(self.server.stop)
+
+    def connect(self, token: str, timeout: float = 5) -> HomeAssistantSocket:
+        client = HomeAssistantSocket(f"http://127.0.0.1:{self.server.port}", token, timeout=timeout)
+        client.start()
+        self.addCleanup(client.stop)
+        return client
+
+    def test_authenticates_and_seeds_states(self):
+        client = self.connect(TOKEN)
+        self.assertTrue(client.connected.wait(5))
+        self.assertEqual(client.state("light.ceiling")["state"], "on")
+        self.assertEqual(set(client.states), set(self.fake.states))
+
+    def test_rejects_a_bad_token(self):
+        client = self.connect("wrong", timeout=0.5)
+        self.assertFalse(client.connected.wait(1))
+        with self.assertRaises(HomeAssistantError):
+            client.call_service("light", "turn_on", {"entity_id": "light.desk"})
+
+    def test_call_service_round_trip(self):
+        client = self.connect(TOKEN)
+        self.assertTrue(client.connected.wait(5))
+        result = client.call_service("light", "turn_on", {"entity_id": "light.desk"})
+        self.assertIn("context", result)
+        self.assertEqual(self.fake.service_calls, [("light", "turn_on", {"entity_id": "light.desk"})])
+        # The state_changed event is sent before the result
+        self.assertEqual(client.state("light.desk")["state"], "on")
+
+    def test_call_service_error(self):
+        client = self.connect(TOKEN)
+        self.assertTrue(client.connected.wait(5))
+        with self.assertRaisesRegex(HomeAssistantError, "not found"):
+            client.call_service("light", "explode", {"entity_id": "light.desk"})
+
+    def test_state_changed_event_updates_cache(self):
+        client = self.connect(TOKEN)
+        self.assertTrue(client.connected.wait(5))
+        changed = threading.Event()
+        seen = []
+
+        def listener(entity_id, state):
+            seen.append((entity_id, state and state["state"]))
+            changed.set()
+
+        client.add_listener(listener)
+        self.server.run(self.fake.set_state("switch.fan", "on"))
+        self.assertTrue(changed.wait(5))
+        self.assertEqual(seen, [("switch.fan", "on")])
+        self.assertEqual(client.state("switch.fan")["state"], "on")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import unittest
+from unittest import mock
+
+from fake_servers import ServerThread
+
+os.environ.setdefault('OBS_RETRY_MIN', '0.1')
+
+from actions import compile_action
+from actions import obs
+from fake_obs import FakeObs
+
+PASSWORD = "secret"
+
+
+class ObsConnectionTest(unittest.TestCase):
+    def setUp(self):
+        self.fake = FakeObs(PASSWORD)
+        self.server = ServerThread(self.fake.handler)
+        self.addCleanup(self.server.stop)
+
+    def connect(self, password: str = PASSWORD) -> obs.ObsConnection:
+        connection = obs.ObsConnection("127.0.0.1", self.server.port, password)
+        connection.start()
+        self.addCleanup(connection.stop)
+        return connection
+
+    def test_hello_identify_handshake(self):
+        connection = self.connect()
+        self.assertTrue(connection.connected.wait(5))
+        self.assertEqual(connection.call("GetVersion")["rpcVersion"], 1)
+
+    def test_wrong_password_is_refused(self):
+        connection = self.connect("wrong")
+        connection.timeout = 0.5
+        self.assertFalse(connection.connected.wait(1))
+        with self.assertRaises(obs.ObsError):
+            connection.call("GetVersion")
+
+    def test_adjacent_obs_actions_are_sent_as_one_batch(self):
+        connection = self.connect()
+        self.assertTrue(connection.connected.wait(5))
+        plan = compile_action("change_scene:Gaming && start_recording")
+        self.assertEqual(len(plan), 1)
+
+        with mock.patch.object(obs, '_obs', connection):
+            plan[0].handler(*plan[0].args)
+        self.assertEqual(self.fake.frames, 1)
+        self.assertEqual(self.fake.requests, ["SetCurrentProgramScene", "StartRecord"])
+        self.assertEqual(self.fake.current_scene, "Gaming")
+        self.assertTrue(self.fake.recording)
+
+    def test_failed_request_raises(self):
+        connection = self.connect()
+        self.assertTrue(connection.connected.wait(5))
+        with self.assertRaisesRegex(obs.ObsError, r"SetCurrentProgramScene failed \(600\)"):
+            connection.call("SetCurrentProgramScene", {"sceneName": "Missing"})
+
+    def test_failed_batch_request_raises(self):
+        connection = self.connect()
+        self.assertTrue(connection.connected.wait(5))
+        plan = compile_action("change_scene:Missing && start_recording")
+        with mock.patch.object(obs, '_obs', connection):
+            with self.assertRaisesRegex(obs.ObsError, r"failed \(600\).*1 request\(s\) not run"):
+                plan[0].handler(*plan[0].args)
+        self.assertFalse(self.fake.recording)
+
+
+if __name__ == '__main__':
+    unittest.main()
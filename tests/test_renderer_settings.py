@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, 'benchmarks'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+try:
+    from PySide6.QtWidgets import QApplication
+except ImportError:
+    QApplication = None
+
+
+@unittest.skipIf(QApplication is None, "PySide6 is not installed")
+class ButtonResizeTest(unittest.TestCase):
+    def setUp(self):
+        from fake_deck import FakeDeckDatabase, synthetic_deck
+        from renderer import DeckMasterApp
+
+        self.workdir = tempfile.TemporaryDirectory(prefix="deckmaster-test-")
+        self.addCleanup(self.workdir.cleanup)
+        os.environ['OFFLINE_SNAPSHOT'] = os.path.join(self.workdir.name, 'offline.sqlite3')
+        os.environ['IMAGE_CACHE_DIR'] = os.path.join(self.workdir.name, 'images')
+        os.environ['XDG_CACHE_HOME'] = self.workdir.name
+        cwd = os.getcwd()
+        os.chdir(REPO_DIR)  # the renderer loads its assets by relative path
+        self.addCleanup(os.chdir, cwd)
+
+        self.qt_app = QApplication.instance() or QApplication([])
+        self.app = DeckMasterApp(FakeDeckDatabase(synthetic_deck(8)))
+        self.app.timer.stop()
+        self.addCleanup(self.close)
+        deadline = time.monotonic() + 10
+        while self.app.loaded_state is None and time.monotonic() < deadline:
+            self.qt_app.processEvents()
+            time.sleep(0.01)
+        self.assertIsNotNone(self.app.loaded_state, "the first page never loaded")
+
+    def close(self):
+        self.app.close()
+        self.app.deleteLater()
+        self.qt_app.processEvents()
+
+    def icon_buttons(self):
+        return [
+            (self.app.button_widgets[button_id], state['image_path'])
+            for button_id, state in self.app.button_state.items() if state.get('image_path')
+        ]
+
+    def test_resize_rescales_icons(self):
+        buttons = self.icon_buttons()
+        self.assertTrue(buttons)
+        for button, _ in buttons:
+            self.assertGreater(button.iconSize().width(), 60)
+
+        self.app._on_settings_loaded(dict(self.app.settings.raw, BUTTON_WIDTH='60', BUTTON_HEIGHT='60'))
+
+        for button, image_path in self.icon_buttons():
+            pixmap = self.app._load_image(image_path)
+            self.assertLessEqual(pixmap.width(), 60)
+            self.assertLessEqual(pixmap.height(), 60)
+            self.assertLessEqual(button.iconSize().width(), 60)
+            self.assertLessEqual(button.iconSize().height(), 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
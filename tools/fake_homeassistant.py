@@ -0,0 +1,151 @@
+"""Minimal Home Assistant WebSocket API for exercising the deck without a real server.
+
+Speaks enough of the protocol for ``HOMEASSISTANT_TRANSPORT=websocket``:
+authentication, ``subscribe_events`` for ``state_changed``, ``get_states``
+and ``call_service`` for on/off style services, which flip the entity and
+broadcast the change to every subscriber.
+
+    python tools/fake_homeassistant.py --port 8123 --token secret
+
+then point the renderer at it with ``HOMEASSISTANT_URL=http://localhost:8123``.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import websockets
+
+DEFAULT_ENTITIES = {
+    "light.desk": "off",
+    "light.ceiling": "on",
+    "switch.fan": "off",
+    "media_player.spotify": "paused",
+}
+
+# service -> new state, None meaning "flip between on and off"
+SERVICE_STATES = {
+    "turn_on": "on",
+    "turn_off": "off",
+    "toggle": None,
+    "media_play": "playing",
+    "media_pause": "paused",
+    "media_play_pause": None,
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FakeHomeAssistant:
+    def __init__(self, token: str = "", entities: Optional[Dict[str, str]] = None):
+        self.token = token
+        self.states = {
+            entity_id: {"entity_id": entity_id, "state": state, "attributes": {}, "last_changed": _now()}
+            for entity_id, state in (entities or DEFAULT_ENTITIES).items()
+        }
+        self.service_calls = []
+        self._subscribers = {}  # websocket -> subscription id
+        self._event_ids = itertools.count(1)
+
+    async def handler(self, ws) -> None:
+        await ws.send(json.dumps({"type": "auth_required", "ha_version": "fake"}))
+        auth = json.loads(await ws.recv())
+        if auth.get("type") != "auth" or (self.token and auth.get("access_token") != self.token):
+            await ws.send(json.dumps({"type": "auth_invalid", "message": "Invalid access token"}))
+            return
+        await ws.send(json.dumps({"type": "auth_ok", "ha_version": "fake"}))
+
+        try:
+            async for raw in ws:
+                message = json.loads(raw)
+                await self._dispatch(ws, message)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._subscribers.pop(ws, None)
+
+    async def _dispatch(self, ws, message: Dict) -> None:
+        message_id = message.get("id")
+        kind = message.get("type")
+        if kind == "subscribe_events":
+            self._subscribers[ws] = message_id
+            await self._result(ws, message_id, None)
+        elif kind == "get_states":
+            await self._result(ws, message_id, list(self.states.values()))
+        elif kind == "call_service":
+            domain, service = message.get("domain"), message.get("service")
+            data = message.get("service_data") or {}
+            self.service_calls.append((domain, service, data))
+            if service not in SERVICE_STATES:
+                await self._error(ws, message_id, "not_found", f"Service {domain}.{service} not found.")
+                return
+            entity_ids = data.get("entity_id") or []
+            if isinstance(entity_ids, str):
+                entity_ids = [entity_ids]
+            for entity_id in entity_ids:
+                await self.set_state(entity_id, SERVICE_STATES[service], data)
+            await self._result(ws, message_id, {"context": {"id": str(message_id)}})
+        elif kind == "ping":
+            await ws.send(json.dumps({"id": message_id, "type": "pong"}))
+        else:
+            await self._error(ws, message_id, "unknown_command", f"Unknown command {kind}.")
+
+    async def set_state(self, entity_id: str, state: Optional[str], attributes: Optional[Dict] = None) -> None:
+        old_state = self.states.get(entity_id)
+        if state is None:
+            state = "off" if old_state and old_state["state"] == "on" else "on"
+        new_state = {
+            "entity_id": entity_id,
+            "state": state,
+            "attributes": {k: v for k, v in (attributes or {}).items() if k != "entity_id"},
+            "last_changed": _now(),
+        }
+        self.states[entity_id] = new_state
+        for ws, subscription_id in list(self._subscribers.items()):
+            try:
+                await ws.send(json.dumps({
+                    "id": subscription_id,
+                    "type": "event",
+                    "event": {
+                        "event_type": "state_changed",
+                        "data": {"entity_id": entity_id, "old_state": old_state, "new_state": new_state},
+                        "origin": "LOCAL",
+                        "time_fired": _now(),
+                        "context": {"id": str(next(self._event_ids))},
+                    },
+                }))
+            except websockets.ConnectionClosed:
+                self._subscribers.pop(ws, None)
+
+    async def _result(self, ws, message_id, result) -> None:
+        await ws.send(json.dumps({"id": message_id, "type": "result", "success": True, "result": result}))
+
+    async def _error(self, ws, message_id, code: str, text: str) -> None:
+        await ws.send(json.dumps({
+            "id": message_id, "type": "result", "success": False, "error": {"code": code, "message": text}
+        }))
+
+    async def serve(self, host: str, port: int) -> None:
+        async with websockets.serve(self.handler, host, port):
+            print(f"Fake Home Assistant listening on ws://{host}:{port}/api/websocket")
+            await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--token", default="", help="accept only this access token (default: any)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(FakeHomeAssistant(args.token).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Minimal obs-websocket v5 server for exercising the OBS actions without OBS.
+
+Implements the Hello/Identify handshake (with password authentication when
+``--password`` is given), single requests and ``RequestBatch`` for the
+requests the deck uses: scenes, recording, studio mode and ``GetVersion``.
+
+    python tools/fake_obs.py --port 4455 --password secret
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+from typing import Dict, List
+
+import websockets
+
+STATUS_SUCCESS = 100
+STATUS_UNKNOWN_REQUEST = 204
+STATUS_RESOURCE_NOT_FOUND = 600
+STATUS_OUTPUT_RUNNING = 500
+STATUS_OUTPUT_NOT_RUNNING = 501
+
+
+class FakeObs:
+    def __init__(self, password: str = "", scenes: List[str] = None):
+        self.password = password
+        self.scenes = scenes or ["Scene", "Gaming", "Just Chatting", "BRB"]
+        self.current_scene = self.scenes[0]
+        self.recording = False
+        self.studio_mode = False
+        self.frames = 0  # request frames received, a batch counts once
+        self.requests: List[str] = []
+
+    def _auth(self, salt: str, challenge: str) -> str:
+        secret = base64.b64encode(hashlib.sha256((self.password + salt).encode("utf-8")).digest())
+        return base64.b64encode(hashlib.sha256(secret + challenge.encode("utf-8")).digest()).decode("ascii")
+
+    async def handler(self, ws) -> None:
+        hello = {"obsWebSocketVersion": "5.0.0-fake", "rpcVersion": 1}
+        if self.password:
+            salt = base64.b64encode(os.urandom(16)).decode("ascii")
+            challenge = base64.b64encode(os.urandom(16)).decode("ascii")
+            hello["authentication"] = {"salt": salt, "challenge": challenge}
+        await ws.send(json.dumps({"op": 0, "d": hello}))
+
+        identify = json.loads(await ws.recv())
+        if identify.get("op") != 1:
+            await ws.close(4007, "Not identified")
+            return
+        if self.password and identify["d"].get("authentication") != self._auth(salt, challenge):
+            await ws.close(4009, "Authentication failed")
+            return
+        await ws.send(json.dumps({"op": 2, "d": {"negotiatedRpcVersion": 1}}))
+
+        try:
+            async for raw in ws:
+                message = json.loads(raw)
+                data = message.get("d") or {}
+                if message.get("op") == 6:
+                    self.frames += 1
+                    result = self.execute(data.get("requestType"), data.get("requestData") or {})
+                    await ws.send(json.dumps({"op": 7, "d": dict(result, requestId=data.get("requestId"))}))
+                elif message.get("op") == 8:
+                    self.frames += 1
+                    results = []
+                    for request in data.get("requests", []):
+                        result = self.execute(request.get("requestType"), request.get("requestData") or {})
+                        results.append(result)
+                        if data.get("haltOnFailure") and not result["requestStatus"]["result"]:
+                            break
+                    await ws.send(json.dumps({"op": 9, "d": {"requestId": data.get("requestId"), "results": results}}))
+        except websockets.ConnectionClosed:
+            pass
+
+    def execute(self, request_type: str, data: Dict) -> Dict:
+        self.requests.append(request_type)
+        response = None
+        code = STATUS_SUCCESS
+        comment = None
+        if request_type == "GetVersion":
+            response = {"obsVersion": "30.0.0-fake", "obsWebSocketVersion": "5.0.0-fake", "rpcVersion": 1}
+        elif request_type == "GetSceneList":
+            response = {"currentProgramSceneName": self.current_scene,
+                        "scenes": [{"sceneName": name} for name in self.scenes]}
+        elif request_type == "GetCurrentProgramScene":
+            response = {"currentProgramSceneName": self.current_scene}
+        elif request_type == "SetCurrentProgramScene":
+            if data.get("sceneName") in self.scenes:
+                self.current_scene = data["sceneName"]
+            else:
+                code, comment = STATUS_RESOURCE_NOT_FOUND, f"No source was found by the name of `{data.get('sceneName')}`."
+        elif request_type == "StartRecord":
+            if self.recording:
+                code, comment = STATUS_OUTPUT_RUNNING, "The record output is already running."
+            self.recording = True
+        elif request_type == "StopRecord":
+            if not self.recording:
+                code, comment = STATUS_OUTPUT_NOT_RUNNING, "The record output is not running."
+            self.recording = False
+        elif request_type == "GetRecordStatus":
+            response = {"outputActive": self.recording}
+        elif request_type == "GetStudioModeEnabled":
+            response = {"studioModeEnabled": self.studio_mode}
+        elif request_type == "SetStudioModeEnabled":
+            self.studio_mode = bool(data.get("studioModeEnabled"))
+        else:
+            code, comment = STATUS_UNKNOWN_REQUEST, f"Your request type `{request_type}` is not valid."
+
+        result = {"requestType": request_type, "requestStatus": {"result": code == STATUS_SUCCESS, "code": code}}
+        if comment:
+            result["requestStatus"]["comment"] = comment
+        if response is not None:
+            result["responseData"] = response
+        return result
+
+    async def serve(self, host: str, port: int) -> None:
+        async with websockets.serve(self.handler, host, port):
+            print(f"Fake OBS listening on ws://{host}:{port}")
+            await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4455)
+    parser.add_argument("--password", default="")
+    args = parser.parse_args()
+    try:
+        asyncio.run(FakeObs(args.password).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
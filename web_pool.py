@@ -0,0 +1,128 @@
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from PySide6.QtCore import QUrl
+from PySide6.QtWidgets import QWidget
+
+log = logging.getLogger(__name__)
+
+
+def process_rss_kb(pid: int) -> int:
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+class WebViewPool:
+    """LRU pool of ``QWebEngineView`` widgets keyed by URL.
+
+    Showing a URL that is already in the pool just raises its view, so pages
+    with embedded dashboards flip instantly instead of reloading. Views that
+    are not on screen are hidden and frozen (timers and rendering stop but
+    the DOM is kept). When the pool holds more than ``size`` views the least
+    recently used one is destroyed, and when the render processes use more
+    than ``memory_cap_mb`` the least recently used hidden views are
+    discarded, which frees their renderer but keeps the URL so they reload
+    on the next visit.
+
+    QtWebEngine is imported when the first view is created.
+    """
+
+    def __init__(self, container: QWidget, size: int = 3, memory_cap_mb: int = 512):
+        self.container = container
+        self.size = max(1, size)
+        self.memory_cap_kb = memory_cap_mb * 1024
+        self.views: "OrderedDict[str, QWidget]" = OrderedDict()
+        self.current: Optional[str] = None
+
+    def configure(self, size: int, memory_cap_mb: int) -> None:
+        self.size = max(1, size)
+        self.memory_cap_kb = memory_cap_mb * 1024
+        self._enforce_limits()
+
+    def show(self, url: str) -> QWidget:
+        """Put the view for ``url`` on screen, creating and loading it if needed."""
+        if url == self.current:
+            return self.views[url]
+
+        from PySide6.QtWebEngineCore import QWebEnginePage
+
+        self.hide()
+        view = self.views.get(url)
+        if view is None:
+            from PySide6.QtWebEngineWidgets import QWebEngineView
+            view = QWebEngineView(self.container)
+            view.setGeometry(self.container.rect())
+            view.setUrl(QUrl(url))
+            self.views[url] = view
+            log.info("Loaded webpage: %s", url)
+        else:
+            self.views.move_to_end(url)
+            # A discarded page reloads by itself when made active again
+            view.page().setLifecycleState(QWebEnginePage.LifecycleState.Active)
+
+        view.show()
+        view.raise_()
+        self.current = url
+        self._enforce_limits()
+        return view
+
+    def hide(self) -> None:
+        """Take the current view off screen and freeze it."""
+        if self.current is None:
+            return
+        from PySide6.QtWebEngineCore import QWebEnginePage
+
+        view = self.views[self.current]
+        self.current = None
+        view.hide()
+        page = view.page()
+        if page.lifecycleState() == QWebEnginePage.LifecycleState.Active:
+            page.setLifecycleState(QWebEnginePage.LifecycleState.Frozen)
+
+    def set_geometry(self, width: int, height: int) -> None:
+        for view in self.views.values():
+            view.setGeometry(0, 0, width, height)
+
+    def memory_kb(self) -> Dict[int, int]:
+        """RSS of each render process still backing a view, by pid."""
+        pids = {view.page().renderProcessPid() for view in self.views.values()}
+        return {pid: process_rss_kb(pid) for pid in pids if pid > 0}
+
+    def _enforce_limits(self) -> None:
+        from PySide6.QtWebEngineCore import QWebEnginePage
+
+        while len(self.views) > self.size:
+            url = next(u for u in self.views if u != self.current)
+            log.info("Closing pooled webpage: %s", url)
+            self.views.pop(url).deleteLater()
+
+        usage = self.memory_kb()
+        total = sum(usage.values())
+        if total <= self.memory_cap_kb:
+            return
+
+        for url, view in list(self.views.items()):
+            if total <= self.memory_cap_kb:
+                break
+            page = view.page()
+            if url == self.current or page.lifecycleState() == QWebEnginePage.LifecycleState.Discarded:
+                continue
+            pid = page.renderProcessPid()
+            page.setLifecycleState(QWebEnginePage.LifecycleState.Discarded)
+            log.info("Discarded pooled webpage %s to stay under %d MB", url, self.memory_cap_kb // 1024)
+            # Render processes can be shared between sites; only count a
+            # process as freed once no live view uses it
+            still_used = any(
+                other.page().renderProcessPid() == pid
+                and other.page().lifecycleState() != QWebEnginePage.LifecycleState.Discarded
+                for other in self.views.values() if other is not view
+            )
+            if not still_used:
+                total -= usage.get(pid, 0)